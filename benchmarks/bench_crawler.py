@@ -0,0 +1,303 @@
+"""
+爬虫基准测试
+在本地Steam替身服务器（benchmarks/steam_stub_server.py）上测量 search_games / get_top_games /
+get_free_games / get_discounted_games 在不同并发度下的延迟（p50/p95/p99）、吞吐量和上游请求数，
+结果写入JSON文件，可与之前的结果对比发现性能回退
+
+用法:
+    python benchmarks/bench_crawler.py [--concurrency 1 4 16] [--requests 20] [--latency-ms 50 --jitter-ms 30]
+    python benchmarks/bench_crawler.py --baseline benchmarks/results/crawler-20240101-120000.json
+    python benchmarks/bench_crawler.py --base-url http://127.0.0.1:8765   # 使用单独运行的替身服务器
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config_loader import config  # noqa: E402
+from steam_stub_server import SteamStubServer  # noqa: E402
+
+RESULTS_DIR = os.path.join(BASE_DIR, 'benchmarks', 'results')
+OPERATIONS = ('search_games', 'get_top_games', 'get_free_games', 'get_discounted_games')
+SEARCH_KEYWORDS = ('rpg', 'adventure', 'strategy', 'puzzle', 'racing', 'horror', 'roguelike', 'survival')
+TOP_FILTER_TYPES = ('topsellers', 'popularnew', 'trendingweek')
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """线性插值的百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def make_call(crawler, operation: str, index: int, max_results: int, use_cache: bool):
+    """第index次请求的调用（搜索关键词、榜单类型轮换，避免全部命中同一结果）"""
+    if operation == 'search_games':
+        keywords = f'{SEARCH_KEYWORDS[index % len(SEARCH_KEYWORDS)]} {index}'
+        return crawler.search_games(keywords, max_results=max_results, use_cache=use_cache)
+    if operation == 'get_top_games':
+        filter_type = TOP_FILTER_TYPES[index % len(TOP_FILTER_TYPES)]
+        return crawler.get_top_games(max_results=max_results, filter_type=filter_type, use_cache=use_cache)
+    if operation == 'get_free_games':
+        return crawler.get_free_games(max_results=max_results, use_cache=use_cache)
+    return crawler.get_discounted_games(min_discount=0, max_results=max_results, use_cache=use_cache)
+
+
+class UpstreamCounter:
+    """读取/清零替身服务器的请求计数（进程内直接访问，外部服务器通过/__stub__接口）"""
+
+    def __init__(self, stub: Optional[SteamStubServer], base_url: str):
+        self.stub = stub
+        self.base_url = base_url
+
+    def reset(self):
+        if self.stub is not None:
+            self.stub.reset_counts()
+        else:
+            urllib.request.urlopen(f'{self.base_url}/__stub__/reset', timeout=5).read()
+
+    def snapshot(self) -> Dict[str, int]:
+        if self.stub is not None:
+            return self.stub.snapshot_counts()
+        with urllib.request.urlopen(f'{self.base_url}/__stub__/stats', timeout=5) as response:
+            return json.loads(response.read())
+
+
+def summarize(operation: str, crawler_kind: str, concurrency: int, outcomes: List[Dict],
+              wall_seconds: float, upstream: Dict[str, int]) -> Dict:
+    latencies = [outcome['ms'] for outcome in outcomes]
+    return {
+        'operation': operation,
+        'crawler': crawler_kind,
+        'concurrency': concurrency,
+        'requests': len(outcomes),
+        'errors': sum(1 for outcome in outcomes if outcome['error']),
+        'empty_results': sum(1 for outcome in outcomes if not outcome['error'] and not outcome['games']),
+        'games_returned': sum(outcome['games'] for outcome in outcomes),
+        'enrichment_failures': sum(outcome['enrichment_failures'] for outcome in outcomes),
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50), 2),
+            'p95': round(percentile(latencies, 95), 2),
+            'p99': round(percentile(latencies, 99), 2),
+            'mean': round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            'max': round(max(latencies), 2) if latencies else 0.0,
+        },
+        'throughput_rps': round(len(outcomes) / wall_seconds, 2) if wall_seconds else 0.0,
+        'wall_seconds': round(wall_seconds, 3),
+        'upstream_requests': upstream,
+    }
+
+
+def _outcome(games, start: float, error: Optional[Exception]) -> Dict:
+    games = games or []
+    return {
+        'ms': (time.perf_counter() - start) * 1000,
+        'error': error is not None,
+        'games': len(games),
+        'enrichment_failures': sum(1 for game in games if game.get('enrichment_status') not in (None, 'ok')),
+    }
+
+
+async def run_async(crawler, operation: str, concurrency: int, requests: int, max_results: int,
+                    use_cache: bool) -> List[Dict]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index: int) -> Dict:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                games = await make_call(crawler, operation, index, max_results, use_cache)
+                return _outcome(games, start, None)
+            except Exception as e:
+                return _outcome(None, start, e)
+
+    return await asyncio.gather(*(one(index) for index in range(requests)))
+
+
+def run_sync(crawler, operation: str, concurrency: int, requests: int, max_results: int,
+             use_cache: bool) -> List[Dict]:
+    def one(index: int) -> Dict:
+        start = time.perf_counter()
+        try:
+            return _outcome(make_call(crawler, operation, index, max_results, use_cache), start, None)
+        except Exception as e:
+            return _outcome(None, start, e)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(one, range(requests)))
+
+
+def run_suite(args, counter: UpstreamCounter) -> List[Dict]:
+    # 爬虫模块在导入时按配置创建限流器、缓存等全局实例，因此在configure之后才导入
+    from async_steam_crawler import AsyncSteamCrawler
+    from steam_crawler import SteamCrawler
+
+    results = []
+    sync_crawler = SteamCrawler() if args.crawler == 'sync' else None
+
+    async def run_level(operation: str, concurrency: int):
+        async with AsyncSteamCrawler(pool_size=max(concurrency * 4, 10)) as crawler:
+            return await run_async(crawler, operation, concurrency, args.requests, args.max_results,
+                                   args.use_cache)
+
+    for operation in args.operations:
+        for concurrency in args.concurrency:
+            counter.reset()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                if sync_crawler is not None:
+                    outcomes = run_sync(sync_crawler, operation, concurrency, args.requests, args.max_results,
+                                        args.use_cache)
+                else:
+                    outcomes = asyncio.run(run_level(operation, concurrency))
+            result = summarize(operation, args.crawler, concurrency, outcomes,
+                               time.perf_counter() - start, counter.snapshot())
+            results.append(result)
+            print_result(result)
+    return results
+
+
+def print_header():
+    print(f"{'操作':<22}{'并发':>5}{'请求':>6}{'错误':>6}{'p50ms':>9}{'p95ms':>9}{'p99ms':>9}"
+          f"{'req/s':>8}{'上游请求':>10}")
+
+
+def print_result(result: Dict):
+    latency = result['latency_ms']
+    upstream = sum(count for key, count in result['upstream_requests'].items() if not key.startswith('injected'))
+    print(f"{result['operation']:<22}{result['concurrency']:>5}{result['requests']:>6}"
+          f"{result['errors'] + result['empty_results']:>6}{latency['p50']:>9.1f}{latency['p95']:>9.1f}"
+          f"{latency['p99']:>9.1f}{result['throughput_rps']:>8.1f}{upstream:>10}")
+
+
+def compare(results: List[Dict], baseline_path: str, threshold: float) -> int:
+    """与基线结果对比，p95延迟变慢或吞吐量下降超过threshold时记为回退，返回回退数量"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {(item['operation'], item['crawler'], item['concurrency']): item
+                    for item in json.load(f)['results']}
+
+    print(f"\n与基线对比: {baseline_path} (阈值 {threshold:.0%})")
+    print(f"{'操作':<22}{'并发':>5}{'p50变化':>10}{'p95变化':>10}{'吞吐变化':>10}")
+    regressions = 0
+    for result in results:
+        base = baseline.get((result['operation'], result['crawler'], result['concurrency']))
+        if base is None:
+            continue
+        p50 = _change(result['latency_ms']['p50'], base['latency_ms']['p50'])
+        p95 = _change(result['latency_ms']['p95'], base['latency_ms']['p95'])
+        rps = _change(result['throughput_rps'], base['throughput_rps'])
+        regressed = p95 > threshold or rps < -threshold
+        regressions += regressed
+        print(f"{result['operation']:<22}{result['concurrency']:>5}{p50:>+10.1%}{p95:>+10.1%}{rps:>+10.1%}"
+              f"{'  ⚠️ 回退' if regressed else ''}")
+    return regressions
+
+
+def _change(current: float, base: float) -> float:
+    return (current - base) / base if base else 0.0
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def configure(args, base_url: str, data_dir: str):
+    """让爬虫指向替身服务器，持久化缓存写入临时目录，默认关闭限流（限流会掩盖爬虫本身的开销）"""
+    config.set('steam.base_url', base_url)
+    config.set('steam.search_mode', 'live')
+    config.set('steam.rate_limit.enabled', args.rate_limit)
+    config.set('cache.catalog_store.path', os.path.join(data_dir, 'catalog.sqlite3'))
+    config.set('logging.console_output', False)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='爬虫基准测试（本地Steam替身服务器）')
+    arg_parser.add_argument('--operations', nargs='+', choices=OPERATIONS, default=list(OPERATIONS))
+    arg_parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16], help='并发度')
+    arg_parser.add_argument('--requests', type=int, default=20, help='每个操作、每个并发度的请求数')
+    arg_parser.add_argument('--max-results', type=int, default=20, help='每次请求的max_results')
+    arg_parser.add_argument('--crawler', choices=('async', 'sync'), default='async')
+    arg_parser.add_argument('--use-cache', action='store_true', help='使用缓存（默认绕过缓存测量冷路径）')
+    arg_parser.add_argument('--rate-limit', action='store_true', help='保留Steam限流器')
+    arg_parser.add_argument('--base-url', help='使用已运行的替身服务器（默认在进程内启动）')
+    arg_parser.add_argument('--latency-ms', type=float, default=50.0, help='替身服务器基础延迟')
+    arg_parser.add_argument('--jitter-ms', type=float, default=30.0, help='替身服务器延迟抖动上限')
+    arg_parser.add_argument('--error-rate', type=float, default=0.0, help='替身服务器返回503的概率')
+    arg_parser.add_argument('--throttle-rate', type=float, default=0.0, help='替身服务器返回429的概率')
+    arg_parser.add_argument('--output', help='结果文件（默认 benchmarks/results/crawler-<时间>.json）')
+    arg_parser.add_argument('--baseline', help='对比的基线结果文件')
+    arg_parser.add_argument('--threshold', type=float, default=0.2, help='判定回退的变化比例')
+    args = arg_parser.parse_args()
+
+    stub = None
+    base_url = args.base_url
+    if base_url is None:
+        stub = SteamStubServer(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                               throttle_rate=args.throttle_rate).start()
+        base_url = stub.url
+
+    with tempfile.TemporaryDirectory(prefix='bench-crawler-') as data_dir:
+        configure(args, base_url, data_dir)
+        print(f"🎮 Steam替身服务器: {base_url}, 爬虫: {args.crawler}, 缓存: {'开' if args.use_cache else '关'}")
+        print_header()
+        try:
+            results = run_suite(args, UpstreamCounter(stub, base_url))
+        finally:
+            if stub is not None:
+                stub.stop()
+
+    report = {
+        'benchmark': 'crawler',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'settings': {
+            'crawler': args.crawler,
+            'requests': args.requests,
+            'max_results': args.max_results,
+            'use_cache': args.use_cache,
+            'rate_limit': args.rate_limit,
+            'stub': None if args.base_url else {
+                'latency_ms': args.latency_ms,
+                'jitter_ms': args.jitter_ms,
+                'error_rate': args.error_rate,
+                'throttle_rate': args.throttle_rate,
+            },
+        },
+        'results': results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"crawler-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存: {output}")
+
+    if args.baseline:
+        return 1 if compare(results, args.baseline, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""
+游戏详情响应体积基准测试
+以合成的appdetails响应（按Steam接口格式构造）为输入，对比get_game_details工具在不同参数下返回给调用方的字节数：
+原先的完整详情（indent=2）、默认字段、指定少量字段，以及不同字节预算
+
+用法: python benchmarks/bench_game_details_payload.py [--fixture benchmarks/fixtures/appdetails_1145360.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, 'src'))
+
+from config_loader import config  # noqa: E402
+from game_details import project_details  # noqa: E402
+from steam_crawler import SteamCrawlerBase  # noqa: E402
+
+DEFAULT_FIXTURE = os.path.join(BASE_DIR, 'benchmarks', 'fixtures', 'appdetails_1145360.json')
+
+
+def response_bytes(payload) -> int:
+    """与MCP工具相同的方式序列化（indent=2）后的字节数"""
+    return len(json.dumps(payload, ensure_ascii=False, indent=2).encode('utf-8'))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='游戏详情响应体积基准测试')
+    arg_parser.add_argument('--fixture', default=DEFAULT_FIXTURE, help='appdetails响应（JSON）')
+    arg_parser.add_argument('--repeat', type=int, default=200, help='计时重复次数')
+    args = arg_parser.parse_args()
+
+    with open(args.fixture, 'r', encoding='utf-8') as f:
+        response = json.load(f)
+    app_id, entry = next(iter(response.items()))
+    details = SteamCrawlerBase()._format_game_details(app_id, entry['data'])
+
+    default_fields = config.get('steam.game_details.default_fields')
+    default_budget = config.get('steam.game_details.max_bytes', 8192)
+    cases = [
+        ('完整详情(原先)', None),
+        ('all 不限字节', {'fields': ['all'], 'max_bytes': 0}),
+        ('全部字段+去HTML', {'fields': None, 'max_bytes': 0, 'strip': True}),
+        (f'默认字段 预算{default_budget}', {'fields': default_fields, 'max_bytes': default_budget}),
+        ('默认字段 预算4096', {'fields': default_fields, 'max_bytes': 4096}),
+        ('默认字段 预算2048', {'fields': default_fields, 'max_bytes': 2048}),
+        ('name,price,genres', {'fields': ['name', 'price', 'genres'], 'max_bytes': default_budget}),
+    ]
+
+    baseline = response_bytes(details)
+    print(f"{'场景':<24}{'字节':>8}{'占原先':>8}{'耗时us':>9}  被截断字段")
+    for label, kwargs in cases:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            payload = details if kwargs is None else project_details(details, **kwargs)
+        elapsed_us = (time.perf_counter() - start) / args.repeat * 1e6
+        size = response_bytes(payload)
+        truncated = ','.join(payload.get('truncated_fields', [])) or '-'
+        print(f"{label:<24}{size:>8}{size / baseline:>8.1%}{elapsed_us:>9.0f}  {truncated}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""
+端到端推荐基准测试
+在本地Steam替身服务器与LLM替身服务器上运行完整的 需求分析 → 搜索 → 获取详情 → 预排序 → LLM评分 流程，
+对一组查询报告每个阶段的耗时、LLM调用次数与token用量、Steam上游请求数，结果写入JSON文件
+
+阶段耗时为该阶段所有调用时间区间的并集（搜索分页与详情获取是流水线并行的，两者的耗时会有重叠）。
+第1轮为冷启动（持久化缓存使用临时目录），之后各轮复用进程内缓存，可用于观察缓存命中后的耗时。
+
+用法:
+    python benchmarks/bench_recommendation.py [--rounds 2] [--scoring-mode per_game|batched]
+    python benchmarks/bench_recommendation.py --ttft-ms 400 --per-token-ms 20 --llm-error-rate 0.05
+    python benchmarks/bench_recommendation.py --queries "推荐一些冒险游戏，70元以内" "100元以内的策略游戏"
+"""
+import argparse
+import contextlib
+import functools
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_crawler import git_commit  # noqa: E402
+from config_loader import config  # noqa: E402
+from mock_llm_server import MockLLMServer  # noqa: E402
+from steam_stub_server import SteamStubServer  # noqa: E402
+
+RESULTS_DIR = os.path.join(BASE_DIR, 'benchmarks', 'results')
+DEFAULT_QUERIES = (
+    '推荐一些冒险游戏，70元以内',
+    '想玩开放世界角色扮演游戏，预算200元',
+    '适合和朋友联机的多人射击游戏',
+    '100元以内的策略游戏',
+    '剧情丰富的恐怖解谜游戏',
+)
+STAGES = ('analyze', 'search', 'enrich', 'prerank', 'score')
+
+
+class StageRecorder:
+    """记录各阶段每次调用的时间区间（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._intervals: Dict[str, List[Tuple[float, float]]] = defaultdict(list)
+
+    def wrap(self, obj, method_name: str, stage: str):
+        """用计时包装替换实例上的方法（内部通过self.xxx调用时同样生效）"""
+        original = getattr(obj, method_name)
+
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._intervals[stage].append((start, time.perf_counter()))
+
+        setattr(obj, method_name, timed)
+
+    def reset(self):
+        with self._lock:
+            self._intervals.clear()
+
+    def summary(self) -> Dict[str, Dict]:
+        """各阶段的墙钟耗时（区间并集）、累计耗时与调用次数"""
+        with self._lock:
+            intervals = {stage: sorted(self._intervals.get(stage, [])) for stage in STAGES}
+        result = {}
+        for stage, spans in intervals.items():
+            wall = 0.0
+            current_start = current_end = None
+            for start, end in spans:
+                if current_end is None or start > current_end:
+                    if current_end is not None:
+                        wall += current_end - current_start
+                    current_start, current_end = start, end
+                else:
+                    current_end = max(current_end, end)
+            if current_end is not None:
+                wall += current_end - current_start
+            result[stage] = {
+                'wall_ms': round(wall * 1000, 1),
+                'busy_ms': round(sum(end - start for start, end in spans) * 1000, 1),
+                'calls': len(spans),
+            }
+        return result
+
+
+def instrument(agent, recorder: StageRecorder):
+    recorder.wrap(agent.analyzer, 'analyze_user_query', 'analyze')
+    recorder.wrap(agent.crawler, '_fetch_search_rows', 'search')
+    recorder.wrap(agent.crawler, '_enrich_game_info', 'enrich')
+    recorder.wrap(agent, '_prerank_games', 'prerank')
+    recorder.wrap(agent, '_generate_recommendation', 'score')
+    recorder.wrap(agent, '_generate_recommendations_batch', 'score')
+
+
+def configure(args, steam_url: str, llm_url: str, data_dir: str):
+    """指向两个替身服务器；持久化缓存写入临时目录；关闭Steam限流（替身服务器不需要）"""
+    os.environ['DASHSCOPE_BASE_URL'] = llm_url
+    os.environ.setdefault('DASHSCOPE_API_KEY', 'sk-mock')
+    config.set('steam.base_url', steam_url)
+    config.set('steam.search_mode', 'live')
+    config.set('steam.rate_limit.enabled', False)
+    config.set('cache.catalog_store.path', os.path.join(data_dir, 'catalog.sqlite3'))
+    config.set('recommendation.scoring_mode', args.scoring_mode)
+    config.set('logging.console_output', False)
+
+
+def run_query(agent, query: str, recorder: StageRecorder, stub: SteamStubServer, mock: MockLLMServer,
+              llm_usage) -> Dict:
+    recorder.reset()
+    stub.reset_counts()
+    mock.reset_stats()
+    llm_usage.reset()
+
+    start = time.perf_counter()
+    error = None
+    result = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            result = agent.recommend_games(query)
+        except Exception as e:
+            error = repr(e)
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        'query': query,
+        'wall_ms': round(wall_ms, 1),
+        'error': error,
+        'total_found': result.get('total_found', 0),
+        'total_evaluated': result.get('total_evaluated', 0),
+        'recommendations': len(result.get('recommendations', [])),
+        'stages': recorder.summary(),
+        'llm': llm_usage.snapshot(),
+        'llm_server': mock.snapshot_stats(),
+        'steam_upstream': stub.snapshot_counts(),
+    }
+
+
+def print_header():
+    print(f"{'轮':>2} {'查询':<20}{'总ms':>8}" + ''.join(f"{stage + 'ms':>11}" for stage in STAGES)
+          + f"{'LLM调用':>9}{'tokens':>8}{'Steam请求':>10}")
+
+
+def print_result(round_index: int, item: Dict):
+    query = item['query'] if len(item['query']) <= 12 else item['query'][:11] + '…'
+    upstream = sum(count for key, count in item['steam_upstream'].items() if not key.startswith('injected'))
+    print(f"{round_index:>2} {query:<20}{item['wall_ms']:>8.0f}"
+          + ''.join(f"{item['stages'][stage]['wall_ms']:>11.0f}" for stage in STAGES)
+          + f"{item['llm']['calls']:>9}{item['llm']['total_tokens']:>8}{upstream:>10}"
+          + (f"  ❌ {item['error']}" if item['error'] else ''))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='端到端推荐基准测试（Steam与LLM替身服务器）')
+    arg_parser.add_argument('--queries', nargs='+', default=list(DEFAULT_QUERIES), help='测试查询')
+    arg_parser.add_argument('--rounds', type=int, default=2, help='轮数（第1轮冷启动）')
+    arg_parser.add_argument('--scoring-mode', choices=('per_game', 'batched'),
+                            default=config.get('recommendation.scoring_mode', 'per_game'))
+    arg_parser.add_argument('--steam-latency-ms', type=float, default=50.0, help='Steam替身基础延迟')
+    arg_parser.add_argument('--steam-jitter-ms', type=float, default=30.0, help='Steam替身延迟抖动上限')
+    arg_parser.add_argument('--steam-error-rate', type=float, default=0.0, help='Steam替身返回503的概率')
+    arg_parser.add_argument('--ttft-ms', type=float, default=200.0, help='LLM首token延迟')
+    arg_parser.add_argument('--per-token-ms', type=float, default=10.0, help='LLM每个输出token的耗时')
+    arg_parser.add_argument('--llm-jitter-ms', type=float, default=50.0, help='LLM延迟抖动上限')
+    arg_parser.add_argument('--llm-error-rate', type=float, default=0.0, help='LLM返回500的概率')
+    arg_parser.add_argument('--llm-malformed-rate', type=float, default=0.0, help='LLM回复非JSON内容的概率')
+    arg_parser.add_argument('--output', help='结果文件（默认 benchmarks/results/recommendation-<时间>.json）')
+    args = arg_parser.parse_args()
+
+    stub = SteamStubServer(latency_ms=args.steam_latency_ms, jitter_ms=args.steam_jitter_ms,
+                           error_rate=args.steam_error_rate).start()
+    mock = MockLLMServer(ttft_ms=args.ttft_ms, per_token_ms=args.per_token_ms, jitter_ms=args.llm_jitter_ms,
+                         error_rate=args.llm_error_rate, malformed_rate=args.llm_malformed_rate).start()
+    rounds = []
+    try:
+        with tempfile.TemporaryDirectory(prefix='bench-recommend-') as data_dir:
+            configure(args, stub.url, mock.url, data_dir)
+            # 推荐模块在导入时创建LLM客户端与各全局缓存，因此在configure之后才导入
+            from llm_util import llm_usage
+            from recommendation_agent import SteamRecommendationAgent
+
+            agent = SteamRecommendationAgent()
+            recorder = StageRecorder()
+            instrument(agent, recorder)
+
+            print(f"🎮 Steam替身: {stub.url}  🤖 LLM替身: {mock.url}  评分模式: {args.scoring_mode}")
+            print_header()
+            for round_index in range(1, args.rounds + 1):
+                items = []
+                for query in args.queries:
+                    item = run_query(agent, query, recorder, stub, mock, llm_usage)
+                    items.append(item)
+                    print_result(round_index, item)
+                rounds.append({'round': round_index, 'queries': items})
+    finally:
+        stub.stop()
+        mock.stop()
+
+    report = {
+        'benchmark': 'recommendation',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'settings': {
+            'scoring_mode': args.scoring_mode,
+            'max_search_results': config.get('steam.max_search_results'),
+            'max_output_results': config.get('steam.max_output_results'),
+            'steam_stub': {'latency_ms': args.steam_latency_ms, 'jitter_ms': args.steam_jitter_ms,
+                           'error_rate': args.steam_error_rate},
+            'llm_mock': {'ttft_ms': args.ttft_ms, 'per_token_ms': args.per_token_ms,
+                         'jitter_ms': args.llm_jitter_ms, 'error_rate': args.llm_error_rate,
+                         'malformed_rate': args.llm_malformed_rate},
+        },
+        'rounds': rounds,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"recommendation-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存: {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
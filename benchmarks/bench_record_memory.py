@@ -0,0 +1,108 @@
+"""
+游戏记录内存占用基准测试
+用与线上相同的流程（搜索结果行 + appdetails丰富）构建N条游戏记录，
+对比原先的字典记录与 __slots__ 的GameRecord每条记录的内存占用（tracemalloc统计）
+
+用法: python benchmarks/bench_record_memory.py [--sizes 1000 100000]
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, 'src'))
+
+from models import GameRecord  # noqa: E402
+from steam_crawler import SteamCrawlerBase  # noqa: E402
+
+GENRES = ['动作', '冒险', '角色扮演', '策略', '模拟', '休闲', '独立', '体育', '竞速', '大型多人在线']
+CATEGORIES = ['单人', '多人', '在线合作', 'Steam 成就', 'Steam 云', '完全支持控制器', 'Steam 集换式卡牌']
+LANGUAGES = ['简体中文', '英语', '日语', '韩语', '法语', '德语', '西班牙语 - 西班牙', '俄语', '繁体中文', '葡萄牙语 - 巴西']
+DEVELOPERS = [f'Studio {i}' for i in range(200)]
+
+
+def make_payload(app_id: int, rng: random.Random) -> str:
+    """生成一条appdetails响应（JSON文本，每条记录解析后得到独立的字符串对象）"""
+    languages = rng.sample(LANGUAGES, rng.randint(3, len(LANGUAGES)))
+    data = {
+        'name': f'Game {app_id}',
+        'short_description': ''.join(rng.choice('在一个广阔的开放世界中探索冒险战斗建造生存') for _ in range(rng.randint(80, 160))),
+        'genres': [{'description': g} for g in rng.sample(GENRES, rng.randint(1, 4))],
+        'categories': [{'description': c} for c in rng.sample(CATEGORIES, rng.randint(1, 5))],
+        'developers': [rng.choice(DEVELOPERS)],
+        'publishers': [rng.choice(DEVELOPERS)],
+        'metacritic': {'score': rng.randint(50, 95)} if rng.random() < 0.3 else None,
+        'supported_languages': ', '.join(f'{lang}<strong>*</strong>' for lang in languages)
+        + '<br><strong>*</strong>具有完全音频支持的语言',
+    }
+    return json.dumps({'row': {
+        'app_id': str(app_id), 'name': f'Game {app_id}', 'price': float(rng.randint(0, 300)),
+        'discount': rng.choice([0, 0, 10, 25, 50, 75]), 'url': f'https://store.steampowered.com/app/{app_id}/',
+        'release_date': f'20{rng.randint(10, 24)} 年 {rng.randint(1, 12)} 月 {rng.randint(1, 28)} 日',
+    }, 'data': data}, ensure_ascii=False)
+
+
+def build_records(payloads, crawler: SteamCrawlerBase, as_record: bool) -> list:
+    """按线上流程构建记录：搜索结果行 -> appdetails丰富"""
+    records = []
+    for payload in payloads:
+        parsed = json.loads(payload)
+        row = dict(parsed['row'], tags=[], description='', reviews='')
+        game = GameRecord(row) if as_record else row
+        crawler._set_enrichment_result(game, {k: v for k, v in parsed['data'].items() if v is not None})
+        records.append(game)
+    return records
+
+
+def measure(payloads, crawler: SteamCrawlerBase, as_record: bool) -> dict:
+    """测量记录列表常驻的内存（构建过程中的临时对象不计入）"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    records = build_records(payloads, crawler, as_record)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # 读取路径的开销：访问各阶段会用到的字段
+    start = time.perf_counter()
+    for game in records:
+        game['name'], game['price'], game['tags'], game.get('description'), game.get('supported_languages')
+    read_elapsed = time.perf_counter() - start
+    del records
+    return {
+        'bytes_per_record': current / len(payloads),
+        'build_ms': elapsed * 1000,
+        'read_ms': read_elapsed * 1000,
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='游戏记录内存占用基准测试')
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000], help='记录数量')
+    args = arg_parser.parse_args()
+
+    crawler = SteamCrawlerBase()
+    print(f"{'记录数':>8}{'模型':>12}{'字节/条':>10}{'构建ms':>10}{'读取ms':>10}")
+    for size in args.sizes:
+        rng = random.Random(size)
+        payloads = [make_payload(1000 + i, rng) for i in range(size)]
+        results = {}
+        for label, as_record in (('dict', False), ('GameRecord', True)):
+            results[label] = measure(payloads, crawler, as_record)
+            result = results[label]
+            print(f"{size:>8}{label:>12}{result['bytes_per_record']:>10.0f}"
+                  f"{result['build_ms']:>10.1f}{result['read_ms']:>10.1f}")
+        saved = 1 - results['GameRecord']['bytes_per_record'] / results['dict']['bytes_per_record']
+        print(f"{'':>8}{'节省':>12}{saved:>10.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+MCP响应序列化基准测试
+以recommendations.json为样本，把推荐列表扩展到不同长度（推荐项为Recommendation记录，与线上一致），
+对比原先的 json.dumps(indent=2) 与各编码器配置的输出字节数和编码耗时
+
+用法: python benchmarks/bench_response_encoding.py [--sizes 10 50 200] [--repeat 200]
+"""
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, 'src'))
+
+from models import Recommendation, json_default  # noqa: E402
+from response_encoder import ResponseEncoder, orjson  # noqa: E402
+
+SAMPLE_FILE = os.path.join(BASE_DIR, 'recommendations.json')
+
+
+def build_payload(sample: dict, size: int) -> dict:
+    """按recommend_games工具的响应结构构造含size条推荐的负载"""
+    base = sample['recommendations']
+    recommendations = []
+    for i in range(size):
+        item = copy.deepcopy(base[i % len(base)])
+        item['app_id'] = str(int(item.get('app_id') or 0) + i)
+        recommendations.append(Recommendation(item))
+    result = dict(sample, recommendations=recommendations, total_evaluated=size)
+    return {'success': True, 'query': sample['query'], 'result': result}
+
+
+def time_encode(encode, payload, repeat: int) -> float:
+    """平均每次编码耗时（微秒）"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        encode(payload)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='MCP响应序列化基准测试')
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=[10, 50, 200], help='推荐条数')
+    arg_parser.add_argument('--repeat', type=int, default=200, help='每种配置的编码次数')
+    args = arg_parser.parse_args()
+
+    with open(SAMPLE_FILE, 'r', encoding='utf-8') as f:
+        sample = json.load(f)
+
+    encoders = [
+        ('json pretty(原先)', lambda p: json.dumps(p, ensure_ascii=False, indent=2, default=json_default).encode('utf-8')),
+        ('json compact', ResponseEncoder(mode='compact', backend='json').encode_bytes),
+    ]
+    if orjson is not None:
+        encoders += [
+            ('orjson pretty', ResponseEncoder(mode='pretty', backend='orjson').encode_bytes),
+            ('orjson compact', ResponseEncoder(mode='compact', backend='orjson').encode_bytes),
+        ]
+    else:
+        print("未安装orjson，仅测试标准库json")
+
+    print(f"{'推荐数':>6}  {'编码器':<18}{'字节':>9}{'占原先':>8}{'耗时us':>10}{'加速':>7}")
+    for size in args.sizes:
+        payload = build_payload(sample, size)
+        baseline_bytes = baseline_us = None
+        for label, encode in encoders:
+            size_bytes = len(encode(payload))
+            elapsed_us = time_encode(encode, payload, args.repeat)
+            if baseline_bytes is None:
+                baseline_bytes, baseline_us = size_bytes, elapsed_us
+            print(f"{size:>6}  {label:<18}{size_bytes:>9}{size_bytes / baseline_bytes:>8.1%}"
+                  f"{elapsed_us:>10.0f}{baseline_us / elapsed_us:>6.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+搜索结果页解析基准测试
+在保存的搜索页样本（benchmarks/fixtures/*.html）上对比 fast / strainer / bs4 三种解析引擎的吞吐量
+
+用法: python benchmarks/bench_search_parser.py [--iterations 20]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, 'src'))
+
+from search_parser import ENGINES  # noqa: E402
+from steam_crawler import SteamCrawlerBase  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def load_fixtures():
+    """读取所有搜索页样本"""
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, 'search_*.html'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            pages[os.path.basename(path)] = f.read()
+    return pages
+
+
+def bench_engine(parser: SteamCrawlerBase, pages: dict, iterations: int) -> dict:
+    """用指定引擎解析所有样本iterations轮，返回耗时与吞吐量"""
+    rows = 0
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for html in pages.values():
+            rows += len(parser._parse_search_page(html))
+    elapsed = time.perf_counter() - start
+    page_count = iterations * len(pages)
+    return {
+        'rows': rows,
+        'seconds': elapsed,
+        'rows_per_second': rows / elapsed if elapsed else 0.0,
+        'ms_per_page': elapsed * 1000 / page_count,
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='搜索结果页解析引擎基准测试')
+    arg_parser.add_argument('--iterations', type=int, default=20, help='每个引擎解析全部样本的轮数')
+    args = arg_parser.parse_args()
+
+    pages = load_fixtures()
+    if not pages:
+        print(f"❌ 未找到样本文件: {FIXTURES_DIR}")
+        return 1
+
+    parsers = {}
+    for engine in ENGINES:
+        parser = SteamCrawlerBase()
+        parser.search_parser = engine
+        parsers[engine] = parser
+
+    # 先校验各引擎结果一致，再计时
+    print(f"📄 样本: {', '.join(pages)}")
+    for name, html in pages.items():
+        expected = parsers['bs4']._parse_search_page(html)
+        for engine in ENGINES:
+            if parsers[engine]._parse_search_page(html) != expected:
+                print(f"❌ {engine} 引擎解析 {name} 的结果与bs4不一致")
+                return 1
+    print(f"✓ 三种引擎解析结果一致\n")
+
+    results = {engine: bench_engine(parsers[engine], pages, args.iterations) for engine in ENGINES}
+    baseline = results['bs4']['rows_per_second']
+
+    print(f"{'引擎':<10}{'行/秒':>12}{'毫秒/页':>10}{'加速比':>8}")
+    for engine, result in results.items():
+        speedup = result['rows_per_second'] / baseline if baseline else 0.0
+        print(f"{engine:<10}{result['rows_per_second']:>12.0f}{result['ms_per_page']:>10.2f}{speedup:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
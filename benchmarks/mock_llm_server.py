@@ -0,0 +1,305 @@
+"""
+OpenAI兼容的本地LLM替身服务器
+实现 /v1/chat/completions（非流式），按请求内容返回预设格式的JSON答案：
+- 需求分析请求：根据查询中的类型词和价格生成分析结果
+- 逐个评分 / 批量评分请求：按游戏名或app_id生成确定性的评分、理由和亮点
+可配置首token延迟、每token延迟、抖动，以及500/429/格式错误回复的注入概率。只依赖标准库：
+
+    python benchmarks/mock_llm_server.py --port 8766 --ttft-ms 200 --per-token-ms 10
+
+然后设置环境变量 DASHSCOPE_BASE_URL=http://127.0.0.1:8766/v1（DASHSCOPE_API_KEY任意）。
+
+接口:
+    POST */chat/completions   聊天补全
+    GET  /__mock__/stats      请求数与token统计（JSON）
+    GET  /__mock__/reset      清零统计
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+# 查询中的类型词 -> (中文标签, 英文流派)
+GENRE_WORDS = {
+    '角色扮演': ('角色扮演', 'RPG'),
+    'rpg': ('角色扮演', 'RPG'),
+    '开放世界': ('开放世界', 'Open World'),
+    '射击': ('射击', 'Shooter'),
+    '策略': ('策略', 'Strategy'),
+    '动作': ('动作', 'Action'),
+    '冒险': ('冒险', 'Adventure'),
+    '模拟': ('模拟', 'Simulation'),
+    '恐怖': ('恐怖', 'Horror'),
+    '解谜': ('解谜', 'Puzzle'),
+    '竞速': ('竞速', 'Racing'),
+    '体育': ('体育', 'Sports'),
+    '独立': ('独立', 'Indie'),
+    '生存': ('生存', 'Survival'),
+}
+HIGHLIGHTS = ('画面精美', '剧情丰富', '玩法多样', '性价比高', '自由度高', '支持多人合作', '关卡设计出色', '配乐优秀')
+
+_PRICE_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*(?:元|块)')
+_APP_ID_PATTERN = re.compile(r'app_id：\s*(\d+)')
+_NAME_PATTERN = re.compile(r'名称：(.+)')
+_TOKEN_PATTERN = re.compile(r'[㐀-鿿]|[A-Za-z0-9_]+|[^\sA-Za-z0-9_]')
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算token数：每个汉字、每个英文单词/数字、每个标点各算一个"""
+    return len(_TOKEN_PATTERN.findall(text or ''))
+
+
+def _stable_score(key: str) -> int:
+    """按名称生成确定性的评分（55-95）"""
+    return 55 + int(hashlib.md5(key.encode('utf-8')).hexdigest(), 16) % 41
+
+
+def _score_item(key: str) -> Dict:
+    score = _stable_score(key)
+    start = score % len(HIGHLIGHTS)
+    return {
+        'score': score,
+        'reason': f'与您的需求匹配度{"很高" if score >= 80 else "较好"}，值得一试。',
+        'highlights': [HIGHLIGHTS[(start + i) % len(HIGHLIGHTS)] for i in range(3)],
+    }
+
+
+def answer_analysis(user_prompt: str) -> Dict:
+    """需求分析的预设答案"""
+    query = user_prompt.lower()
+    tags, genres = [], []
+    for word, (tag, genre) in GENRE_WORDS.items():
+        if word in query and genre not in genres:
+            tags.append(tag)
+            genres.append(genre)
+    if not genres:
+        tags, genres = ['动作'], ['Action']
+    price = _PRICE_PATTERN.search(user_prompt)
+    return {
+        'keywords': [genre.lower() for genre in genres],
+        'max_price': float(price.group(1)) if price else 1000.0,
+        'min_price': 0.0,
+        'tags': tags,
+        'genres': genres,
+        'preferences': {
+            'multiplayer': '多人' in user_prompt or '联机' in user_prompt,
+            'singleplayer': '单机' in user_prompt or '单人' in user_prompt,
+            'story_rich': '剧情' in user_prompt,
+            'open_world': '开放世界' in user_prompt,
+            'other': '',
+        },
+    }
+
+
+def answer(messages: List[Dict]) -> str:
+    """按请求类型生成回复内容（JSON文本）"""
+    system_prompt = messages[0].get('content', '') if messages else ''
+    user_prompt = messages[-1].get('content', '') if messages else ''
+    if '需求' in system_prompt and '分析' in system_prompt and '评估' not in system_prompt:
+        return json.dumps(answer_analysis(user_prompt), ensure_ascii=False)
+    if 'JSON数组' in system_prompt:
+        items = [dict(_score_item(app_id), app_id=app_id) for app_id in _APP_ID_PATTERN.findall(user_prompt)]
+        return json.dumps(items, ensure_ascii=False)
+    name = _NAME_PATTERN.search(user_prompt)
+    return json.dumps(_score_item(name.group(1).strip() if name else user_prompt), ensure_ascii=False)
+
+
+class MockLLMServer:
+    """LLM替身服务器
+
+    Args:
+        port: 监听端口（0表示随机分配）
+        ttft_ms: 首token延迟（毫秒）
+        per_token_ms: 每个输出token的生成耗时（毫秒）
+        jitter_ms: 随机抖动上限（毫秒）
+        error_rate: 返回500的概率
+        throttle_rate: 返回429的概率
+        malformed_rate: 回复内容不是合法JSON的概率（测试调用方的降级逻辑）
+        seed: 随机数种子
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, ttft_ms: float = 0.0, per_token_ms: float = 0.0,
+                 jitter_ms: float = 0.0, error_rate: float = 0.0, throttle_rate: float = 0.0,
+                 malformed_rate: float = 0.0, seed: Optional[int] = 0):
+        self.ttft_ms = ttft_ms
+        self.per_token_ms = per_token_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.malformed_rate = malformed_rate
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {}
+
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """OpenAI客户端使用的base_url"""
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/v1'
+
+    def start(self) -> 'MockLLMServer':
+        """在后台线程中启动"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name='mock-llm', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'MockLLMServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    # ---------- 统计 ----------
+
+    def _add(self, **counts: int):
+        with self._lock:
+            for key, value in counts.items():
+                self.stats[key] = self.stats.get(key, 0) + value
+
+    def snapshot_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.stats)
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats.clear()
+
+    # ---------- 响应 ----------
+
+    def _inject(self) -> Tuple[float, Optional[str]]:
+        """本次请求的抖动（秒）与注入的故障（None / 'error' / 'throttle' / 'malformed'）"""
+        with self._lock:
+            jitter = self._random.uniform(0, self.jitter_ms) / 1000
+            roll = self._random.random()
+        for fault, rate in (('error', self.error_rate), ('throttle', self.throttle_rate),
+                            ('malformed', self.malformed_rate)):
+            if roll < rate:
+                return jitter, fault
+            roll -= rate
+        return jitter, None
+
+    def complete(self, request: Dict) -> Tuple[int, Dict]:
+        """处理一次聊天补全请求，返回 (HTTP状态码, 响应体)"""
+        messages = request.get('messages') or []
+        prompt_tokens = sum(estimate_tokens(message.get('content', '')) for message in messages)
+        jitter, fault = self._inject()
+        self._add(requests=1)
+
+        if fault == 'error':
+            self._add(injected_errors=1)
+            time.sleep(self.ttft_ms / 1000 + jitter)
+            return 500, {'error': {'message': 'mock server error', 'type': 'server_error', 'code': 'internal_error'}}
+        if fault == 'throttle':
+            self._add(injected_throttles=1)
+            return 429, {'error': {'message': 'rate limited', 'type': 'rate_limit_error', 'code': 'rate_limit'}}
+
+        content = answer(messages)
+        if fault == 'malformed':
+            self._add(injected_malformed=1)
+            content = '抱歉，我无法给出JSON格式的回答。' + content[:20]
+        completion_tokens = estimate_tokens(content)
+        time.sleep((self.ttft_ms + self.per_token_ms * completion_tokens) / 1000 + jitter)
+        self._add(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+        return 200, {
+            'id': f'chatcmpl-{uuid.uuid4().hex[:24]}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'mock'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop',
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens,
+            },
+        }
+
+    def _make_handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                if self.path == '/__mock__/stats':
+                    return self._send(200, mock.snapshot_stats())
+                if self.path == '/__mock__/reset':
+                    mock.reset_stats()
+                    return self._send(200, {})
+                self._send(404, {'error': {'message': 'not found'}})
+
+            def do_POST(self):
+                if not self.path.rstrip('/').endswith('/chat/completions'):
+                    return self._send(404, {'error': {'message': 'not found'}})
+                length = int(self.headers.get('Content-Length') or 0)
+                try:
+                    request = json.loads(self.rfile.read(length) or b'{}')
+                except ValueError:
+                    return self._send(400, {'error': {'message': 'invalid JSON body'}})
+                if request.get('stream'):
+                    return self._send(400, {'error': {'message': 'streaming is not supported by the mock'}})
+                status, body = mock.complete(request)
+                self._send(status, body)
+
+            def _send(self, status: int, body: Dict):
+                data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='OpenAI兼容的本地LLM替身服务器')
+    arg_parser.add_argument('--host', default='127.0.0.1')
+    arg_parser.add_argument('--port', type=int, default=8766)
+    arg_parser.add_argument('--ttft-ms', type=float, default=200.0, help='首token延迟（毫秒）')
+    arg_parser.add_argument('--per-token-ms', type=float, default=10.0, help='每个输出token的耗时（毫秒）')
+    arg_parser.add_argument('--jitter-ms', type=float, default=50.0, help='随机抖动上限（毫秒）')
+    arg_parser.add_argument('--error-rate', type=float, default=0.0, help='返回500的概率')
+    arg_parser.add_argument('--throttle-rate', type=float, default=0.0, help='返回429的概率')
+    arg_parser.add_argument('--malformed-rate', type=float, default=0.0, help='回复非JSON内容的概率')
+    arg_parser.add_argument('--seed', type=int, default=0, help='随机数种子')
+    args = arg_parser.parse_args()
+
+    server = MockLLMServer(args.host, args.port, args.ttft_ms, args.per_token_ms, args.jitter_ms,
+                           args.error_rate, args.throttle_rate, args.malformed_rate, args.seed)
+    print(f"🤖 LLM替身服务器已启动: {server.url} (首token={args.ttft_ms}ms, 每token={args.per_token_ms}ms)")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+        print(f"统计: {server.snapshot_stats()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
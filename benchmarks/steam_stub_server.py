@@ -0,0 +1,283 @@
+"""
+Steam商店本地替身服务器
+回放 benchmarks/fixtures 中按Steam格式构造的搜索页HTML与appdetails响应（非线上录制），可配置延迟、抖动和错误率，
+用于压测爬虫而不触发Steam的限流。只依赖标准库，可在进程内启动，也可单独运行：
+
+    python benchmarks/steam_stub_server.py --port 8765 --latency-ms 80 --jitter-ms 40 --error-rate 0.02
+
+然后在config.json中把 steam.base_url 设为 http://127.0.0.1:8765（或设置环境变量STEAM_BASE_URL）。
+
+接口:
+    /search/                 搜索页HTML
+    /search/results/         JSON分页接口（start/count，results_html为结果行）
+    /api/appdetails          游戏详情（filters=price_overview时只返回价格）
+    /__stub__/stats          各接口请求计数（JSON）
+    /__stub__/reset          清零计数
+"""
+import argparse
+import copy
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# 各类列表请求回放的搜索页样本
+LISTING_FIXTURES = {
+    'specials': 'search_specials.html',
+    'free': 'search_free.html',
+    'default': 'search_rpg.html',
+}
+APPDETAILS_FIXTURE = 'appdetails_1145360.json'
+
+# 样本只有一页结果，后续页面循环使用这些行并给app_id加上偏移，保证跨页不重复
+APP_ID_CYCLE_OFFSET = 10_000_000
+
+_ROW_PATTERN = re.compile(r'<a [^>]*class="search_result_row[\s\S]*?</a>')
+_APP_ID_PATTERN = re.compile(r'data-ds-appid="(\d+)"')
+_TITLE_PATTERN = re.compile(r'<span class="title">([\s\S]*?)</span>')
+_URL_APP_ID_PATTERN = re.compile(r'(/app/)(\d+)(/)')
+
+
+class StubListing:
+    """一个搜索页样本：完整HTML与拆分出的结果行"""
+
+    def __init__(self, html: str):
+        self.html = html
+        self.rows = _ROW_PATTERN.findall(html)
+
+    def page(self, start: int, count: int, total: int) -> str:
+        """返回[start, start+count)的结果行（超出样本行数时循环并偏移app_id）"""
+        rows = []
+        for position in range(start, min(start + count, total)):
+            cycle, index = divmod(position, len(self.rows))
+            row = self.rows[index]
+            if cycle:
+                offset = cycle * APP_ID_CYCLE_OFFSET
+                row = _APP_ID_PATTERN.sub(lambda m: f'data-ds-appid="{int(m.group(1)) + offset}"', row, count=1)
+                row = _URL_APP_ID_PATTERN.sub(lambda m: f'{m.group(1)}{int(m.group(2)) + offset}{m.group(3)}',
+                                              row, count=1)
+            rows.append(row)
+        return '\n'.join(rows)
+
+
+class SteamStubServer:
+    """Steam商店替身服务器
+
+    Args:
+        port: 监听端口（0表示随机分配）
+        latency_ms: 每个请求的基础延迟（毫秒）
+        jitter_ms: 在基础延迟上叠加的随机延迟上限（毫秒）
+        error_rate: 返回503的概率
+        throttle_rate: 返回429（带Retry-After）的概率
+        total_results: JSON分页接口报告的结果总数
+        seed: 随机数种子（保证延迟与错误注入可复现）
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0, total_results: int = 500,
+                 seed: Optional[int] = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.total_results = total_results
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = {}
+        self.listings = {name: StubListing(self._read_fixture(filename))
+                         for name, filename in LISTING_FIXTURES.items()}
+        self.app_template = next(iter(json.loads(self._read_fixture(APPDETAILS_FIXTURE)).values()))['data']
+        self.app_names = self._collect_app_names()
+
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _read_fixture(filename: str) -> str:
+        with open(os.path.join(FIXTURES_DIR, filename), 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def _collect_app_names(self) -> Dict[int, str]:
+        """样本中出现的app_id与游戏名（appdetails按此返回对应名称）"""
+        names = {}
+        for listing in self.listings.values():
+            for row in listing.rows:
+                app_id, title = _APP_ID_PATTERN.search(row), _TITLE_PATTERN.search(row)
+                if app_id and title:
+                    names[int(app_id.group(1))] = title.group(1).strip()
+        return names
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'SteamStubServer':
+        """在后台线程中启动"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name='steam-stub', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'SteamStubServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    # ---------- 统计 ----------
+
+    def _count(self, key: str):
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def snapshot_counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counts)
+
+    def reset_counts(self):
+        with self._lock:
+            self.counts.clear()
+
+    # ---------- 响应 ----------
+
+    def _inject(self) -> Tuple[float, Optional[str]]:
+        """本次请求的延迟（秒）与注入的故障（None / 'error' / 'throttle'）"""
+        with self._lock:
+            delay = (self.latency_ms + self._random.uniform(0, self.jitter_ms)) / 1000
+            roll = self._random.random()
+        if roll < self.error_rate:
+            return delay, 'error'
+        if roll < self.error_rate + self.throttle_rate:
+            return delay, 'throttle'
+        return delay, None
+
+    def _listing_for(self, query: Dict[str, List[str]]) -> StubListing:
+        if query.get('specials'):
+            return self.listings['specials']
+        if query.get('maxprice', [''])[0] == 'free':
+            return self.listings['free']
+        return self.listings['default']
+
+    def _search_results(self, query: Dict[str, List[str]]) -> Dict:
+        start = int(query.get('start', ['0'])[0])
+        count = int(query.get('count', ['50'])[0])
+        return {
+            'success': 1,
+            'results_html': self._listing_for(query).page(start, count, self.total_results),
+            'total_count': self.total_results,
+            'start': start,
+        }
+
+    def _app_details(self, query: Dict[str, List[str]]) -> Dict:
+        app_id = query.get('appids', [''])[0]
+        if not app_id.isdigit():
+            return {app_id: {'success': False}}
+        base_id = int(app_id) % APP_ID_CYCLE_OFFSET
+        if base_id not in self.app_names:
+            return {app_id: {'success': False}}
+        if query.get('filters', [''])[0] == 'price_overview':
+            return {app_id: {'success': True, 'data': {'price_overview': self.app_template['price_overview']}}}
+        data = copy.copy(self.app_template)
+        data['steam_appid'] = int(app_id)
+        data['name'] = self.app_names[base_id]
+        return {app_id: {'success': True, 'data': data}}
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                query = parse_qs(parsed.query)
+                path = parsed.path
+
+                if path == '/__stub__/stats':
+                    return self._send(200, json.dumps(stub.snapshot_counts()).encode(), 'application/json')
+                if path == '/__stub__/reset':
+                    stub.reset_counts()
+                    return self._send(200, b'{}', 'application/json')
+
+                endpoint = {'/search/': 'search', '/search/results/': 'search_results',
+                            '/api/appdetails': 'appdetails'}.get(path)
+                if endpoint is None:
+                    return self._send(404, b'not found', 'text/plain')
+                stub._count(endpoint)
+
+                delay, fault = stub._inject()
+                if delay:
+                    time.sleep(delay)
+                if fault == 'error':
+                    stub._count('injected_errors')
+                    return self._send(503, b'<html>Service Unavailable</html>', 'text/html')
+                if fault == 'throttle':
+                    stub._count('injected_throttles')
+                    return self._send(429, b'', 'text/plain', {'Retry-After': '1'})
+
+                if endpoint == 'search':
+                    body = stub._listing_for(query).html.encode('utf-8')
+                    return self._send(200, body, 'text/html; charset=utf-8')
+                if endpoint == 'search_results':
+                    payload = stub._search_results(query)
+                else:
+                    payload = stub._app_details(query)
+                self._send(200, json.dumps(payload, ensure_ascii=False).encode('utf-8'), 'application/json')
+
+            def _send(self, status: int, body: bytes, content_type: str, headers: Optional[Dict] = None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Steam商店本地替身服务器')
+    arg_parser.add_argument('--host', default='127.0.0.1')
+    arg_parser.add_argument('--port', type=int, default=8765)
+    arg_parser.add_argument('--latency-ms', type=float, default=0.0, help='基础延迟（毫秒）')
+    arg_parser.add_argument('--jitter-ms', type=float, default=0.0, help='随机抖动上限（毫秒）')
+    arg_parser.add_argument('--error-rate', type=float, default=0.0, help='返回503的概率')
+    arg_parser.add_argument('--throttle-rate', type=float, default=0.0, help='返回429的概率')
+    arg_parser.add_argument('--total-results', type=int, default=500, help='分页接口报告的结果总数')
+    arg_parser.add_argument('--seed', type=int, default=0, help='随机数种子')
+    args = arg_parser.parse_args()
+
+    server = SteamStubServer(args.host, args.port, args.latency_ms, args.jitter_ms, args.error_rate,
+                             args.throttle_rate, args.total_results, args.seed)
+    print(f"🎮 Steam替身服务器已启动: {server.url} (延迟={args.latency_ms}ms±{args.jitter_ms}ms, "
+          f"错误率={args.error_rate:.0%}, 限流率={args.throttle_rate:.0%})")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+        print(f"请求计数: {server.snapshot_counts()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
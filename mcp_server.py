@@ -3,32 +3,159 @@ Steam游戏推荐MCP服务器
 提供智能游戏推荐服务的MCP接口
 """
 import asyncio
-import json
 import sys
 import os
+import threading
+from contextlib import asynccontextmanager
 from typing import Optional
 
 # 添加src目录到路径
 src_path = os.path.join(os.path.dirname(__file__), 'src')
 sys.path.insert(0, src_path)
 
-from fastmcp import FastMCP
+from fastmcp import FastMCP, Context
 from dotenv import load_dotenv
-from src.recommendation_agent import SteamRecommendationAgent
+from src.services import get_services, shutdown_services
 from src.config_loader import config
 from src.logger import logger
+from src.response_encoder import response_encoder
+# tracing必须按src内部的方式导入（而非src.tracing），才能与Agent/爬虫模块共享同一份trace上下文
+import tracing
 
 # 加载环境变量
 load_dotenv()
 
+
+
+@asynccontextmanager
+async def lifespan(server):
+    """服务器生命周期：启动时创建共享服务容器并开始榜单预热，退出时释放连接"""
+    get_services().prewarmer.start()
+    try:
+        yield
+    finally:
+        if _bytes_out:
+            logger.info(f"各工具响应字节数统计: {get_bytes_out_stats()}")
+        await shutdown_services()
+
+
 # 创建MCP服务器实例
-mcp = FastMCP("steam-game-recommender 🎮")
+mcp = FastMCP("steam-game-recommender 🎮", lifespan=lifespan)
+
+
+# 每个工具的响应字节数统计（bytes-out）
+_bytes_out = {}
+_bytes_out_lock = threading.Lock()
+
+
+def _respond(tool: str, payload: dict) -> str:
+    """序列化工具响应（按mcp.response配置的编码器），并记录该工具的响应字节数"""
+    text, size = response_encoder.encode_with_size(payload)
+    with _bytes_out_lock:
+        stats = _bytes_out.setdefault(tool, {'calls': 0, 'total_bytes': 0, 'max_bytes': 0})
+        stats['calls'] += 1
+        stats['total_bytes'] += size
+        stats['max_bytes'] = max(stats['max_bytes'], size)
+    logger.info(f"{tool} 响应大小: {size}B")
+    return text
+
+
+def get_bytes_out_stats() -> dict:
+    """获取各工具的响应字节数统计（次数、总字节、平均、最大）"""
+    with _bytes_out_lock:
+        return {
+            tool: dict(stats, avg_bytes=round(stats['total_bytes'] / stats['calls'], 1))
+            for tool, stats in _bytes_out.items()
+        }
+
+
+def _round_age(age: Optional[float]) -> Optional[float]:
+    """快照年龄保留1位小数（实时请求时为None）"""
+    return None if age is None else round(age, 1)
+
+
+# 推荐进度的阶段序号（评分阶段之后每完成一款游戏进度+1）
+_PROGRESS_STAGES = {'analyzing': 0, 'searching': 1, 'scoring': 2}
+
+
+class _ProgressBridge:
+    """
+    把Agent工作线程中的进度回调转发为MCP进度通知和日志通知
+
+    进度通知携带阶段说明，日志通知的extra中携带当前TopN的部分结果，
+    客户端可以在全部评分完成前先展示结果或提前取消。
+    工作线程只把通知放入队列，由事件循环中的单个发送任务按产生顺序逐条发送，发送失败时记录日志。
+    """
+
+    def __init__(self, ctx: Context, loop: asyncio.AbstractEventLoop):
+        self._ctx = ctx
+        self._loop = loop
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._closed = False
+        self._sender = loop.create_task(self._send_all())
+
+    def __call__(self, event: dict):
+        """进度回调（在工作线程中调用）"""
+        if self._closed:
+            return
+        stage = event['stage']
+        total = event['total'] + len(_PROGRESS_STAGES) if event['total'] else None
+        if stage == 'done':
+            progress = total or len(_PROGRESS_STAGES)
+        else:
+            progress = _PROGRESS_STAGES.get(stage, 0) + event['completed']
+        partial = {
+            'stage': stage,
+            'completed': event['completed'],
+            'total': event['total'],
+            'top': [
+                {
+                    'app_id': rec.get('app_id'),
+                    'name': rec.get('name'),
+                    'price': rec.get('price'),
+                    'recommendation_score': rec.get('recommendation_score'),
+                }
+                for rec in event['top']
+            ],
+        }
+        try:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, (progress, total, event['message'], partial))
+        except RuntimeError:
+            # 事件循环已关闭（请求早已结束），丢弃通知
+            pass
+
+    async def _send_all(self):
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            progress, total, message, partial = item
+            try:
+                await self._ctx.report_progress(progress=progress, total=total, message=message)
+                await self._ctx.info(message, logger_name='recommend_games', extra={'partial_result': partial})
+            except Exception as e:
+                logger.warning(f"发送推荐进度通知失败 ({partial['stage']}): {e}")
+
+    async def aclose(self):
+        """发送完已排队的通知后停止（之后的回调直接丢弃）"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put_nowait(None)
+        await self._sender
+
+    def cancel(self):
+        """请求被取消时立即停止发送"""
+        self._closed = True
+        self._sender.cancel()
 
 
 @mcp.tool()
 async def recommend_games(
     user_query: str,
-    max_results: int = 5
+    max_results: int = 5,
+    include_timings: Optional[bool] = None,
+    ctx: Context = None
 ) -> str:
     """
     根据用户需求推荐Steam游戏（智能推荐，包含LLM评分）
@@ -36,46 +163,80 @@ async def recommend_games(
     Args:
         user_query: 用户的游戏推荐需求描述，例如："推荐一些开放世界RPG游戏，100元以内"
         max_results: 返回的最大推荐游戏数量，默认5款（建议≤10，过多会很慢）
+        include_timings: 是否在结果中附带timings（trace_id、各阶段耗时、HTTP/LLM调用与排队耗时、最慢的调用），
+            默认取配置 tracing.include_timings；与并发的相同请求合并时阶段耗时取自实际执行的请求（shared_trace_id）
         
     Returns:
         JSON格式的推荐结果，包含游戏列表及详细信息
     
     注意：此工具会为每个游戏调用LLM生成推荐理由，较慢但结果精准。
-    如需快速响应，请使用 quick_search_games 工具。
+    评分过程中会持续发送进度通知（附带当前评分最高的TopN），客户端可提前展示或取消。
+    如需快速响应，请使用 search_games 工具。
     """
+    if include_timings is None:
+        include_timings = config.get('tracing.include_timings', False)
     logger.info(f"收到MCP推荐请求: {user_query}, max_results={max_results}")
     print(f"\n🎮 MCP服务器收到请求: {user_query}")
     
-    try:
-        # 创建推荐Agent
-        agent = SteamRecommendationAgent()
-        
-        # 获取推荐结果
-        result = agent.recommend_games(user_query, max_output_results=max_results)
-        
-        # 格式化返回结果
-        response = {
-            'success': True,
-            'query': user_query,
-            'total_found': result.get('total_found', 0),
-            'total_evaluated': result.get('total_evaluated', 0),
-            'recommendations_count': len(result['recommendations']),
-            'recommendations': result['recommendations']
-        }
-        
-        logger.info(f"MCP推荐完成: 返回{len(result['recommendations'])}款游戏")
-        return json.dumps(response, ensure_ascii=False, indent=2)
-        
-    except Exception as e:
-        error_msg = f"推荐失败: {str(e)}"
-        logger.error(error_msg)
-        print(f"❌ {error_msg}")
-        
-        return json.dumps({
-            'success': False,
-            'error': error_msg,
-            'query': user_query
-        }, ensure_ascii=False, indent=2)
+    with tracing.start_trace('recommend_games', query=user_query, max_results=max_results) as trace:
+        if trace is not None:
+            logger.info(f"推荐请求trace_id: {trace.trace_id}")
+        try:
+            # 使用进程级共享的推荐Agent
+            agent = get_services().agent
+            
+            # 获取推荐结果（Agent与LLM调用为同步实现，放到工作线程中执行，避免阻塞事件循环；
+            # asyncio.to_thread会复制当前上下文，工作线程中的span归属于本次trace）
+            progress_bridge = _ProgressBridge(ctx, asyncio.get_running_loop()) if ctx is not None else None
+            cancel_event = threading.Event()
+            try:
+                result = await asyncio.to_thread(
+                    agent.recommend_games, user_query, max_output_results=max_results,
+                    progress_callback=progress_bridge, cancel_event=cancel_event
+                )
+            except asyncio.CancelledError:
+                # 客户端取消请求时通知工作线程停止提交新的LLM评分
+                cancel_event.set()
+                if progress_bridge is not None:
+                    progress_bridge.cancel()
+                logger.info(f"MCP推荐请求已被客户端取消: {user_query}")
+                raise
+            finally:
+                # 进度通知先于结果送达
+                if progress_bridge is not None:
+                    await progress_bridge.aclose()
+            
+            # 格式化返回结果
+            response = {
+                'success': True,
+                'query': user_query,
+                'total_found': result.get('total_found', 0),
+                'total_evaluated': result.get('total_evaluated', 0),
+                'recommendations_count': len(result['recommendations']),
+                'recommendations': result['recommendations']
+            }
+            if result.get('cancelled'):
+                response['cancelled'] = True
+            
+            logger.info(f"MCP推荐完成: 返回{len(result['recommendations'])}款游戏")
+            
+        except Exception as e:
+            error_msg = f"推荐失败: {str(e)}"
+            logger.error(error_msg)
+            print(f"❌ {error_msg}")
+            
+            response = {
+                'success': False,
+                'error': error_msg,
+                'query': user_query
+            }
+
+    if trace is not None:
+        timings = trace.summary()
+        logger.info(f"推荐请求耗时 [{trace.trace_id}]: 总计{timings['total_ms']}ms, 各阶段{timings['stages']}")
+        if include_timings:
+            response['timings'] = timings
+    return _respond('recommend_games', response)
 
 
 @mcp.tool()
@@ -101,10 +262,8 @@ async def search_games(
     print(f"\n🔍 MCP快速搜索: {keywords}")
     
     try:
-        from src.steam_crawler import SteamCrawler
-        
-        crawler = SteamCrawler()
-        games = crawler.search_games(keywords, max_price=max_price, max_results=max_results)
+        crawler = get_services().async_crawler
+        games = await crawler.search_games(keywords, max_price=max_price, max_results=max_results)
         
         response = {
             'success': True,
@@ -115,18 +274,18 @@ async def search_games(
         }
         
         logger.info(f"快速搜索完成: 返回{len(games)}款游戏")
-        return json.dumps(response, ensure_ascii=False, indent=2)
+        return _respond('search_games', response)
         
     except Exception as e:
         error_msg = f"搜索失败: {str(e)}"
         logger.error(error_msg)
         print(f"❌ {error_msg}")
         
-        return json.dumps({
+        return _respond('search_games', {
             'success': False,
             'error': error_msg,
             'keywords': keywords
-        }, ensure_ascii=False, indent=2)
+        })
 
 
 @mcp.tool()
@@ -144,7 +303,8 @@ async def get_discounted_games(
         max_results: 返回的最大游戏数量，默认20款
         
     Returns:
-        JSON格式的折扣游戏列表，按折扣力度排序
+        JSON格式的折扣游戏列表，按折扣力度排序；snapshot_age_seconds为预热快照的年龄（秒），
+        实时请求Steam时为null。快照只包含特惠页前若干款游戏，条件较严时与实时结果可能不同
     
     适用场景：寻找优惠促销、节日特卖、性价比游戏
     """
@@ -152,46 +312,59 @@ async def get_discounted_games(
     print(f"\n🎁 MCP获取折扣游戏: 折扣≥{min_discount}%")
     
     try:
-        from src.steam_crawler import SteamCrawler
-        
-        crawler = SteamCrawler()
-        games = crawler.get_discounted_games(
-            min_discount=min_discount,
-            max_price=max_price,
-            max_results=max_results
-        )
+        services = get_services()
+        snapshot = services.prewarmer.get_discounted_games(min_discount, max_price, max_results)
+        if snapshot is not None:
+            games, snapshot_age = snapshot
+        else:
+            games = await services.async_crawler.get_discounted_games(
+                min_discount=min_discount,
+                max_price=max_price,
+                max_results=max_results
+            )
+            snapshot_age = None
         
         response = {
             'success': True,
             'min_discount': min_discount,
             'max_price': max_price,
             'total_found': len(games),
+            'snapshot_age_seconds': _round_age(snapshot_age),
             'games': games
         }
         
         logger.info(f"获取折扣游戏完成: 返回{len(games)}款游戏")
-        return json.dumps(response, ensure_ascii=False, indent=2)
+        return _respond('get_discounted_games', response)
         
     except Exception as e:
         error_msg = f"获取折扣游戏失败: {str(e)}"
         logger.error(error_msg)
         print(f"❌ {error_msg}")
         
-        return json.dumps({
+        return _respond('get_discounted_games', {
             'success': False,
             'error': error_msg
-        }, ensure_ascii=False, indent=2)
+        })
 
 
 @mcp.tool()
 async def get_game_details(
-    game_identifier: str
+    game_identifier: str,
+    fields: list = None,
+    max_bytes: int = None
 ) -> str:
     """
     获取单个游戏的详细信息
     
     Args:
         game_identifier: 游戏名称或Steam AppID，例如："艾尔登法环" 或 "1245620"
+        fields: 只返回这些字段，例如：["name", "price", "genres", "short_description"]；
+            不设置时返回常用字段，传 ["all"] 返回全部字段。可选字段：
+            app_id, name, type, description, short_description, about_the_game, developers,
+            publishers, release_date, price, is_free, supported_languages, header_image, website,
+            platforms, categories, genres, screenshots, metacritic_score, recommendations,
+            achievements, dlc, pc_requirements, legal_notice
+        max_bytes: 详情的字节预算，超出时依次截断次要字段（列在truncated_fields中），默认8192
         
     Returns:
         JSON格式的游戏详细信息，包括：
@@ -203,24 +376,27 @@ async def get_game_details(
         - 系统要求
         - 评分信息
         - 截图链接
+    HTML字段（描述、支持语言、系统要求等）已转换为纯文本并按字段截断。
     
     适用场景：了解某款游戏的完整信息、对比游戏特性
     """
-    logger.info(f"收到游戏详情请求: {game_identifier}")
+    logger.info(f"收到游戏详情请求: {game_identifier}, fields={fields}, max_bytes={max_bytes}")
     print(f"\n📖 MCP获取游戏详情: {game_identifier}")
     
     try:
-        from src.steam_crawler import SteamCrawler
-        
-        crawler = SteamCrawler()
+        crawler = get_services().async_crawler
+        if fields is None:
+            fields = config.get('steam.game_details.default_fields')
+        if max_bytes is None:
+            max_bytes = config.get('steam.game_details.max_bytes', 8192)
         
         # 判断是AppID还是游戏名称
         if game_identifier.isdigit():
             # 是AppID
-            game_details = crawler.get_game_details(game_identifier)
+            game_details = await crawler.get_game_details(game_identifier, fields=fields, max_bytes=max_bytes)
         else:
             # 是游戏名称
-            game_details = crawler.get_game_by_name(game_identifier)
+            game_details = await crawler.get_game_by_name(game_identifier, fields=fields, max_bytes=max_bytes)
         
         if game_details:
             response = {
@@ -237,18 +413,18 @@ async def get_game_details(
             }
             logger.warning(f"未找到游戏: {game_identifier}")
         
-        return json.dumps(response, ensure_ascii=False, indent=2)
+        return _respond('get_game_details', response)
         
     except Exception as e:
         error_msg = f"获取游戏详情失败: {str(e)}"
         logger.error(error_msg)
         print(f"❌ {error_msg}")
         
-        return json.dumps({
+        return _respond('get_game_details', {
             'success': False,
             'error': error_msg,
             'game_identifier': game_identifier
-        }, ensure_ascii=False, indent=2)
+        })
 
 
 @mcp.tool()
@@ -267,7 +443,8 @@ async def get_top_games(
             - 'trendingweek': 本周热门趋势
         
     Returns:
-        JSON格式的热门游戏列表，包含排名信息
+        JSON格式的热门游戏列表，包含排名信息；snapshot_age_seconds为预热快照的年龄（秒），
+        实时请求Steam时为null
     
     适用场景：发现当前流行游戏、了解市场趋势、找热门游戏
     """
@@ -275,34 +452,38 @@ async def get_top_games(
     print(f"\n🔥 MCP获取热门游戏: {filter_type}")
     
     try:
-        from src.steam_crawler import SteamCrawler
-        
-        crawler = SteamCrawler()
-        games = crawler.get_top_games(
-            max_results=max_results,
-            filter_type=filter_type
-        )
+        services = get_services()
+        snapshot = services.prewarmer.get_top_games(max_results, filter_type)
+        if snapshot is not None:
+            games, snapshot_age = snapshot
+        else:
+            games = await services.async_crawler.get_top_games(
+                max_results=max_results,
+                filter_type=filter_type
+            )
+            snapshot_age = None
         
         response = {
             'success': True,
             'filter_type': filter_type,
             'total_found': len(games),
+            'snapshot_age_seconds': _round_age(snapshot_age),
             'games': games
         }
         
         logger.info(f"获取热门游戏完成: 返回{len(games)}款游戏")
-        return json.dumps(response, ensure_ascii=False, indent=2)
+        return _respond('get_top_games', response)
         
     except Exception as e:
         error_msg = f"获取热门游戏失败: {str(e)}"
         logger.error(error_msg)
         print(f"❌ {error_msg}")
         
-        return json.dumps({
+        return _respond('get_top_games', {
             'success': False,
             'error': error_msg,
             'filter_type': filter_type
-        }, ensure_ascii=False, indent=2)
+        })
 
 
 @mcp.tool()
@@ -318,7 +499,7 @@ async def get_free_games(
         tags: 可选的游戏标签过滤列表，例如：["动作", "冒险", "多人"]
         
     Returns:
-        JSON格式的免费游戏列表
+        JSON格式的免费游戏列表；snapshot_age_seconds为预热快照的年龄（秒），实时请求Steam时为null
     
     适用场景：寻找免费游戏、预算为零的用户、试玩体验
     """
@@ -326,33 +507,37 @@ async def get_free_games(
     print(f"\n🆓 MCP获取免费游戏")
     
     try:
-        from src.steam_crawler import SteamCrawler
-        
-        crawler = SteamCrawler()
-        games = crawler.get_free_games(
-            max_results=max_results,
-            tags=tags
-        )
+        services = get_services()
+        snapshot = services.prewarmer.get_free_games(max_results, tags)
+        if snapshot is not None:
+            games, snapshot_age = snapshot
+        else:
+            games = await services.async_crawler.get_free_games(
+                max_results=max_results,
+                tags=tags
+            )
+            snapshot_age = None
         
         response = {
             'success': True,
             'tags_filter': tags,
             'total_found': len(games),
+            'snapshot_age_seconds': _round_age(snapshot_age),
             'games': games
         }
         
         logger.info(f"获取免费游戏完成: 返回{len(games)}款游戏")
-        return json.dumps(response, ensure_ascii=False, indent=2)
+        return _respond('get_free_games', response)
         
     except Exception as e:
         error_msg = f"获取免费游戏失败: {str(e)}"
         logger.error(error_msg)
         print(f"❌ {error_msg}")
         
-        return json.dumps({
+        return _respond('get_free_games', {
             'success': False,
             'error': error_msg
-        }, ensure_ascii=False, indent=2)
+        })
 
 
 def main():
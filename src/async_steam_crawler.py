@@ -0,0 +1,488 @@
+"""
+Steam游戏信息异步爬虫模块
+与SteamCrawler方法、返回结构一致，基于httpx异步客户端，供MCP工具直接await
+"""
+import asyncio
+import time
+from typing import AsyncIterator, Iterable, List, Dict, Optional, Tuple, Union
+
+import httpx
+
+from config_loader import config
+from logger import logger
+from http_client import PoolStats
+from single_flight import AsyncSingleFlight
+from rate_limiter import steam_rate_limiter
+from resilience import steam_resilience, RetryableError
+from steam_crawler import SteamCrawlerBase
+from game_details import normalize_fields
+import tracing
+
+
+class AsyncSteamCrawler(SteamCrawlerBase):
+    """Steam游戏信息异步爬虫"""
+
+    def __init__(self, pool_size: Optional[int] = None):
+        super().__init__()
+
+        if pool_size is None:
+            pool_size = config.get('steam.http_pool_size', 30)
+        self.pool_size = pool_size
+        self.stats = PoolStats()
+        # 持有后台刷新任务的引用，防止被垃圾回收
+        self._background_tasks = set()
+        # 请求合并（协程版，绑定当前事件循环，因此按实例创建）
+        self.app_data_flight = AsyncSingleFlight('appdetails')
+        self.search_flight = AsyncSingleFlight('search')
+
+        # 长连接异步客户端（httpx会根据已安装的解码库协商 gzip / br）
+        self.client = httpx.AsyncClient(
+            headers=self.headers,
+            timeout=self.request_timeout,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            follow_redirects=True,
+        )
+
+        logger.info(f"Steam异步爬虫初始化完成 (超时={self.request_timeout}s, 连接池大小={pool_size})")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def aclose(self):
+        """关闭异步客户端，释放所有连接"""
+        await self.client.aclose()
+
+    async def _trace(self, event_name: str, info: Dict):
+        """httpcore追踪回调，用于统计新建连接数"""
+        if event_name == 'connection.connect_tcp.complete':
+            self.stats.record_new_connection()
+
+    async def _get(self, url: str, params: Dict) -> httpx.Response:
+        """发送GET请求（复用连接池中的长连接）"""
+        self.stats.record_request()
+        return await self.client.get(url, params=params, extensions={'trace': self._trace})
+
+    async def _fetch_search_page(self, params: Dict) -> str:
+        """请求一页搜索结果的HTML（失败时按重试策略重试）"""
+        return await steam_resilience.call_async('search', lambda: self._send_search_request(params))
+
+    async def _send_search_request(self, params: Dict) -> str:
+        with tracing.span('steam.search_page', kind='client', start=params.get('start')) as span:
+            await self._wait_rate_limit('search', span)
+            try:
+                response = await self._get(self.search_results_url, params)
+            except httpx.TransportError as e:
+                raise RetryableError(f'请求搜索页失败: {e!r}')
+            span.set_attribute('status_code', response.status_code)
+            return self._extract_results_html(response)
+
+    async def _load_search_rows(self, params: Dict, key: tuple) -> List[Dict]:
+        """请求并解析搜索结果页，写入缓存（相同参数的并发请求合并为一次）"""
+        return await self.search_flight.do(key, self._request_search_rows, params, key)
+
+    async def _request_search_rows(self, params: Dict, key: tuple) -> List[Dict]:
+        rows = self._parse_search_page(await self._fetch_search_page(params))
+        self.search_cache.set(key, rows)
+        return rows
+
+    async def _refresh_search_rows(self, params: Dict, key: tuple):
+        """后台刷新过期的搜索结果页缓存"""
+        try:
+            await self._load_search_rows(params, key)
+            logger.debug(f"搜索结果缓存已后台刷新: {key}")
+        except Exception as e:
+            logger.warning(f"后台刷新搜索结果缓存失败: {e}")
+        finally:
+            self.search_cache.end_refresh(key)
+
+    async def _fetch_search_rows(self, params: Dict, use_cache: bool = True) -> List[Dict]:
+        """获取搜索结果页解析后的结果行（stale-while-revalidate，后台刷新使用asyncio任务）"""
+        key = self.search_cache.make_key(params)
+        if use_cache:
+            rows, state = self.search_cache.get(key)
+            if rows is not None:
+                if state == self.search_cache.STALE and self.search_cache.begin_refresh(key):
+                    task = asyncio.create_task(self._refresh_search_rows(params, key))
+                    self._background_tasks.add(task)
+                    task.add_done_callback(self._background_tasks.discard)
+                return self._copy_rows(rows)
+
+        return self._copy_rows(await self._load_search_rows(params, key))
+
+    async def _iter_search_pages(self, params: Dict, max_rows: int,
+                                 use_cache: bool = True) -> AsyncIterator[Tuple[int, List[Dict]]]:
+        """分页获取搜索结果，按到达顺序产出 (起始位置, 结果行)（策略同SteamCrawler._iter_search_pages）"""
+        page_size = self.search_page_size
+        first_rows = await self._fetch_search_rows(self._build_page_params(params, 0), use_cache=use_cache)
+        yield 0, first_rows
+
+        starts = list(range(page_size, max_rows, page_size))
+        if len(first_rows) < page_size or not starts:
+            return
+
+        semaphore = asyncio.Semaphore(max(1, self.search_page_concurrency))
+
+        async def fetch_page(start: int):
+            async with semaphore:
+                try:
+                    return start, await self._fetch_search_rows(self._build_page_params(params, start),
+                                                                use_cache=use_cache)
+                except Exception as e:
+                    logger.warning(f"获取搜索结果分页失败 (start={start}): {e}")
+                    return start, None
+
+        for next_page in asyncio.as_completed([fetch_page(start) for start in starts]):
+            start, rows = await next_page
+            if rows is not None:
+                yield start, rows
+
+    async def _fetch_rows_paged(self, params: Dict, max_rows: int, use_cache: bool = True) -> List[Dict]:
+        """分页获取最多max_rows行去重后的搜索结果（保持Steam的排序）"""
+        pages = [page async for page in self._iter_search_pages(params, max_rows, use_cache=use_cache)]
+        return self._merge_pages(pages, max_rows)
+
+    async def _request_app_data(self, app_id: str, filters: Optional[str] = None):
+        """请求appdetails接口，返回游戏数据（失败时按重试策略重试）"""
+        data = await steam_resilience.call_async(
+            'appdetails', lambda: self._send_app_details_request(app_id, filters)
+        )
+        return self._extract_app_data(data, app_id)
+
+    async def _send_app_details_request(self, app_id: str, filters: Optional[str]) -> Dict:
+        api_url = f"{self.api_url}/appdetails"
+        with tracing.span('steam.appdetails', kind='client', app_id=app_id, filters=filters) as span:
+            await self._wait_rate_limit('appdetails', span)
+            try:
+                response = await self._get(api_url, self._build_app_details_params(app_id, filters=filters))
+            except httpx.TransportError as e:
+                raise RetryableError(f'请求appdetails失败: {e!r}')
+            span.set_attribute('status_code', response.status_code)
+            return self._decode_app_details(response)
+
+    @staticmethod
+    async def _wait_rate_limit(endpoint: str, span):
+        """等待限流令牌（不阻塞事件循环），排队时间记录为 queue.rate_limit span"""
+        start_ns = time.time_ns()
+        waited = await steam_rate_limiter.acquire_async(endpoint)
+        if waited > 0:
+            tracing.record_span('queue.rate_limit', start_ns, endpoint=endpoint)
+            span.set_attribute('rate_limit_wait_ms', round(waited * 1000, 1))
+
+    async def _fetch_app_data(self, app_id: str, use_cache: bool = True,
+                              need_price: bool = True) -> Optional[Dict]:
+        """获取appdetails游戏数据（优先读缓存并合并并发请求，参数同SteamCrawler._fetch_app_data）"""
+        key = (self._store_key(app_id), use_cache, need_price)
+        return await self.app_data_flight.do(key, self._load_app_data, app_id, use_cache, need_price)
+
+    async def _load_app_data(self, app_id: str, use_cache: bool, need_price: bool) -> Optional[Dict]:
+        if use_cache:
+            cached, price_fresh = self.app_cache.get(app_id, self.language, self.country_code,
+                                                     need_price=need_price)
+            if cached is None:
+                # 持久化缓存为SQLite同步读写，放到工作线程中执行，避免阻塞事件循环
+                cached, price_fresh = await asyncio.to_thread(self._load_stored_app_data, app_id)
+            if cached is not None:
+                if price_fresh or not need_price:
+                    return cached
+                price_data = await self._request_app_data(app_id, filters='price_overview')
+                if price_data is not None:
+                    merged = await asyncio.to_thread(self._merge_price_data, app_id, price_data)
+                    if merged is not None:
+                        return merged
+
+        game_data = await self._request_app_data(app_id)
+        await asyncio.to_thread(self._cache_app_data, app_id, game_data)
+        return game_data
+
+    async def _enrich_games(self, games: Union[Iterable[Dict], AsyncIterator[Dict]], max_concurrency: int,
+                            log_progress: bool = False, use_cache: bool = True):
+        """
+        使用asyncio.gather并发获取游戏详细信息（信号量限制并发数）
+
+        games可以是异步迭代器：每产出一款游戏就立即创建任务，分页搜索时无需等待所有页面返回。
+        """
+        print(f"\n🔍 获取游戏详细信息（异步并发）...")
+        semaphore = asyncio.Semaphore(max(1, min(max_concurrency, self.pool_size)))
+        completed = 0
+        submitted = []
+        tasks = []
+
+        async def enrich(game: Dict):
+            nonlocal completed
+            queued_ns = time.time_ns()
+            async with semaphore:
+                tracing.record_span('queue.enrich', queued_ns, app_id=game.get('app_id'))
+                with tracing.span('steam.enrich', app_id=game.get('app_id')):
+                    await self._enrich_game_info(game, use_cache)
+            completed += 1
+            print(f"  [{completed}/{len(tasks)}] 已获取: {game['name']}")
+            if log_progress:
+                logger.log_search_game(game['name'], completed, len(tasks))
+
+        if hasattr(games, '__aiter__'):
+            async for game in games:
+                submitted.append(game)
+                tasks.append(asyncio.ensure_future(enrich(game)))
+        else:
+            submitted = list(games)
+            tasks = [asyncio.ensure_future(enrich(game)) for game in submitted]
+
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for game, result in zip(submitted, results):
+            if isinstance(result, Exception):
+                logger.error(f"获取 {game['name']} 详情失败: {result}")
+
+    async def enrich_games(self, games: List[Dict], max_concurrency: int = 10, use_cache: bool = True):
+        """并发获取一批游戏的详细信息（原地写入，结果状态见 game['enrichment_status']）"""
+        await self._enrich_games(games, max_concurrency=max_concurrency, use_cache=use_cache)
+
+    async def search_games(self, keywords: str, max_price: Optional[float] = None,
+                           tags: Optional[List[str]] = None, max_results: int = None,
+                           use_cache: bool = True) -> List[Dict]:
+        """
+        搜索Steam游戏
+
+        Args:
+            keywords: 搜索关键词
+            max_price: 最大价格（人民币）
+            tags: 游戏标签列表
+            max_results: 最大返回结果数（None则使用配置文件的值）
+            use_cache: 是否使用缓存（False时绕过缓存直接请求Steam）
+
+        Returns:
+            游戏信息列表
+        """
+        if max_results is None:
+            max_results = config.get('steam.max_search_results', 50)
+
+        logger.log_search_start(f"关键词='{keywords}', 最大价格={max_price}, 最大结果={max_results}")
+
+        # 本地目录首次使用时要从SQLite加载并建索引，放到工作线程中执行
+        local_games = await asyncio.to_thread(self._search_local, keywords, max_price, tags, max_results)
+        if local_games is not None:
+            logger.log_search_complete(len(local_games))
+            return local_games
+
+        print(f"\n🔍 正在搜索Steam游戏: '{keywords}' (最多返回 {max_results} 款)...")
+
+        games = []
+        params = self._build_search_params(term=keywords)
+        if max_price:
+            params['maxprice'] = int(max_price)
+
+        max_rows = max_results * 2
+        seen = set()
+        positions = {}
+
+        async def stream_games():
+            """分页到达后立即去重、按价格过滤，并把游戏交给详情获取"""
+            async for start, rows in self._iter_search_pages(params, max_rows, use_cache=use_cache):
+                fresh = []
+                for index, row in enumerate(rows):
+                    if start + index >= max_rows or row['app_id'] in seen:
+                        continue
+                    seen.add(row['app_id'])
+                    positions[row['app_id']] = start + index
+                    fresh.append(row)
+                page_games = self._collect_search_results(fresh, max_price)
+                logger.info(f"搜索结果分页 (start={start}) 返回 {len(rows)} 行，新增 {len(page_games)} 款游戏")
+                games.extend(page_games)
+                for game in page_games:
+                    yield game
+
+        try:
+            await self._enrich_games(stream_games(), max_concurrency=max_rows, log_progress=True,
+                                     use_cache=use_cache)
+            # 分页按到达顺序处理，最后恢复Steam的排序
+            games.sort(key=lambda game: positions[game['app_id']])
+            # 收录本地目录会重建索引并写入SQLite，放到工作线程中执行
+            await asyncio.to_thread(self._ingest_games, games)
+
+            logger.info(f"Steam搜索返回 {len(seen)} 个结果，过滤后得到 {len(games)} 款游戏")
+            logger.log_search_complete(len(games))
+
+        except Exception as e:
+            logger.error(f"搜索Steam游戏出错: {e}")
+            print(f"❌ 搜索出错: {e}")
+
+        return games
+
+    async def _enrich_game_info(self, game: Dict, use_cache: bool = True):
+        """丰富游戏详细信息，结果状态写入 game['enrichment_status']"""
+        try:
+            app_id = game.get('app_id')
+            if not app_id:
+                game['enrichment_status'] = self.ENRICHMENT_NOT_FOUND
+                return
+
+            game_data = await self._fetch_app_data(app_id, use_cache=use_cache, need_price=False)
+            self._set_enrichment_result(game, game_data)
+
+        except Exception as e:
+            self._set_enrichment_error(game, e)
+
+    async def retry_failed_enrichment(self, games: List[Dict], use_cache: bool = True) -> int:
+        """重新获取丰富失败（failed / skipped）的游戏详情，返回重试后仍未成功的数量"""
+        pending = [game for game in games if game.get('enrichment_status') in self.ENRICHMENT_RETRYABLE]
+        if pending:
+            logger.info(f"重新获取{len(pending)}款游戏的详细信息")
+            # 先单独请求一款作为熔断器半开状态的探测请求，成功后其余并发重试
+            await self._enrich_game_info(pending[0], use_cache)
+            if pending[0].get('enrichment_status') == self.ENRICHMENT_OK and len(pending) > 1:
+                await self._enrich_games(pending[1:], max_concurrency=len(pending) - 1, use_cache=use_cache)
+        return sum(1 for game in pending if game.get('enrichment_status') != self.ENRICHMENT_OK)
+
+    async def get_game_details(self, app_id: str, use_cache: bool = True, fields: Optional[List[str]] = None,
+                               max_bytes: Optional[int] = None) -> Optional[Dict]:
+        """获取单个游戏的详细信息（参数与返回值同SteamCrawler.get_game_details）"""
+        fields = normalize_fields(fields)
+        try:
+            game_data = await self._fetch_app_data(app_id, use_cache=use_cache)
+            if game_data:
+                return self._finish_game_details(app_id, game_data, fields, max_bytes)
+
+        except Exception as e:
+            logger.error(f"获取游戏详情出错 (AppID: {app_id}): {e}")
+            print(f"❌ 获取游戏详情出错 (AppID: {app_id}): {e}")
+
+        return None
+
+    async def get_game_by_name(self, game_name: str, use_cache: bool = True, fields: Optional[List[str]] = None,
+                               max_bytes: Optional[int] = None) -> Optional[Dict]:
+        """根据游戏名称获取详细信息（fields、max_bytes同get_game_details）"""
+        fields = normalize_fields(fields)
+        logger.info(f"根据名称搜索游戏: {game_name}")
+        print(f"\n🔍 搜索游戏: {game_name}...")
+
+        games = await self.search_games(game_name, max_results=1, use_cache=use_cache)
+
+        if not games:
+            logger.warning(f"未找到游戏: {game_name}")
+            print(f"❌ 未找到游戏: {game_name}")
+            return None
+
+        return await self.get_game_details(games[0]['app_id'], use_cache=use_cache, fields=fields,
+                                           max_bytes=max_bytes)
+
+    async def get_discounted_games(self, min_discount: int = 0, max_price: Optional[float] = None,
+                                   max_results: int = 20, use_cache: bool = True,
+                                   refresh_listing: bool = False) -> List[Dict]:
+        """获取折扣游戏（参数与返回值同SteamCrawler.get_discounted_games）
+
+        refresh_listing为True时绕过搜索结果缓存重新请求榜单，游戏详情仍读缓存（供榜单预热使用）
+        """
+        logger.info(f"获取折扣游戏: 最低折扣={min_discount}%, 最大价格={max_price}, 最多{max_results}款")
+        print(f"\n🎁 正在获取折扣游戏 (折扣≥{min_discount}%)...")
+
+        games = []
+
+        try:
+            params = self._build_search_params(specials=1)
+            if max_price:
+                params['maxprice'] = int(max_price)
+
+            rows = await self._fetch_rows_paged(params, max_results * 3,
+                                              use_cache=use_cache and not refresh_listing)
+
+            logger.info(f"Steam折扣页返回 {len(rows)} 个结果")
+
+            games = self._collect_discounted_games(rows, min_discount, max_price, max_results)
+
+            logger.info(f"获取到 {len(games)} 款折扣游戏")
+            print(f"✅ 找到 {len(games)} 款符合条件的折扣游戏")
+
+        except Exception as e:
+            logger.error(f"获取折扣游戏出错: {e}")
+            print(f"❌ 获取折扣游戏出错: {e}")
+
+        return games
+
+    async def get_free_games(self, max_results: int = 20, tags: Optional[List[str]] = None,
+                             use_cache: bool = True,
+                             refresh_listing: bool = False) -> List[Dict]:
+        """获取免费游戏（参数与返回值同SteamCrawler.get_free_games）
+
+        refresh_listing为True时绕过搜索结果缓存重新请求榜单，游戏详情仍读缓存（供榜单预热使用）
+        """
+        logger.info(f"获取免费游戏: 最多{max_results}款, 标签={tags}")
+        print(f"\n🆓 正在获取Steam免费游戏...")
+
+        games = []
+
+        try:
+            params = self._build_search_params(maxprice='free')
+
+            rows = await self._fetch_rows_paged(params, max_results * 3,
+                                              use_cache=use_cache and not refresh_listing)
+
+            logger.info(f"Steam免费游戏页返回 {len(rows)} 个结果")
+
+            games = self._collect_free_games(rows, tags, max_results)
+
+            logger.info(f"获取到 {len(games)} 款免费游戏")
+            print(f"✅ 找到 {len(games)} 款免费游戏")
+
+            if games:
+                await self._enrich_games(games, max_concurrency=10, use_cache=use_cache)
+                await asyncio.to_thread(self._ingest_games, games)
+
+        except Exception as e:
+            logger.error(f"获取免费游戏出错: {e}")
+            print(f"❌ 获取免费游戏出错: {e}")
+
+        return games
+
+    async def get_top_games(self, max_results: int = 20, filter_type: str = 'topsellers',
+                            use_cache: bool = True,
+                            refresh_listing: bool = False) -> List[Dict]:
+        """获取Steam热门游戏排行（参数与返回值同SteamCrawler.get_top_games）
+
+        refresh_listing为True时绕过搜索结果缓存重新请求榜单，游戏详情仍读缓存（供榜单预热使用）
+        """
+        logger.info(f"获取热门游戏: 类型={filter_type}, 最多{max_results}款")
+        print(f"\n🔥 正在获取Steam热门游戏榜单 ({filter_type})...")
+
+        games = []
+
+        try:
+            params = self._build_search_params(filter=filter_type)
+
+            rows = await self._fetch_rows_paged(params, max_results * 2,
+                                              use_cache=use_cache and not refresh_listing)
+
+            logger.info(f"Steam热门榜返回 {len(rows)} 个结果")
+
+            games = self._collect_top_games(rows, max_results)
+
+            logger.info(f"获取到 {len(games)} 款热门游戏")
+            print(f"✅ 找到 {len(games)} 款热门游戏")
+
+            if games:
+                await self._enrich_games(games, max_concurrency=10, use_cache=use_cache)
+                await asyncio.to_thread(self._ingest_games, games)
+
+        except Exception as e:
+            logger.error(f"获取热门游戏出错: {e}")
+            print(f"❌ 获取热门游戏出错: {e}")
+
+        return games
+
+    def get_pool_stats(self) -> Dict:
+        """获取HTTP连接池统计（复用连接数 / 新建连接数）"""
+        stats = self.stats.snapshot()
+        stats['pool_size'] = self.pool_size
+        return stats
+
+    def get_rate_limit_stats(self) -> Dict:
+        """获取Steam接口限流排队统计（与同步爬虫共享同一限流器）"""
+        return steam_rate_limiter.get_stats()
+
+    def get_coalesce_stats(self) -> Dict:
+        """获取请求合并统计"""
+        return {
+            'appdetails': self.app_data_flight.get_stats(),
+            'search': self.search_flight.get_stats(),
+        }
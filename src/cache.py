@@ -0,0 +1,367 @@
+"""
+缓存模块
+提供线程安全的TTL + LRU内存缓存，以及Steam appdetails专用缓存
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from config_loader import config
+
+# 区分“未命中”与“缓存值为None”的哨兵对象
+_MISSING = object()
+
+
+class TTLCache:
+    """线程安全的TTL + LRU缓存"""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600, name: str = 'cache'):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.name = name
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """读取缓存，过期或不存在时返回default"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """写入缓存，超过容量时淘汰最久未使用的条目"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_stats(self) -> Dict:
+        """获取命中/未命中/淘汰统计"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'name': self.name,
+                'size': len(self._data),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+class PersistentTTLCache(TTLCache):
+    """带可选持久化的TTL + LRU缓存
+
+    内存未命中时回落到持久化存储（CatalogStore），命中后回填内存；
+    写入时同时写内存和持久化存储。键必须是字符串。
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600, name: str = 'cache',
+                 store=None, kind: Optional[str] = None):
+        super().__init__(max_entries=max_entries, ttl=ttl, name=name)
+        self.store = store
+        self.kind = kind or name
+        self.store_hits = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = super().get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if self.store is None:
+            return default
+
+        stored = self.store.get(self.kind, key, ttl=self.ttl)
+        if stored is None:
+            return default
+        value, fetched_at, _ = stored
+        remaining = self.ttl - (time.time() - fetched_at)
+        if remaining <= 0:
+            return default
+        super().set(key, value, ttl=remaining)
+        with self._lock:
+            self.store_hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        super().set(key, value, ttl=ttl)
+        if self.store is not None:
+            self.store.put(self.kind, key, value)
+
+    def get_stats(self) -> Dict:
+        stats = super().get_stats()
+        stats['persistent'] = self.store is not None
+        stats['store_hits'] = self.store_hits
+        return stats
+
+
+class AppDetailsCache:
+    """Steam appdetails响应缓存
+
+    以 (app_id, language, country_code) 为键，静态字段（简介、类型、开发商等）
+    与易变字段（price_overview）分别设置过期时间：静态字段仍有效而价格过期时，
+    只需用 filters=price_overview 刷新价格即可。
+    """
+
+    VOLATILE_FIELDS = ('price_overview',)
+
+    def __init__(self, max_entries: Optional[int] = None, static_ttl: Optional[float] = None,
+                 price_ttl: Optional[float] = None):
+        if max_entries is None:
+            max_entries = config.get('cache.appdetails.max_entries', 2000)
+        if static_ttl is None:
+            static_ttl = config.get('cache.appdetails.static_ttl_seconds', 86400)
+        if price_ttl is None:
+            price_ttl = config.get('cache.appdetails.price_ttl_seconds', 900)
+        self.enabled = config.get('cache.appdetails.enabled', True)
+        self.max_entries = max_entries
+        self.static_ttl = static_ttl
+        self.price_ttl = price_ttl
+
+        # 键 -> {'data': dict, 'static_at': float, 'price_at': float}
+        self._data: "OrderedDict[Tuple[str, str, str], Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.price_refreshes = 0
+
+    def get(self, app_id: str, language: str, country_code: str,
+            need_price: bool = True) -> Tuple[Optional[Dict], bool]:
+        """
+        读取缓存
+
+        Returns:
+            (游戏数据, 价格是否新鲜)；未命中时游戏数据为None
+        """
+        if not self.enabled:
+            return None, False
+
+        key = (str(app_id), language, country_code)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, False
+            if now - entry['static_at'] > self.static_ttl:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None, False
+            self._data.move_to_end(key)
+            price_fresh = now - entry['price_at'] <= self.price_ttl
+            if price_fresh or not need_price:
+                self.hits += 1
+            return entry['data'], price_fresh
+
+    def put(self, app_id: str, language: str, country_code: str, data: Dict,
+            age: float = 0.0, price_age: Optional[float] = None):
+        """写入完整的appdetails数据（从持久化缓存回填时通过age保留原抓取时间）"""
+        if not self.enabled:
+            return
+        key = (str(app_id), language, country_code)
+        now = time.monotonic()
+        price_age = age if price_age is None else price_age
+        with self._lock:
+            self._data[key] = {'data': data, 'static_at': now - age, 'price_at': now - price_age}
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def update_price(self, app_id: str, language: str, country_code: str,
+                     price_data: Optional[Dict]) -> Optional[Dict]:
+        """用filters=price_overview的响应刷新易变字段，返回合并后的数据"""
+        key = (str(app_id), language, country_code)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            # 复制一份再修改，避免影响正在被其他线程读取的旧数据
+            data = dict(entry['data'])
+            for field in self.VOLATILE_FIELDS:
+                if price_data and field in price_data:
+                    data[field] = price_data[field]
+                else:
+                    data.pop(field, None)
+            entry['data'] = data
+            entry['price_at'] = time.monotonic()
+            self.price_refreshes += 1
+            return data
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def get_stats(self) -> Dict:
+        """获取命中/未命中/淘汰统计"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'name': 'appdetails',
+                'enabled': self.enabled,
+                'size': len(self._data),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'price_refreshes': self.price_refreshes,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+class SearchPageCache:
+    """Steam搜索结果页缓存（保存解析后的结果行，支持stale-while-revalidate）
+
+    - 新鲜期内（fresh_ttl）直接返回
+    - 过期但仍在可用期内（stale_ttl）返回旧数据，同时由调用方在后台刷新
+    - 超过可用期视为未命中，调用方同步请求
+    """
+
+    FRESH = 'fresh'
+    STALE = 'stale'
+
+    def __init__(self, max_entries: Optional[int] = None, fresh_ttl: Optional[float] = None,
+                 stale_ttl: Optional[float] = None):
+        if max_entries is None:
+            max_entries = config.get('cache.search.max_entries', 256)
+        if fresh_ttl is None:
+            fresh_ttl = config.get('cache.search.fresh_ttl_seconds', 600)
+        if stale_ttl is None:
+            stale_ttl = config.get('cache.search.stale_ttl_seconds', 3600)
+        self.enabled = config.get('cache.search.enabled', True)
+        self.max_entries = max_entries
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = max(stale_ttl, fresh_ttl)
+
+        # 键 -> (抓取时间, 结果行列表)
+        self._data: "OrderedDict[Tuple, Tuple[float, list]]" = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refreshes = 0
+
+    @staticmethod
+    def make_key(params: Dict) -> Tuple:
+        """把请求参数规范化为缓存键（忽略大小写、首尾及重复空白、参数顺序）"""
+        items = []
+        for name, value in params.items():
+            if value is None or value == '':
+                continue
+            text = ' '.join(str(value).split()).lower()
+            items.append((str(name).lower(), text))
+        return tuple(sorted(items))
+
+    def get(self, key: Tuple) -> Tuple[Optional[list], Optional[str]]:
+        """
+        读取缓存
+
+        Returns:
+            (结果行列表, 状态)；状态为FRESH / STALE，未命中时为 (None, None)
+        """
+        if not self.enabled:
+            return None, None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, None
+            age = now - entry[0]
+            if age > self.stale_ttl:
+                del self._data[key]
+                self.misses += 1
+                return None, None
+            self._data.move_to_end(key)
+            if age <= self.fresh_ttl:
+                self.fresh_hits += 1
+                return entry[1], self.FRESH
+            self.stale_hits += 1
+            return entry[1], self.STALE
+
+    def set(self, key: Tuple, rows: list):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic(), rows)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def begin_refresh(self, key: Tuple) -> bool:
+        """标记后台刷新开始；同一键已有刷新在进行时返回False"""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self.refreshes += 1
+            return True
+
+    def end_refresh(self, key: Tuple):
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def get_stats(self) -> Dict:
+        """获取命中/未命中/后台刷新统计"""
+        with self._lock:
+            lookups = self.fresh_hits + self.stale_hits + self.misses
+            return {
+                'name': 'search',
+                'enabled': self.enabled,
+                'size': len(self._data),
+                'max_entries': self.max_entries,
+                'fresh_hits': self.fresh_hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'background_refreshes': self.refreshes,
+                'hit_ratio': round((self.fresh_hits + self.stale_hits) / lookups, 3) if lookups else 0.0,
+            }
+
+
+# 全局缓存实例（同步/异步爬虫共享）
+appdetails_cache = AppDetailsCache()
+search_cache = SearchPageCache()
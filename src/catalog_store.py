@@ -0,0 +1,215 @@
+"""
+持久化游戏目录缓存模块
+使用SQLite保存解析后的appdetails数据（zlib压缩的JSON），服务重启/重新部署后仍可命中
+"""
+import atexit
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from config_loader import config
+from logger import logger
+
+
+class CatalogStore:
+    """基于SQLite的持久化缓存
+
+    每条记录以 (kind, key) 为主键，保存压缩后的JSON、静态数据抓取时间和价格抓取时间。
+    单连接 + 锁保证多线程安全，WAL模式减少读写互斥。
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: Optional[float] = None):
+        self.enabled = config.get('cache.catalog_store.enabled', True)
+        if path is None:
+            path = config.get('cache.catalog_store.path', 'data/catalog.sqlite3')
+        if not os.path.isabs(path):
+            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            path = os.path.join(base_dir, path)
+        if ttl is None:
+            ttl = config.get('cache.catalog_store.ttl_seconds', 604800)
+        self.path = path
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.reads = 0
+        self.hits = 0
+        self.writes = 0
+
+        if self.enabled:
+            try:
+                self._open()
+            except sqlite3.Error as e:
+                logger.error(f"持久化缓存打开失败，已禁用: {e}")
+                self.enabled = False
+
+    def _open(self):
+        """打开数据库并建表"""
+        db_dir = os.path.dirname(self.path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            ' kind TEXT NOT NULL,'
+            ' key TEXT NOT NULL,'
+            ' fetched_at REAL NOT NULL,'
+            ' price_at REAL NOT NULL,'
+            ' payload BLOB NOT NULL,'
+            ' PRIMARY KEY (kind, key))'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_entries_fetched_at ON entries (fetched_at)')
+        logger.info(f"持久化缓存已打开: {self.path} (有效期={self.ttl}s)")
+
+    @staticmethod
+    def _encode(payload: Any) -> bytes:
+        return zlib.compress(json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+    @staticmethod
+    def _decode(blob: bytes) -> Any:
+        return json.loads(zlib.decompress(blob).decode('utf-8'))
+
+    def get(self, kind: str, key: str, ttl: Optional[float] = None) -> Optional[Tuple[Any, float, float]]:
+        """
+        读取记录
+
+        Returns:
+            (数据, 静态数据抓取时间, 价格抓取时间)，不存在或已过期时返回None
+        """
+        if not self.enabled:
+            return None
+        ttl = self.ttl if ttl is None else ttl
+        try:
+            with self._lock:
+                self.reads += 1
+                row = self._conn.execute(
+                    'SELECT payload, fetched_at, price_at FROM entries WHERE kind = ? AND key = ?',
+                    (kind, key)
+                ).fetchone()
+            if row is None or time.time() - row[1] > ttl:
+                return None
+            payload = self._decode(row[0])
+            with self._lock:
+                self.hits += 1
+            return payload, row[1], row[2]
+        except (sqlite3.Error, zlib.error, ValueError) as e:
+            logger.error(f"读取持久化缓存出错 ({kind}:{key}): {e}")
+            return None
+
+    def put(self, kind: str, key: str, payload: Any, fetched_at: Optional[float] = None,
+            price_at: Optional[float] = None):
+        """写入记录（已存在则覆盖）"""
+        if not self.enabled:
+            return
+        now = time.time()
+        fetched_at = now if fetched_at is None else fetched_at
+        price_at = fetched_at if price_at is None else price_at
+        try:
+            blob = self._encode(payload)
+            with self._lock:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO entries (kind, key, fetched_at, price_at, payload) VALUES (?, ?, ?, ?, ?)',
+                    (kind, key, fetched_at, price_at, blob)
+                )
+                self.writes += 1
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.error(f"写入持久化缓存出错 ({kind}:{key}): {e}")
+
+    def scan(self, kind: str, ttl: Optional[float] = None) -> Iterator[Tuple[str, Any, float]]:
+        """遍历某类未过期的记录，产出 (键, 数据, 静态数据抓取时间)"""
+        if not self.enabled:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    'SELECT key, payload, fetched_at FROM entries WHERE kind = ? AND fetched_at >= ?',
+                    (kind, time.time() - ttl)
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"遍历持久化缓存出错 ({kind}): {e}")
+            return
+        for key, blob, fetched_at in rows:
+            try:
+                yield key, self._decode(blob), fetched_at
+            except (zlib.error, ValueError) as e:
+                logger.error(f"读取持久化缓存出错 ({kind}:{key}): {e}")
+
+    def update_payload(self, kind: str, key: str, payload: Any, price_at: Optional[float] = None):
+        """只更新数据和价格抓取时间，保留静态数据抓取时间"""
+        if not self.enabled:
+            return
+        price_at = time.time() if price_at is None else price_at
+        try:
+            blob = self._encode(payload)
+            with self._lock:
+                self._conn.execute(
+                    'UPDATE entries SET payload = ?, price_at = ? WHERE kind = ? AND key = ?',
+                    (blob, price_at, kind, key)
+                )
+                self.writes += 1
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.error(f"更新持久化缓存出错 ({kind}:{key}): {e}")
+
+    def compact(self) -> Dict:
+        """删除过期记录并执行VACUUM，返回压缩前后的文件大小"""
+        if not self.enabled:
+            return {'enabled': False}
+        size_before = self._file_size()
+        with self._lock:
+            cursor = self._conn.execute('DELETE FROM entries WHERE fetched_at < ?', (time.time() - self.ttl,))
+            deleted = cursor.rowcount
+            self._conn.execute('VACUUM')
+            self._conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        size_after = self._file_size()
+        logger.info(f"持久化缓存压缩完成: 删除{deleted}条过期记录, {size_before}B -> {size_after}B")
+        return {'deleted': deleted, 'size_before': size_before, 'size_after': size_after}
+
+    def _file_size(self) -> int:
+        return sum(os.path.getsize(p) for p in (self.path, self.path + '-wal') if os.path.exists(p))
+
+    def get_stats(self) -> Dict:
+        """获取持久化缓存统计"""
+        if not self.enabled:
+            return {'enabled': False}
+        with self._lock:
+            rows = self._conn.execute('SELECT kind, COUNT(*) FROM entries GROUP BY kind').fetchall()
+            return {
+                'enabled': True,
+                'path': self.path,
+                'entries': dict(rows),
+                'reads': self.reads,
+                'hits': self.hits,
+                'writes': self.writes,
+                'file_size': self._file_size(),
+            }
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        self.enabled = False
+
+
+# 全局持久化缓存实例（进程退出时关闭）
+catalog_store = CatalogStore()
+atexit.register(catalog_store.close)
+
+
+if __name__ == "__main__":
+    # 用法: python src/catalog_store.py [compact|stats]
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    if command == 'compact':
+        print(catalog_store.compact())
+    else:
+        print(json.dumps(catalog_store.get_stats(), ensure_ascii=False, indent=2))
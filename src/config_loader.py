@@ -48,18 +48,135 @@ class ConfigLoader:
                 "enable_thinking": False
             },
             "steam": {
+                "base_url": "https://store.steampowered.com",
                 "max_search_results": 50,
                 "max_output_results": 20,
                 "request_timeout": 10,
                 "search_delay": 0.5,
                 "max_price_default": 1000.0,
                 "language": "schinese",
-                "country_code": "CN"
+                "country_code": "CN",
+                "http_pool_size": 30,
+                "search_parser": "fast",
+                "search_page_size": 50,
+                "search_page_concurrency": 4,
+                "rate_limit": {
+                    "enabled": True,
+                    "search": {
+                        "burst": 5
+                    },
+                    "appdetails": {
+                        "requests": 200,
+                        "per_seconds": 300,
+                        "burst": 10
+                    }
+                },
+                "retry": {
+                    "max_attempts": 3,
+                    "base_delay_seconds": 0.5,
+                    "max_delay_seconds": 8
+                },
+                "circuit_breaker": {
+                    "failure_threshold": 5,
+                    "reset_timeout_seconds": 30
+                },
+                "game_details": {
+                    "default_fields": [
+                        "app_id", "name", "type", "short_description", "description",
+                        "developers", "publishers", "release_date", "price", "is_free",
+                        "supported_languages", "platforms", "categories", "genres",
+                        "screenshots", "metacritic_score", "recommendations",
+                        "pc_requirements"
+                    ],
+                    "max_bytes": 8192,
+                    "field_max_chars": {
+                        "description": 1500,
+                        "short_description": 500,
+                        "about_the_game": 1500,
+                        "supported_languages": 300,
+                        "legal_notice": 300,
+                        "pc_requirements": 600
+                    }
+                },
+                "search_mode": "live",
+                "local_catalog": {
+                    "enabled": True,
+                    "persist": True,
+                    "min_results": 10,
+                    "ttl_seconds": 21600
+                }
+            },
+            "cache": {
+                "appdetails": {
+                    "enabled": True,
+                    "max_entries": 2000,
+                    "static_ttl_seconds": 86400,
+                    "price_ttl_seconds": 900
+                },
+                "catalog_store": {
+                    "enabled": True,
+                    "path": "data/catalog.sqlite3",
+                    "ttl_seconds": 604800
+                },
+                "search": {
+                    "enabled": True,
+                    "max_entries": 256,
+                    "fresh_ttl_seconds": 600,
+                    "stale_ttl_seconds": 3600
+                },
+                "analysis": {
+                    "enabled": True,
+                    "max_entries": 1000,
+                    "ttl_seconds": 86400,
+                    "persist": False
+                }
+            },
+            "prewarm": {
+                "enabled": True,
+                "interval_seconds": 300,
+                "max_age_seconds": 1800,
+                "listing_size": 20,
+                "top_filter_types": ["topsellers", "popularnew", "trendingweek"]
             },
             "recommendation": {
                 "show_detail_prompt": True,
                 "save_json": True,
-                "output_file": "recommendations.json"
+                "output_file": "recommendations.json",
+                "scoring_mode": "per_game",
+                "batch_size": 5,
+                "prerank": {
+                    "enabled": True,
+                    "candidate_multiplier": 3,
+                    "min_candidates": 5
+                },
+                "tfidf": {
+                    "enabled": True,
+                    "ngram_min": 1,
+                    "ngram_max": 2,
+                    "weight": 20
+                },
+                "score_cache": {
+                    "enabled": True,
+                    "max_entries": 5000,
+                    "ttl_seconds": 86400,
+                    "persist": True
+                }
+            },
+            "mcp": {
+                "response": {
+                    "mode": "compact",
+                    "backend": "auto",
+                    "sort_keys": False
+                }
+            },
+            "tracing": {
+                "enabled": True,
+                "include_timings": False,
+                "max_spans": 5000,
+                "exporter": "none",
+                "export_path": "logs/traces.jsonl",
+                "otlp_endpoint": "http://localhost:4318/v1/traces",
+                "service_name": "steam-game-recommender"
             },
             "logging": {
                 "enabled": True,
@@ -0,0 +1,187 @@
+"""
+游戏详情裁剪模块
+对SteamCrawler._format_game_details的结果做字段投影、HTML转纯文本、按字段截断，
+并把序列化后的体积控制在字节预算内，避免get_game_details一次返回几十KB调用方用不到的内容
+"""
+import html
+import json
+import re
+from typing import Dict, Iterable, List, Optional
+
+from config_loader import config
+
+# _format_game_details返回的全部字段
+DETAIL_FIELDS = (
+    'app_id', 'name', 'type', 'description', 'short_description', 'about_the_game',
+    'developers', 'publishers', 'release_date', 'price', 'is_free', 'supported_languages',
+    'header_image', 'website', 'platforms', 'categories', 'genres', 'screenshots',
+    'metacritic_score', 'recommendations', 'achievements', 'dlc', 'pc_requirements', 'legal_notice',
+)
+
+# 总是返回的字段（调用方需要据此识别游戏）
+REQUIRED_FIELDS = ('app_id', 'name')
+
+# 内容为HTML的字段
+HTML_FIELDS = ('description', 'short_description', 'about_the_game', 'supported_languages', 'legal_notice')
+
+# 超出字节预算时按此顺序逐步缩短/移除（越靠前越不重要）
+SHRINK_ORDER = (
+    'legal_notice', 'about_the_game', 'dlc', 'screenshots', 'pc_requirements', 'description',
+    'supported_languages', 'website', 'categories', 'short_description',
+)
+
+# 字段截断的默认长度（字符），可在 steam.game_details.field_max_chars 中覆盖
+DEFAULT_FIELD_MAX_CHARS = {
+    'description': 1500,
+    'short_description': 500,
+    'about_the_game': 1500,
+    'supported_languages': 300,
+    'legal_notice': 300,
+    'pc_requirements': 600,
+}
+
+_BLOCK_TAG_PATTERN = re.compile(r'<\s*(?:br|/p|/li|/h\d|/div|/ul)\s*/?>', re.I)
+_LIST_ITEM_PATTERN = re.compile(r'<\s*li\b[^>]*>', re.I)
+_TAG_PATTERN = re.compile(r'<[^>]+>')
+_SPACES_PATTERN = re.compile(r'[ \t\r\f\v]+')
+_BLANK_LINES_PATTERN = re.compile(r'\s*\n\s*')
+
+
+def strip_html(text: str) -> str:
+    """HTML转纯文本：块级标签换行，列表项加前缀，去掉其余标签并反转义实体"""
+    if not text:
+        return ''
+    text = _BLOCK_TAG_PATTERN.sub('\n', text)
+    text = _LIST_ITEM_PATTERN.sub('\n- ', text)
+    text = html.unescape(_TAG_PATTERN.sub('', text))
+    text = _SPACES_PATTERN.sub(' ', text)
+    return _BLANK_LINES_PATTERN.sub('\n', text).strip()
+
+
+def truncate(text: str, max_chars: int) -> str:
+    """超过max_chars时截断并加省略号"""
+    if max_chars is None or len(text) <= max_chars:
+        return text
+    return text[:max(0, max_chars - 1)].rstrip() + '…'
+
+
+def encoded_size(payload) -> int:
+    """紧凑JSON（UTF-8）编码后的字节数"""
+    return len(json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+def normalize_fields(fields: Optional[Iterable[str]]) -> Optional[List[str]]:
+    """
+    校验并规范化字段列表（None或包含"all"表示全部字段）
+
+    Raises:
+        ValueError: 包含未知字段
+    """
+    if fields is None:
+        return None
+    if isinstance(fields, str):
+        fields = [f.strip() for f in fields.split(',') if f.strip()]
+    fields = list(fields)
+    if 'all' in fields:
+        return None
+    unknown = [field for field in fields if field not in DETAIL_FIELDS]
+    if unknown:
+        raise ValueError(f"未知字段: {', '.join(unknown)}；可选字段: {', '.join(DETAIL_FIELDS)}")
+    return [field for field in DETAIL_FIELDS if field in fields or field in REQUIRED_FIELDS]
+
+
+def _compact_requirements(requirements, max_chars: int):
+    """系统要求（{'minimum': html, 'recommended': html}）转纯文本并截断"""
+    if not isinstance(requirements, dict):
+        return {}
+    return {level: truncate(strip_html(text), max_chars) for level, text in requirements.items() if text}
+
+
+def project_details(details: Dict, fields: Optional[Iterable[str]] = None,
+                    max_bytes: Optional[int] = None, strip: Optional[bool] = None) -> Dict:
+    """
+    裁剪游戏详情
+
+    Args:
+        details: _format_game_details的结果
+        fields: 需要的字段（None表示全部）
+        max_bytes: 紧凑JSON编码后的字节预算（None使用配置，0表示不限）
+        strip: 是否把HTML字段转换为纯文本并按字段截断（None表示全部字段且不限字节时不处理，否则处理）
+
+    Returns:
+        裁剪后的详情；因预算被截断或移除的字段列在truncated_fields中
+    """
+    fields = normalize_fields(fields)
+    if max_bytes is None:
+        max_bytes = config.get('steam.game_details.max_bytes', 8192)
+    if strip is None:
+        strip = fields is not None or bool(max_bytes)
+    if not strip and fields is None and not max_bytes:
+        # 全部字段且不限字节：与未投影的完整详情一致
+        return dict(details)
+    max_chars = dict(DEFAULT_FIELD_MAX_CHARS)
+    max_chars.update(config.get('steam.game_details.field_max_chars', {}) or {})
+
+    result = {}
+    for field in fields or DETAIL_FIELDS:
+        if field not in details:
+            continue
+        value = details[field]
+        if strip:
+            if field in HTML_FIELDS:
+                value = truncate(strip_html(value), max_chars.get(field))
+            elif field == 'pc_requirements':
+                value = _compact_requirements(value, max_chars.get(field))
+        result[field] = value
+
+    if max_bytes:
+        truncated = _fit_budget(result, max_bytes)
+        if truncated:
+            result['truncated_fields'] = truncated
+    return result
+
+
+def _shrink_field(result: Dict, field: str):
+    """把字段减半（字符串、列表、字典中的长文本），无法再缩短时移除"""
+    value = result[field]
+    if isinstance(value, str) and len(value) > 80:
+        result[field] = truncate(value, len(value) // 2)
+    elif isinstance(value, list) and len(value) > 1:
+        result[field] = value[:len(value) // 2]
+    elif isinstance(value, dict) and value:
+        result[field] = {key: truncate(text, len(text) // 2) if isinstance(text, str) and len(text) > 80
+                         else text for key, text in value.items()}
+        if encoded_size(result[field]) >= encoded_size(value):
+            del result[field]
+    else:
+        del result[field]
+
+
+def _fit_budget(result: Dict, max_bytes: int) -> List[str]:
+    """
+    按SHRINK_ORDER逐步把字段减半，仍超出时移除，直到满足字节预算（计入truncated_fields本身）；
+    SHRINK_ORDER中的字段处理完仍超出时，每次缩短其余非必需字段中最大的一个。
+    app_id和name总是保留，预算小于这两个字段本身时无法满足。
+    """
+    truncated: List[str] = []
+
+    def size() -> int:
+        return encoded_size(dict(result, truncated_fields=truncated) if truncated else result)
+
+    def shrink(field: str):
+        if field not in truncated:
+            truncated.append(field)
+        _shrink_field(result, field)
+
+    for field in SHRINK_ORDER:
+        while field in result and size() > max_bytes:
+            shrink(field)
+        if size() <= max_bytes:
+            return truncated
+
+    while size() > max_bytes:
+        others = [field for field in result if field not in REQUIRED_FIELDS]
+        if not others:
+            break
+        shrink(max(others, key=lambda field: encoded_size(result[field])))
+    return truncated
@@ -0,0 +1,115 @@
+"""
+HTTP连接池模块
+为Steam爬虫提供进程级共享、线程安全、长连接复用的HTTP会话
+"""
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.request import ACCEPT_ENCODING
+
+from config_loader import config
+from logger import logger
+
+
+class PoolStats:
+    """连接池统计（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_new_connection(self):
+        with self._lock:
+            self.new_connections += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            reused = max(0, self.requests - self.new_connections)
+            return {
+                'requests': self.requests,
+                'new_connections': self.new_connections,
+                'reused_connections': reused,
+                'reuse_ratio': round(reused / self.requests, 3) if self.requests else 0.0,
+            }
+
+
+class _CountingAdapter(HTTPAdapter):
+    """记录新建连接次数的HTTPAdapter"""
+
+    def __init__(self, stats: PoolStats, **kwargs):
+        self._stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        stats = self._stats
+
+        class CountingHTTPConnectionPool(HTTPConnectionPool):
+            def _new_conn(self):
+                stats.record_new_connection()
+                return super()._new_conn()
+
+        class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+            def _new_conn(self):
+                stats.record_new_connection()
+                return super()._new_conn()
+
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': CountingHTTPConnectionPool,
+            'https': CountingHTTPSConnectionPool,
+        }
+
+
+class PooledHTTPClient:
+    """带连接池的HTTP客户端，整个进程共享一个实例"""
+
+    def __init__(self, pool_size: Optional[int] = None):
+        if pool_size is None:
+            pool_size = config.get('steam.http_pool_size', 30)
+        self.pool_size = pool_size
+        self.stats = PoolStats()
+
+        self.session = requests.Session()
+        # ACCEPT_ENCODING 会根据已安装的解码库自动包含 br / zstd
+        self.session.headers.update({
+            'Accept-Encoding': ACCEPT_ENCODING,
+            'Connection': 'keep-alive',
+        })
+
+        adapter = _CountingAdapter(
+            self.stats,
+            pool_connections=4,
+            pool_maxsize=pool_size,
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        logger.info(f"HTTP连接池初始化完成 (连接池大小={pool_size}, 压缩={ACCEPT_ENCODING})")
+
+    def get(self, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None,
+            timeout: Optional[float] = None) -> requests.Response:
+        """发送GET请求（复用连接池中的长连接）"""
+        self.stats.record_request()
+        return self.session.get(url, params=params, headers=headers, timeout=timeout)
+
+    def get_stats(self) -> Dict:
+        """获取连接池统计信息"""
+        stats = self.stats.snapshot()
+        stats['pool_size'] = self.pool_size
+        return stats
+
+    def close(self):
+        """关闭会话，释放所有连接"""
+        self.session.close()
+
+
+# 全局HTTP客户端实例
+http_client = PooledHTTPClient()
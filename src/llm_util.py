@@ -1,8 +1,13 @@
+import atexit
 import os
 import json
+import threading
+import time
 from dotenv import load_dotenv
 from openai import OpenAI
 
+import tracing
+
 load_dotenv()
 
 client = OpenAI(
@@ -12,15 +17,67 @@ client = OpenAI(
     timeout=300.0,  # 设置5分钟超时，避免LLM调用超时
     max_retries=2,  # 失败时重试2次
 )
+# 进程级共享的客户端，进程退出时关闭
+atexit.register(client.close)
+
+
+class LLMUsage:
+    """LLM调用统计（进程内累计：调用次数、失败次数、token用量、耗时）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.calls = 0
+            self.errors = 0
+            self.prompt_tokens = 0
+            self.completion_tokens = 0
+            self.seconds = 0.0
+
+    def record(self, seconds: float, usage=None, error: bool = False):
+        with self._lock:
+            self.calls += 1
+            self.errors += int(error)
+            self.seconds += seconds
+            if usage is not None:
+                self.prompt_tokens += usage.prompt_tokens or 0
+                self.completion_tokens += usage.completion_tokens or 0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'errors': self.errors,
+                'prompt_tokens': self.prompt_tokens,
+                'completion_tokens': self.completion_tokens,
+                'total_tokens': self.prompt_tokens + self.completion_tokens,
+                'seconds': round(self.seconds, 3),
+            }
+
+
+llm_usage = LLMUsage()
+
 
 def llm_gen(messages:list[dict], model:str):
-    completion = client.chat.completions.create(
-        model = model,
-        messages = messages,
-        # Qwen3模型通过enable_thinking参数控制思考过程（开源版默认True，商业版默认False）
-        # 使用Qwen3开源版模型时，若未启用流式输出，请将下行取消注释，否则会报错
-        extra_body = {"enable_thinking": False},
-    )
+    start = time.perf_counter()
+    with tracing.span('llm.chat', kind='client', model=model) as span:
+        try:
+            completion = client.chat.completions.create(
+                model = model,
+                messages = messages,
+                # Qwen3模型通过enable_thinking参数控制思考过程（开源版默认True，商业版默认False）
+                # 使用Qwen3开源版模型时，若未启用流式输出，请将下行取消注释，否则会报错
+                extra_body = {"enable_thinking": False},
+            )
+        except Exception:
+            llm_usage.record(time.perf_counter() - start, error=True)
+            raise
+        llm_usage.record(time.perf_counter() - start, completion.usage)
+        if completion.usage is not None:
+            span.set_attribute('prompt_tokens', completion.usage.prompt_tokens)
+            span.set_attribute('completion_tokens', completion.usage.completion_tokens)
     result_json = completion.model_dump_json()
     # print(result_json)
     return result_json
@@ -28,4 +85,3 @@ def llm_gen(messages:list[dict], model:str):
 
 if __name__ == "__main__":
    llm_gen()
-
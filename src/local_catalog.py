@@ -0,0 +1,303 @@
+"""
+本地游戏目录模块
+收录SteamCrawler丰富过详情的游戏，在内存中建立倒排索引（名称分词、类型/类别、开发商、价格区间），
+常见的“类型 + 价格上限”查询可以直接在本地毫秒级完成，无需请求Steam搜索
+"""
+import json
+import re
+import sys
+import threading
+import time
+import unicodedata
+from bisect import bisect_right
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from config_loader import config
+from logger import logger
+from catalog_store import catalog_store
+from models import GameRecord
+
+# 价格区间上界（人民币），第i个区间为 (PRICE_BUCKETS[i-1], PRICE_BUCKETS[i]]，最后一个区间不设上界
+PRICE_BUCKETS = (0, 10, 30, 50, 100, 200, 500)
+
+# 搜索词经常使用英文类型名（见RequirementAnalyzer.generate_search_query），
+# 而中文商店返回的类型为中文，这里做一次映射
+GENRE_ALIASES = {
+    'action': '动作',
+    'adventure': '冒险',
+    'rpg': '角色扮演',
+    'role-playing': '角色扮演',
+    'strategy': '策略',
+    'simulation': '模拟',
+    'casual': '休闲',
+    'indie': '独立',
+    'sports': '体育',
+    'racing': '竞速',
+    'massively multiplayer': '大型多人在线',
+    'mmo': '大型多人在线',
+    'free to play': '免费开玩',
+    'early access': '抢先体验',
+    'multiplayer': '多人',
+    'single-player': '单人',
+    'co-op': '合作',
+}
+
+# 不参与检索的通用搜索词（generate_search_query在没有关键词时返回"games"）
+_STOP_WORDS = {'game', 'games', '游戏'}
+
+_ASCII_WORD_PATTERN = re.compile(r'[0-9a-z]+')
+_CJK_RUN_PATTERN = re.compile(r'[㐀-鿿豈-﫿]+')
+# 英文类型名按整词匹配（"action"不匹配"transaction"）
+_GENRE_ALIAS_PATTERNS = {
+    alias: re.compile(r'(?<![0-9a-z])' + re.escape(alias) + r'(?![0-9a-z])') for alias in GENRE_ALIASES
+}
+
+
+def split_words(text: str) -> Tuple[List[str], List[str]]:
+    """NFKC规范化并转小写后切分为 (英文/数字单词, 中日韩文字连续片段)，本地目录与TF-IDF排序共用"""
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    return _ASCII_WORD_PATTERN.findall(text), _CJK_RUN_PATTERN.findall(text)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    分词：ASCII部分按单词切分，中日韩文字按二元组切分（单字时保留单字）
+
+    例如 "艾尔登法环 Elden Ring" -> ['elden', 'ring', '艾尔', '尔登', '登法', '法环']
+    """
+    tokens, runs = split_words(text)
+    for run in runs:
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def price_bucket(price: float) -> int:
+    """价格所在区间的序号"""
+    return bisect_right(PRICE_BUCKETS, price - 1e-9) if price > 0 else 0
+
+
+class LocalCatalog:
+    """本地游戏目录
+
+    记录为SteamCrawler.search_games返回的GameRecord（已丰富详情），以app_id为键。
+    写入内存的同时写入CatalogStore（kind='catalog_game'），进程重启后首次查询时重新加载并建索引。
+    收录超过ttl秒（steam.local_catalog.ttl_seconds）的记录价格/折扣可能已过时，查询时不再返回并移出索引。
+    """
+
+    KIND = 'catalog_game'
+
+    def __init__(self, language: Optional[str] = None, country_code: Optional[str] = None,
+                 store=None, persist: Optional[bool] = None, ttl: Optional[float] = None):
+        self.language = language or config.get('steam.language', 'schinese')
+        self.country_code = country_code or config.get('steam.country_code', 'CN')
+        if persist is None:
+            persist = config.get('steam.local_catalog.persist', True)
+        self.store = (store or catalog_store) if persist else None
+        self.enabled = config.get('steam.local_catalog.enabled', True)
+        if ttl is None:
+            ttl = config.get('steam.local_catalog.ttl_seconds', 21600)
+        self.ttl = ttl
+
+        self._lock = threading.RLock()
+        self._loaded = self.store is None
+        self._records: Dict[str, GameRecord] = {}
+        self._order: Dict[str, int] = {}
+        self._name_index: Dict[str, Set[str]] = defaultdict(set)
+        self._tag_index: Dict[str, Set[str]] = defaultdict(set)
+        self._developer_index: Dict[str, Set[str]] = defaultdict(set)
+        self._price_index: Dict[int, Set[str]] = defaultdict(set)
+        self.queries = 0
+        self.ingested = 0
+        self.expired = 0
+
+    def _key_prefix(self) -> str:
+        return f":{self.language}:{self.country_code}"
+
+    def _ensure_loaded(self):
+        """首次使用时从持久化存储加载记录"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            start = time.perf_counter()
+            suffix = self._key_prefix()
+            count = 0
+            now = time.time()
+            for key, record, _ in self.store.scan(self.KIND):
+                if key.endswith(suffix) and not self._is_expired(record, now):
+                    self._index(GameRecord.from_dict(record))
+                    count += 1
+            self._loaded = True
+            logger.info(f"本地游戏目录已加载: {count}款游戏, 耗时{(time.perf_counter() - start) * 1000:.1f}ms")
+
+    def _postings(self, record: GameRecord):
+        """产出记录在各倒排索引中的 (索引, 词项)"""
+        for token in tokenize(record.get('name', '')):
+            yield self._name_index, token
+        for tag in record.get('tags', []):
+            for term in {tag.lower(), *tokenize(tag)}:
+                yield self._tag_index, term
+        for developer in record.get('developers', []):
+            for term in {developer.lower(), *tokenize(developer)}:
+                yield self._developer_index, term
+        yield self._price_index, price_bucket(record.get('price', 0.0))
+
+    def _is_expired(self, record, now: float) -> bool:
+        return bool(self.ttl) and now - record.get('catalog_indexed_at', 0) > self.ttl
+
+    def _unindex(self, app_id: str):
+        """把一条记录从各倒排索引中移除"""
+        old = self._records.pop(app_id, None)
+        if old is None:
+            return
+        for index, term in self._postings(old):
+            postings = index.get(term)
+            if postings is not None:
+                postings.discard(app_id)
+                if not postings:
+                    del index[term]
+
+    def _index(self, record: GameRecord):
+        """把一条记录写入各倒排索引（已存在时先移除旧索引）"""
+        app_id = str(record['app_id'])
+        self._unindex(app_id)
+        self._records[app_id] = record
+        self._order.setdefault(app_id, len(self._order))
+        for index, term in self._postings(record):
+            index[term].add(app_id)
+
+    def ingest(self, games: Iterable[GameRecord]) -> int:
+        """
+        收录已丰富详情的游戏（enrichment_status为ok），返回收录数量
+        """
+        if not self.enabled:
+            return 0
+        self._ensure_loaded()
+        count = 0
+        now = time.time()
+        for game in games:
+            if game.get('enrichment_status') != 'ok' or not game.get('app_id'):
+                continue
+            record = GameRecord.from_dict(game)
+            # 排名只对所在榜单有意义，不写入目录
+            record.pop('rank', None)
+            record['catalog_indexed_at'] = now
+            with self._lock:
+                self._index(record)
+            if self.store is not None:
+                self.store.put(self.KIND, f"{record['app_id']}{self._key_prefix()}", record.to_dict())
+            count += 1
+        with self._lock:
+            self.ingested += count
+        return count
+
+    def _expand_terms(self, keywords: str) -> List[str]:
+        """把搜索词拆成检索词，英文类型名追加对应的中文类型"""
+        text = unicodedata.normalize('NFKC', keywords or '').lower()
+        terms = []
+        for alias, genre in GENRE_ALIASES.items():
+            if _GENRE_ALIAS_PATTERNS[alias].search(text):
+                terms.append(genre)
+                terms.extend(tokenize(genre))
+        terms.extend(token for token in tokenize(text) if token not in _STOP_WORDS)
+        return list(dict.fromkeys(terms))
+
+    def search(self, keywords: str, max_price: Optional[float] = None, tags: Optional[List[str]] = None,
+               max_results: int = 30) -> List[GameRecord]:
+        """
+        本地搜索（参数同SteamCrawler.search_games）
+
+        - 关键词：名称命中权重3，类型/类别命中权重2，开发商命中权重1，按得分排序，
+          同分时按收录顺序；没有有效关键词时返回全部记录
+        - max_price：先按价格区间取候选，再精确过滤
+        - tags：每个标签都必须命中类型/类别索引
+        """
+        if not self.enabled:
+            return []
+        self._ensure_loaded()
+        with self._lock:
+            self.queries += 1
+            candidates: Optional[Set[str]] = None
+
+            if max_price is not None and max_price > 0:
+                candidates = set()
+                for bucket in range(price_bucket(max_price) + 1):
+                    candidates |= self._price_index.get(bucket, set())
+
+            for tag in tags or []:
+                matched = set(self._tag_index.get(tag.lower(), set()))
+                for token in tokenize(tag):
+                    matched |= self._tag_index.get(token, set())
+                candidates = matched if candidates is None else candidates & matched
+
+            scores: Dict[str, float] = defaultdict(float)
+            terms = self._expand_terms(keywords)
+            for term in terms:
+                for weight, index in ((3.0, self._name_index), (2.0, self._tag_index), (1.0, self._developer_index)):
+                    for app_id in index.get(term, ()):
+                        scores[app_id] += weight
+
+            if terms:
+                hits = set(scores) if candidates is None else set(scores) & candidates
+            else:
+                hits = set(self._records) if candidates is None else candidates
+
+            # 过期记录（价格/折扣可能已变化）不再返回，并移出索引
+            now = time.time()
+            expired = [app_id for app_id in hits if self._is_expired(self._records[app_id], now)]
+            for app_id in expired:
+                self._unindex(app_id)
+            self.expired += len(expired)
+            hits.difference_update(expired)
+
+            if max_price is not None and max_price > 0:
+                hits = {app_id for app_id in hits if self._records[app_id].get('price', 0.0) <= max_price}
+
+            ranked = sorted(hits, key=lambda app_id: (-scores.get(app_id, 0.0), self._order[app_id]))
+            return [self._records[app_id].copy() for app_id in ranked[:max_results]]
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._records)
+
+    def get_stats(self) -> Dict:
+        """获取目录规模与查询统计"""
+        self._ensure_loaded()
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'games': len(self._records),
+                'name_terms': len(self._name_index),
+                'tag_terms': len(self._tag_index),
+                'developer_terms': len(self._developer_index),
+                'price_buckets': {bucket: len(ids) for bucket, ids in sorted(self._price_index.items())},
+                'queries': self.queries,
+                'ingested': self.ingested,
+                'expired': self.expired,
+                'ttl_seconds': self.ttl,
+            }
+
+
+# 全局本地目录实例（同步/异步爬虫共享）
+local_catalog = LocalCatalog()
+
+
+if __name__ == "__main__":
+    # 用法: python src/local_catalog.py [stats | search <关键词> [最高价格]]
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    if command == 'search':
+        keywords = sys.argv[2] if len(sys.argv) > 2 else ''
+        max_price = float(sys.argv[3]) if len(sys.argv) > 3 else None
+        start = time.perf_counter()
+        results = local_catalog.search(keywords, max_price=max_price, max_results=10)
+        elapsed = (time.perf_counter() - start) * 1000
+        for game in results:
+            print(f"  {game['name']} - ¥{game['price']} ({', '.join(game.get('tags', [])[:4])})")
+        print(f"找到 {len(results)} 款游戏，耗时 {elapsed:.2f}ms")
+    else:
+        print(json.dumps(local_catalog.get_stats(), ensure_ascii=False, indent=2))
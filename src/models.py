@@ -0,0 +1,247 @@
+"""
+数据模型模块
+游戏记录与推荐结果使用 __slots__ 对象代替松散的字典：
+- 支持 record['name'] / record.get('name') 等字典式访问，现有代码无需改写
+- 标签、开发商等重复出现的短字符串做驻留（sys.intern），多条记录共享同一对象
+- 体积较大的文本字段（如supported_languages的HTML）超过阈值时以zlib压缩保存，读取时才解压
+- 只在序列化边界（MCP响应、JSON文件、持久化存储）通过 to_dict() 转换为字典
+"""
+import copy
+import sys
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# 超过该长度（字符）的大文本字段压缩保存
+HEAVY_TEXT_THRESHOLD = 256
+
+_MISSING = object()
+
+
+class _CompressedText(bytes):
+    """压缩保存的文本（与普通bytes区分，避免误解压）"""
+    __slots__ = ()
+
+
+def _pack_text(value: str) -> Any:
+    if isinstance(value, str) and len(value) > HEAVY_TEXT_THRESHOLD:
+        return _CompressedText(zlib.compress(value.encode('utf-8')))
+    return value
+
+
+def _unpack_text(value: Any) -> Any:
+    if isinstance(value, _CompressedText):
+        return zlib.decompress(value).decode('utf-8')
+    return value
+
+
+def _intern(value: Any) -> Any:
+    """驻留字符串或字符串列表中的每个元素"""
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, list):
+        return [sys.intern(item) if isinstance(item, str) else item for item in value]
+    return value
+
+
+class SlottedRecord:
+    """字典兼容的 __slots__ 记录基类
+
+    子类通过FIELDS声明字段（也决定to_dict的键顺序），未赋值的字段视为不存在；
+    FIELDS之外的键保存在_extra字典中，保证与原先字典用法完全兼容。
+    """
+
+    __slots__ = ('_extra',)
+
+    FIELDS: Tuple[str, ...] = ()
+    _FIELD_SET = frozenset()
+    HEAVY_FIELDS = frozenset()
+    INTERNED_FIELDS = frozenset()
+
+    def __init__(self, data: Optional[Dict] = None, **kwargs):
+        self._extra = None
+        if data:
+            self.update(data)
+        if kwargs:
+            self.update(kwargs)
+
+    @classmethod
+    def from_dict(cls, data: Any) -> 'SlottedRecord':
+        """从字典（或同类记录）构建记录"""
+        if isinstance(data, cls):
+            return data.copy()
+        return cls(data)
+
+    # ---------- 字典式访问 ----------
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._FIELD_SET:
+            value = getattr(self, key, _MISSING)
+            if value is _MISSING:
+                raise KeyError(key)
+            return _unpack_text(value) if key in self.HEAVY_FIELDS else value
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key in self._FIELD_SET:
+            if key in self.INTERNED_FIELDS:
+                value = _intern(value)
+            elif key in self.HEAVY_FIELDS:
+                value = _pack_text(value)
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key: str):
+        if key in self._FIELD_SET:
+            if getattr(self, key, _MISSING) is _MISSING:
+                raise KeyError(key)
+            delattr(self, key)
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key: str) -> bool:
+        if key in self._FIELD_SET:
+            return getattr(self, key, _MISSING) is not _MISSING
+        return self._extra is not None and key in self._extra
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def pop(self, key: str, default: Any = _MISSING) -> Any:
+        try:
+            value = self[key]
+        except KeyError:
+            if default is _MISSING:
+                raise
+            return default
+        del self[key]
+        return value
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, other: Any = None, **kwargs):
+        if other:
+            for key, value in (other.items() if hasattr(other, 'items') else other):
+                self[key] = value
+        for key, value in kwargs.items():
+            self[key] = value
+
+    def keys(self) -> List[str]:
+        keys = [name for name in self.FIELDS if getattr(self, name, _MISSING) is not _MISSING]
+        if self._extra:
+            keys.extend(self._extra)
+        return keys
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        return ((key, self[key]) for key in self.keys())
+
+    def values(self) -> Iterator[Any]:
+        return (self[key] for key in self.keys())
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (SlottedRecord, dict)):
+            return self.to_dict() == dict(other.items())
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    # ---------- 复制与序列化 ----------
+
+    def copy(self) -> 'SlottedRecord':
+        """浅复制（列表字段复制一层，修改标签等不影响原记录）"""
+        clone = type(self).__new__(type(self))
+        clone._extra = dict(self._extra) if self._extra else None
+        for name in self.FIELDS:
+            value = getattr(self, name, _MISSING)
+            if value is not _MISSING:
+                setattr(clone, name, list(value) if isinstance(value, list) else value)
+        return clone
+
+    def __copy__(self) -> 'SlottedRecord':
+        return self.copy()
+
+    def __deepcopy__(self, memo: Dict) -> 'SlottedRecord':
+        clone = type(self).__new__(type(self))
+        clone._extra = copy.deepcopy(self._extra, memo) if self._extra else None
+        for name in self.FIELDS:
+            value = getattr(self, name, _MISSING)
+            if value is not _MISSING:
+                # 字符串/数值/压缩文本不可变，直接共享
+                if isinstance(value, (list, dict)):
+                    value = copy.deepcopy(value, memo)
+                setattr(clone, name, value)
+        return clone
+
+    def __getstate__(self) -> Dict:
+        return self.to_dict()
+
+    def __setstate__(self, state: Dict):
+        self._extra = None
+        self.update(state)
+
+    def to_dict(self) -> Dict:
+        """转换为普通字典（序列化边界使用）"""
+        return {key: self[key] for key in self.keys()}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._FIELD_SET = frozenset(cls.FIELDS)
+
+
+class GameRecord(SlottedRecord):
+    """游戏记录（搜索结果行，丰富详情后的游戏）"""
+
+    FIELDS = (
+        'app_id', 'name', 'price', 'discount', 'url', 'release_date', 'tags', 'description', 'reviews',
+        'rank', 'metacritic_score', 'developers', 'publishers', 'supported_languages',
+        'enrichment_status', 'enrichment_error', 'tfidf_score', 'prerank_score',
+    )
+    __slots__ = FIELDS
+    HEAVY_FIELDS = frozenset({'supported_languages', 'description'})
+    INTERNED_FIELDS = frozenset({'release_date', 'tags', 'developers', 'publishers', 'enrichment_status'})
+
+
+class Recommendation(SlottedRecord):
+    """推荐结果"""
+
+    FIELDS = (
+        'name', 'app_id', 'price', 'original_price', 'discount', 'tags', 'url', 'release_date',
+        'description', 'enrichment_status', 'tfidf_score', 'prerank_score', 'llm_score',
+        'recommendation_reason', 'recommendation_score', 'highlights',
+    )
+    __slots__ = FIELDS
+    HEAVY_FIELDS = frozenset()
+    INTERNED_FIELDS = frozenset({'release_date', 'tags', 'enrichment_status'})
+
+
+def json_default(value: Any) -> Any:
+    """
+    json.dumps的default参数：序列化遇到记录对象时转换为字典
+
+    按to_dict方法判断而不是isinstance，mcp_server以src.models导入时同样适用
+    """
+    to_dict = getattr(value, 'to_dict', None)
+    if callable(to_dict):
+        return to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
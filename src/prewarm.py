@@ -0,0 +1,229 @@
+"""
+热门榜单预热模块
+在MCP服务器进程内后台刷新热门榜（全部类型）、折扣页和免费游戏页，
+游戏详情随之写入共享缓存；对应的MCP工具优先从内存快照返回，不再逐次请求Steam。
+各榜单的刷新均匀分布在刷新间隔内，并在用户请求占用appdetails限流配额时让行。
+"""
+import asyncio
+import copy
+import functools
+import time
+from typing import Dict, List, Optional, Tuple
+
+from config_loader import config
+from logger import logger
+from rate_limiter import steam_rate_limiter
+
+# 热门榜的全部类型（与SteamCrawler.get_top_games的filter_type一致）
+TOP_FILTER_TYPES = ('topsellers', 'popularnew', 'trendingweek')
+
+
+class ListingSnapshot:
+    """一次榜单刷新的结果"""
+
+    __slots__ = ('games', 'fetched_at', 'duration')
+
+    def __init__(self, games: List[Dict], duration: float):
+        self.games = games
+        self.fetched_at = time.time()
+        self.duration = duration
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class ListingPrewarmer:
+    """榜单预热调度器
+
+    以 ('top', filter_type) / ('discounted',) / ('free',) 为键保存快照。快照中的游戏数量固定为
+    listing_size，请求的数量不超过快照且快照未过期（max_age_seconds）时直接从快照筛选返回，
+    否则返回None，由调用方照常请求Steam。
+    """
+
+    def __init__(self, crawler, interval: Optional[float] = None, listing_size: Optional[int] = None,
+                 max_age: Optional[float] = None):
+        if interval is None:
+            interval = config.get('prewarm.interval_seconds', 300)
+        if listing_size is None:
+            listing_size = config.get('prewarm.listing_size', 20)
+        if max_age is None:
+            max_age = config.get('prewarm.max_age_seconds', 1800)
+        self.crawler = crawler
+        self.enabled = config.get('prewarm.enabled', True)
+        self.interval = interval
+        self.listing_size = listing_size
+        self.max_age = max_age
+        self.top_filter_types = config.get('prewarm.top_filter_types', list(TOP_FILTER_TYPES))
+
+        self._snapshots: Dict[Tuple, ListingSnapshot] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.hits = 0
+        self.misses = 0
+
+    # ---------- 后台刷新 ----------
+
+    def start(self) -> Optional[asyncio.Task]:
+        """在当前事件循环中启动后台刷新任务"""
+        if not self.enabled or self._task is not None:
+            return self._task
+        self._task = asyncio.create_task(self._run(), name='listing-prewarm')
+        logger.info(f"榜单预热已启动 (间隔={self.interval}s, 每个榜单{self.listing_size}款)")
+        return self._task
+
+    async def stop(self):
+        """停止后台刷新任务"""
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        logger.info("榜单预热已停止")
+
+    def _listings(self) -> List[Tuple[Tuple, object]]:
+        """所有需要预热的榜单: [(快照键, 加载函数)]"""
+        listings = [(('discounted',), self._load_discounted), (('free',), self._load_free)]
+        listings.extend((('top', filter_type), functools.partial(self._load_top, filter_type))
+                        for filter_type in self.top_filter_types)
+        return listings
+
+    async def _run(self):
+        """
+        各榜单的刷新均匀分布在刷新间隔内（每个榜单最多listing_size次appdetails请求），
+        不会在一次刷新中集中耗尽与用户请求共享的限流配额
+        """
+        while True:
+            listings = self._listings()
+            pause = self.interval / max(1, len(listings))
+            for key, loader in listings:
+                await self._yield_to_requests(pause)
+                await self._refresh(key, loader)
+                await asyncio.sleep(pause)
+
+    async def _yield_to_requests(self, max_wait: float):
+        """appdetails令牌桶未满（用户请求正在消耗配额）时等待其回满，最多等待max_wait秒"""
+        if not steam_rate_limiter.enabled:
+            return
+        bucket = steam_rate_limiter.buckets['appdetails']
+        deadline = time.monotonic() + max_wait
+        while bucket.available() < bucket.capacity and time.monotonic() < deadline:
+            await asyncio.sleep(min(1.0, max(0.0, deadline - time.monotonic())))
+
+    async def refresh_all(self):
+        """立即依次刷新所有榜单（串行执行，不等待用户请求让出配额）"""
+        start = time.perf_counter()
+        for key, loader in self._listings():
+            await self._refresh(key, loader)
+        logger.info(f"榜单预热完成: {len(self._snapshots)}个快照, 耗时{time.perf_counter() - start:.1f}s")
+
+    async def _refresh(self, key: Tuple, loader):
+        """刷新单个榜单，失败或结果为空时保留旧快照"""
+        start = time.perf_counter()
+        try:
+            games = await loader()
+        except Exception as e:
+            self.refresh_errors += 1
+            logger.error(f"榜单预热失败 {key}: {e}")
+            return
+        if not games:
+            self.refresh_errors += 1
+            logger.warning(f"榜单预热 {key} 未获取到游戏，保留旧快照")
+            return
+        self._snapshots[key] = ListingSnapshot(games, time.perf_counter() - start)
+        self.refreshes += 1
+
+    # 榜单绕过搜索结果缓存重新请求（refresh_listing），快照年龄即为数据的真实年龄；游戏详情仍读缓存
+
+    async def _load_top(self, filter_type: str) -> List[Dict]:
+        return await self.crawler.get_top_games(max_results=self.listing_size, filter_type=filter_type,
+                                                refresh_listing=True)
+
+    async def _load_free(self) -> List[Dict]:
+        return await self.crawler.get_free_games(max_results=self.listing_size, refresh_listing=True)
+
+    async def _load_discounted(self) -> List[Dict]:
+        games = await self.crawler.get_discounted_games(min_discount=0, max_results=self.listing_size,
+                                                        refresh_listing=True)
+        # 折扣页本身不获取详情，这里在副本上获取一次，只为写入共享的详情缓存
+        if games:
+            await self.crawler.enrich_games(copy.deepcopy(games), max_concurrency=10)
+        return games
+
+    # ---------- 从快照读取 ----------
+
+    def _fresh_snapshot(self, key: Tuple) -> Optional[ListingSnapshot]:
+        snapshot = self._snapshots.get(key) if self.enabled else None
+        if snapshot is None or snapshot.age > self.max_age:
+            return None
+        return snapshot
+
+    def _serve(self, key: Tuple, games: Optional[List[Dict]], max_results: int,
+               snapshot: Optional[ListingSnapshot]) -> Optional[Tuple[List[Dict], float]]:
+        """快照中满足条件的游戏足够时返回 (游戏副本, 快照年龄秒数)，否则记一次未命中"""
+        if snapshot is None or games is None or len(games) < max_results:
+            self.misses += 1
+            return None
+        self.hits += 1
+        logger.info(f"从预热快照返回 {key} (快照年龄={snapshot.age:.0f}s)")
+        return copy.deepcopy(games[:max_results]), snapshot.age
+
+    def get_top_games(self, max_results: int, filter_type: str) -> Optional[Tuple[List[Dict], float]]:
+        """从快照获取热门榜（排名与快照一致）"""
+        snapshot = self._fresh_snapshot(('top', filter_type))
+        games = snapshot.games if snapshot else None
+        return self._serve(('top', filter_type), games, max_results, snapshot)
+
+    def get_free_games(self, max_results: int,
+                       tags: Optional[List[str]] = None) -> Optional[Tuple[List[Dict], float]]:
+        """
+        从快照获取免费游戏
+
+        指定标签时不使用快照：实时路径按搜索结果行的标签在获取详情之前过滤，
+        而快照中的标签已被详情（类型/分类）覆盖，两者过滤结果不一致。
+        """
+        snapshot = self._fresh_snapshot(('free',))
+        games = snapshot.games if snapshot and not tags else None
+        return self._serve(('free',), games, max_results, snapshot)
+
+    def get_discounted_games(self, min_discount: int, max_price: Optional[float],
+                             max_results: int) -> Optional[Tuple[List[Dict], float]]:
+        """
+        从快照获取折扣游戏（快照已按折扣力度排序）
+
+        与实时路径的候选集不同：快照是特惠页前listing_size款（不限折扣和价格）按条件筛选，
+        实时路径则由Steam按maxprice过滤后取前max_results×3行中满足条件的前max_results款。
+        条件较严时两者返回的游戏可能不同；响应中的snapshot_age_seconds不为null即表示来自快照。
+        """
+        snapshot = self._fresh_snapshot(('discounted',))
+        games = None
+        if snapshot:
+            games = [
+                game for game in snapshot.games
+                if game.get('discount', 0) >= min_discount
+                and (max_price is None or game.get('price', float('inf')) <= max_price)
+            ]
+        return self._serve(('discounted',), games, max_results, snapshot)
+
+    def get_stats(self) -> Dict:
+        """获取预热统计与各快照的年龄"""
+        return {
+            'enabled': self.enabled,
+            'running': self._task is not None and not self._task.done(),
+            'refreshes': self.refreshes,
+            'refresh_errors': self.refresh_errors,
+            'hits': self.hits,
+            'misses': self.misses,
+            'snapshots': {
+                ':'.join(key): {
+                    'games': len(snapshot.games),
+                    'age_seconds': round(snapshot.age, 1),
+                    'refresh_seconds': round(snapshot.duration, 2),
+                }
+                for key, snapshot in self._snapshots.items()
+            },
+        }
@@ -0,0 +1,131 @@
+"""
+限流模块
+进程级、按Steam接口区分的令牌桶限流器，所有爬虫实例（同步线程与异步协程）共享同一份预算
+"""
+import asyncio
+import threading
+import time
+from typing import Dict, Optional
+
+from config_loader import config
+from logger import logger
+
+
+class TokenBucket:
+    """基于预约的令牌桶（线程安全）
+
+    每次请求立即预约一个令牌：令牌不足时余额记为负数，调用方按“欠下的令牌数 / 速率”
+    计算需要等待的时间后再发送请求。请求因此按到达顺序排队，而不是失败。
+    """
+
+    def __init__(self, rate: float, capacity: float, name: str = 'bucket'):
+        self.rate = rate
+        self.capacity = capacity
+        self.name = name
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.waited_requests = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """预约令牌，返回发送请求前需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+            self.requests += 1
+            if wait > 0:
+                self.waited_requests += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            return wait
+
+    def available(self) -> float:
+        """当前可用的令牌数（负数表示已有请求在排队）"""
+        with self._lock:
+            return min(self.capacity, self._tokens + (time.monotonic() - self._updated_at) * self.rate)
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """阻塞直到获得令牌，返回实际等待的秒数"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: float = 1.0) -> float:
+        """协程版acquire，等待期间不阻塞事件循环"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def get_stats(self) -> Dict:
+        """获取请求数与排队等待统计"""
+        with self._lock:
+            return {
+                'name': self.name,
+                'rate_per_second': round(self.rate, 3),
+                'capacity': self.capacity,
+                'requests': self.requests,
+                'waited_requests': self.waited_requests,
+                'total_wait_seconds': round(self.total_wait, 3),
+                'avg_wait_seconds': round(self.total_wait / self.requests, 3) if self.requests else 0.0,
+                'max_wait_seconds': round(self.max_wait, 3),
+            }
+
+
+class SteamRateLimiter:
+    """按接口区分的限流器
+
+    - search: /search/ 页面，速率为 1 / steam.search_delay
+    - appdetails: /api/appdetails，默认每300秒最多200次（突发容量 + 持续速率 × 窗口 不超过该上限）
+    """
+
+    def __init__(self, enabled: Optional[bool] = None):
+        if enabled is None:
+            enabled = config.get('steam.rate_limit.enabled', True)
+        self.enabled = enabled
+
+        search_delay = config.get('steam.search_delay', 0.5)
+        search_burst = config.get('steam.rate_limit.search.burst', 5)
+
+        window = config.get('steam.rate_limit.appdetails.per_seconds', 300)
+        limit = config.get('steam.rate_limit.appdetails.requests', 200)
+        app_burst = config.get('steam.rate_limit.appdetails.burst', 10)
+
+        self.buckets: Dict[str, TokenBucket] = {
+            'search': TokenBucket(1.0 / max(search_delay, 0.001), search_burst, name='search'),
+            'appdetails': TokenBucket(max(limit - app_burst, 1) / window, app_burst, name='appdetails'),
+        }
+        if self.enabled:
+            logger.info("Steam限流器初始化完成 ("
+                        + ", ".join(f"{b.name}={b.rate:.3f}/s 突发{b.capacity}" for b in self.buckets.values())
+                        + ")")
+
+    def acquire(self, endpoint: str) -> float:
+        """同步获取指定接口的令牌（必要时排队等待）"""
+        if not self.enabled:
+            return 0.0
+        return self.buckets[endpoint].acquire()
+
+    async def acquire_async(self, endpoint: str) -> float:
+        """异步获取指定接口的令牌（必要时排队等待）"""
+        if not self.enabled:
+            return 0.0
+        return await self.buckets[endpoint].acquire_async()
+
+    def get_stats(self) -> Dict:
+        """获取各接口的限流等待统计"""
+        stats = {name: bucket.get_stats() for name, bucket in self.buckets.items()}
+        stats['enabled'] = self.enabled
+        return stats
+
+
+# 全局限流器实例（同步/异步爬虫共享）
+steam_rate_limiter = SteamRateLimiter()
@@ -2,49 +2,155 @@
 Steam游戏推荐Agent核心模块
 整合需求分析、Steam爬虫和LLM，提供智能游戏推荐
 """
+import hashlib
 import json
-from typing import List, Dict, Optional
+import threading
+from typing import Callable, List, Dict, Optional
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from requirement_analyzer import RequirementAnalyzer
+from requirement_analyzer import RequirementAnalyzer, normalize_query
 from steam_crawler import SteamCrawler
 from llm_util import llm_gen
+from cache import PersistentTTLCache
+from catalog_store import catalog_store
+from single_flight import SingleFlight
+from models import Recommendation, json_default
+from tfidf_ranker import rank_games
 from config_loader import config
 from logger import logger
+import tracing
+
+
+class _SharedCancel:
+    """共享推荐流程的取消信号：所有等待的调用方都已取消时才视为取消"""
+
+    def __init__(self, agent: 'SteamRecommendationAgent', key: tuple):
+        self._agent = agent
+        self._key = key
+
+    def is_set(self) -> bool:
+        with self._agent._subscribers_lock:
+            subscribers = self._agent._subscribers.get(self._key, [])
+            return bool(subscribers) and all(event is not None and event.is_set() for _, event, _ in subscribers)
 
 
 class SteamRecommendationAgent:
     """Steam游戏推荐Agent"""
     
-    def __init__(self, model: str = None):
+    def __init__(self, model: str = None, analyzer: Optional[RequirementAnalyzer] = None,
+                 crawler: Optional[SteamCrawler] = None):
         if model is None:
             model = config.get('llm.model', 'qwen-plus')
         self.model = model
-        self.analyzer = RequirementAnalyzer(model=model)
-        self.crawler = SteamCrawler()
+        # 允许注入共享的分析器和爬虫（见services.SteamServices）
+        self.analyzer = analyzer if analyzer is not None else RequirementAnalyzer(model=model)
+        self.crawler = crawler if crawler is not None else SteamCrawler()
+        
+        # LLM评分缓存：相同的游戏 + 相同的用户意图不再重复调用LLM
+        self.score_cache = None
+        if config.get('recommendation.score_cache.enabled', True):
+            self.score_cache = PersistentTTLCache(
+                max_entries=config.get('recommendation.score_cache.max_entries', 5000),
+                ttl=config.get('recommendation.score_cache.ttl_seconds', 86400),
+                name='llm_score',
+                store=catalog_store if config.get('recommendation.score_cache.persist', True) else None,
+            )
+        
+        # 请求合并：相同（规范化后的）查询并发到达时只运行一次推荐流程
+        self.recommend_flight = SingleFlight('recommend')
+        # 合并键 -> 当前等待该结果的调用方 [(progress_callback, cancel_event, trace), ...]
+        self._subscribers: Dict[tuple, List[tuple]] = {}
+        self._subscribers_lock = threading.Lock()
         
         logger.info(f"推荐Agent初始化完成 (LLM模型={self.model})")
         
-    def recommend_games(self, user_query: str, max_output_results: int = None) -> Dict:
+    def recommend_games(self, user_query: str, max_output_results: int = None,
+                        progress_callback: Optional[Callable[[Dict], None]] = None,
+                        cancel_event: Optional[threading.Event] = None) -> Dict:
         """
         根据用户查询推荐游戏
         
         Args:
             user_query: 用户查询文本
             max_output_results: 最大输出结果数（None则使用配置文件的值）
+            progress_callback: 进度回调，在各阶段开始及每款游戏评分完成时调用，
+                参数为 {'stage', 'completed', 'total', 'top', 'message'}
+            cancel_event: 取消信号，被设置后停止提交新的评分任务并返回已完成的部分结果
             
         Returns:
-            包含推荐游戏列表的字典
+            包含推荐游戏列表的字典（提前取消时 cancelled=True）
+        
+        相同规范化查询的并发调用共享同一次推荐流程：进度会广播给所有调用方，
+        只有全部调用方都取消时流程才会取消，等待方的timings取自执行方的trace。
         """
         if max_output_results is None:
             max_output_results = config.get('steam.max_output_results', 20)
         
+        key = (normalize_query(user_query), max_output_results)
+        subscriber = (progress_callback, cancel_event, tracing.current_trace())
+        with self._subscribers_lock:
+            self._subscribers.setdefault(key, []).append(subscriber)
+        try:
+            result = self.recommend_flight.do(key, self._run_shared, key, user_query, max_output_results)
+        finally:
+            with self._subscribers_lock:
+                subscribers = self._subscribers.get(key, [])
+                subscribers.remove(subscriber)
+                if not subscribers:
+                    self._subscribers.pop(key, None)
+        
+        result['query'] = user_query
+        return result
+    
+    def _run_shared(self, key: tuple, user_query: str, max_output_results: int) -> Dict:
+        """由合并中的执行方运行推荐流程，结束时把本次trace关联给仍在等待的调用方"""
+        leader = tracing.current_trace()
+        if leader is not None:
+            leader.shared_from = None
+        try:
+            return self._recommend_games(
+                user_query, max_output_results,
+                lambda event: self._broadcast_progress(key, event), _SharedCancel(self, key)
+            )
+        finally:
+            if leader is not None:
+                with self._subscribers_lock:
+                    for _, _, trace in self._subscribers.get(key, []):
+                        if trace is not None and trace is not leader:
+                            trace.shared_from = leader
+    
+    def _broadcast_progress(self, key: tuple, event: Dict):
+        """把共享推荐流程的进度转发给所有等待中的调用方"""
+        with self._subscribers_lock:
+            callbacks = [callback for callback, _, _ in self._subscribers.get(key, []) if callback is not None]
+        for callback in callbacks:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.warning(f"进度回调出错 ({event['stage']}): {e}")
+    
+    def get_coalesce_stats(self) -> Dict:
+        """获取推荐流程合并统计"""
+        return self.recommend_flight.get_stats()
+    
+    def _recommend_games(self, user_query: str, max_output_results: int,
+                         progress_callback: Optional[Callable[[Dict], None]],
+                         cancel_event) -> Dict:
+        """推荐流程主体（参数同recommend_games，cancel_event只需提供is_set()）"""
+        def report(stage: str, message: str, completed: int = 0, total: int = 0, top: List[Dict] = None):
+            self._report_progress(progress_callback, stage, message, completed, total, top)
+        
+        def cancelled() -> bool:
+            return cancel_event is not None and cancel_event.is_set()
+        
         max_search_results = config.get('steam.max_search_results', 30)
         
         logger.log_recommendation_start(user_query)
         print(f"📝 分析用户需求: {user_query}")
         
         # 1. 分析用户需求
-        analysis = self.analyzer.analyze_user_query(user_query)
+        report('analyzing', '正在分析用户需求')
+        with tracing.span('stage.analyze'):
+            analysis = self.analyzer.analyze_user_query(user_query)
         logger.info(f"需求分析完成: 关键词={analysis['keywords']}, 价格={analysis['max_price']}")
         print(f"✓ 需求分析完成")
         print(f"  - 关键词: {', '.join(analysis['keywords'])}")
@@ -57,11 +163,16 @@ class SteamRecommendationAgent:
         print(f"\n🔍 搜索Steam: {search_query}")
         
         # 3. 搜索游戏
-        games = self.crawler.search_games(
-            keywords=search_query,
-            max_price=analysis['max_price'],
-            max_results=max_search_results
-        )
+        if cancelled():
+            return self._cancelled_result(user_query, analysis, [], [], [], max_output_results)
+        report('searching', f'正在搜索Steam: {search_query}')
+        with tracing.span('stage.search', query=search_query) as span:
+            games = self.crawler.search_games(
+                keywords=search_query,
+                max_price=analysis['max_price'],
+                max_results=max_search_results
+            )
+            span.set_attribute('games', len(games))
         
         print(f"✓ 找到 {len(games)} 款游戏")
         logger.info(f"搜索到 {len(games)} 款游戏")
@@ -75,55 +186,177 @@ class SteamRecommendationAgent:
                 'message': '抱歉，没有找到符合条件的游戏。'
             }
         
-        # 4. 使用多线程并行为每个游戏生成推荐理由和评分
-        print(f"\n💡 生成推荐理由（并行处理共{len(games)}款游戏）...")
-        logger.info(f"开始生成推荐理由，搜索到{len(games)}款游戏")
+        # 4. 详情获取失败的游戏重试一次；仍缺少详情的不送入LLM评分（没有简介和标签，评分没有意义）
+        with tracing.span('stage.retry_enrichment'):
+            self.crawler.retry_failed_enrichment(games)
+        enriched = [game for game in games if game.get('enrichment_status', 'ok') == 'ok']
+        enrichment_skipped = len(games) - len(enriched)
+        if enrichment_skipped:
+            logger.warning(f"{enrichment_skipped}款游戏缺少详细信息，不参与LLM评分")
+            print(f"⚠️  {enrichment_skipped} 款游戏详细信息获取失败，已跳过")
+        # 全部失败时退回仅用搜索结果排序
+        rankable = enriched or games
+        
+        # 5. 本地预排序：只把最有希望的K款游戏送入LLM评分
+        with tracing.span('stage.prerank'):
+            candidates = self._prerank_games(rankable, analysis, max_output_results, user_query)
+        if cancelled():
+            return self._cancelled_result(user_query, analysis, games, candidates, [], max_output_results)
+        report('scoring', f'找到{len(games)}款游戏，正在为{len(candidates)}款候选游戏评分',
+               total=len(candidates))
+        
+        # 6. 使用多线程并行为每个游戏生成推荐理由和评分
+        scoring_mode = config.get('recommendation.scoring_mode', 'per_game')
+        print(f"\n💡 生成推荐理由（并行处理共{len(candidates)}款游戏）...")
+        logger.info(f"开始生成推荐理由，搜索到{len(games)}款游戏，预排序保留{len(candidates)}款 (评分模式={scoring_mode})")
         recommendations = []
         
+        # 按评分模式拆分任务：逐个评分时每个任务1款游戏，批量评分时每个任务batch_size款
+        if scoring_mode == 'batched':
+            batch_size = max(1, config.get('recommendation.batch_size', 5))
+            chunks = [candidates[i:i + batch_size] for i in range(0, len(candidates), batch_size)]
+            score_chunk = self._generate_recommendations_batch
+        else:
+            chunks = [[game] for game in candidates]
+            score_chunk = lambda chunk, analysis, user_query: [
+                self._generate_recommendation(chunk[0], analysis, user_query)
+            ]
+        
         # 使用线程池并行生成推荐,最多8个并发（LLM调用较慢）
-        max_workers = min(8, len(games))
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # 提交所有LLM任务
-            future_to_game = {
-                executor.submit(self._generate_recommendation, game, analysis, user_query): (i, game)
-                for i, game in enumerate(games, 1)
-            }
+        max_workers = min(8, len(chunks))
+        with tracing.span('stage.score', candidates=len(candidates), mode=scoring_mode):
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+            was_cancelled = False
+            try:
+                # 提交所有LLM任务
+                future_to_chunk = {
+                    executor.submit(tracing.bind(score_chunk, queue='llm_scoring', name='score.chunk',
+                                                 games=len(chunk)), chunk, analysis, user_query): chunk
+                    for chunk in chunks
+                }
             
-            # 收集完成的推荐
-            completed = 0
-            for future in as_completed(future_to_game):
-                i, game = future_to_game[future]
-                completed += 1
-                try:
-                    recommendation = future.result()
-                    recommendations.append(recommendation)
-                    print(f"  ✅ [{completed}/{len(games)}] 已完成: {game['name']} (评分: {recommendation['recommendation_score']})")
-                    logger.info(f"[{completed}/{len(games)}] 推荐生成完成: {game['name']} - 评分{recommendation['recommendation_score']}")
-                except Exception as e:
-                    logger.error(f"生成推荐失败 {game['name']}: {e}")
-                    # 即使失败也添加基本推荐
+                # 收集完成的推荐
+                completed = 0
+                for future in as_completed(future_to_chunk):
+                    chunk = future_to_chunk[future]
                     try:
-                        basic_rec = self._create_basic_recommendation(game, analysis)
-                        recommendations.append(basic_rec)
-                    except:
-                        pass
-        
-        # 5. 按推荐力度排序并返回前N个
-        recommendations.sort(key=lambda x: x['recommendation_score'], reverse=True)
-        top_recommendations = recommendations[:max_output_results]
+                        chunk_recommendations = future.result()
+                    except Exception as e:
+                        logger.error(f"生成推荐失败 {', '.join(game['name'] for game in chunk)}: {e}")
+                        # 即使失败也添加基本推荐
+                        chunk_recommendations = []
+                        for game in chunk:
+                            try:
+                                chunk_recommendations.append(self._create_basic_recommendation(game, analysis))
+                            except:
+                                pass
+                
+                    for recommendation in chunk_recommendations:
+                        completed += 1
+                        recommendations.append(recommendation)
+                        print(f"  ✅ [{completed}/{len(candidates)}] 已完成: {recommendation['name']} (评分: {recommendation['recommendation_score']})")
+                        logger.info(f"[{completed}/{len(candidates)}] 推荐生成完成: {recommendation['name']} - 评分{recommendation['recommendation_score']}")
+                
+                    # 推送当前的TopN部分结果
+                    if chunk_recommendations:
+                        report('scoring', f'已评分 {completed}/{len(candidates)} 款游戏', completed, len(candidates),
+                               self._top_recommendations(recommendations, max_output_results))
+                
+                    if cancelled():
+                        was_cancelled = True
+                        break
+            finally:
+                # 取消时不再等待进行中的LLM调用，未开始的任务直接丢弃
+                executor.shutdown(wait=not was_cancelled, cancel_futures=was_cancelled)
+        
+        if was_cancelled:
+            return self._cancelled_result(user_query, analysis, games, candidates, recommendations,
+                                          max_output_results)
+        
+        # 7. 按推荐力度排序并返回前N个
+        top_recommendations = self._top_recommendations(recommendations, max_output_results)
         
         print(f"\n✓ 推荐生成完成！从{len(recommendations)}款游戏中筛选出评分最高的{len(top_recommendations)}款")
         logger.info(f"从{len(recommendations)}款游戏中返回评分最高的{len(top_recommendations)}款")
         logger.log_recommendation_complete(len(top_recommendations))
+        report('done', f'推荐完成，返回{len(top_recommendations)}款游戏', len(recommendations),
+               len(candidates), top_recommendations)
         
         return {
             'query': user_query,
             'analysis': analysis,
             'total_found': len(games),
+            'total_enrichment_skipped': enrichment_skipped,
+            'total_preranked': len(candidates),
             'total_evaluated': len(recommendations),
             'recommendations': top_recommendations
         }
     
+    @staticmethod
+    def _top_recommendations(recommendations: List[Dict], max_output_results: int) -> List[Dict]:
+        """按推荐力度排序，返回前N个"""
+        return sorted(recommendations, key=lambda x: x['recommendation_score'], reverse=True)[:max_output_results]
+    
+    @staticmethod
+    def _report_progress(progress_callback: Optional[Callable[[Dict], None]], stage: str, message: str,
+                         completed: int = 0, total: int = 0, top: Optional[List[Dict]] = None):
+        """调用进度回调（回调出错只记录日志，不影响推荐流程）"""
+        if progress_callback is None:
+            return
+        try:
+            progress_callback({
+                'stage': stage,
+                'message': message,
+                'completed': completed,
+                'total': total,
+                'top': top or [],
+            })
+        except Exception as e:
+            logger.warning(f"进度回调出错 ({stage}): {e}")
+    
+    def _cancelled_result(self, user_query: str, analysis: Dict, games: List[Dict], candidates: List[Dict],
+                          recommendations: List[Dict], max_output_results: int) -> Dict:
+        """提前取消时返回已完成的部分结果"""
+        top_recommendations = self._top_recommendations(recommendations, max_output_results)
+        logger.info(f"推荐已取消: 已评分{len(recommendations)}/{len(candidates)}款，返回{len(top_recommendations)}款")
+        print(f"\n⚠️  推荐已取消，返回已完成的 {len(top_recommendations)} 款游戏")
+        return {
+            'query': user_query,
+            'analysis': analysis,
+            'total_found': len(games),
+            'total_preranked': len(candidates),
+            'total_evaluated': len(recommendations),
+            'recommendations': top_recommendations,
+            'cancelled': True,
+        }
+    
+    def _base_recommendation(self, game: Dict) -> Recommendation:
+        """构建推荐信息中与评分无关的基础字段"""
+        return Recommendation(
+            name=game['name'],
+            app_id=game['app_id'],
+            price=game['price'],
+            original_price=game['price'] / (1 - game['discount'] / 100) if game['discount'] > 0 else game['price'],
+            discount=game['discount'],
+            tags=game['tags'][:8],  # 只保留前8个标签
+            url=game['url'],
+            release_date=game.get('release_date', ''),
+            description=game.get('description', '')[:200],  # 限制长度
+            enrichment_status=game.get('enrichment_status'),
+            # 两阶段排序的各阶段得分，便于对比预排序造成的召回损失
+            tfidf_score=game.get('tfidf_score'),
+            prerank_score=game.get('prerank_score'),
+            llm_score=None,
+        )
+    
+    def _apply_llm_result(self, recommendation: Dict, llm_result: Dict) -> Dict:
+        """把LLM评分结果写入推荐信息"""
+        recommendation['recommendation_reason'] = llm_result.get('reason', '该游戏符合您的需求。')
+        recommendation['recommendation_score'] = llm_result.get('score', 50)
+        recommendation['llm_score'] = recommendation['recommendation_score']
+        recommendation['highlights'] = llm_result.get('highlights', [])
+        return recommendation
+    
     def _generate_recommendation(self, game: Dict, analysis: Dict, user_query: str) -> Dict:
         """
         为单个游戏生成推荐信息
@@ -137,24 +370,12 @@ class SteamRecommendationAgent:
             包含推荐信息的字典
         """
         # 基础推荐信息
-        recommendation = {
-            'name': game['name'],
-            'app_id': game['app_id'],
-            'price': game['price'],
-            'original_price': game['price'] / (1 - game['discount'] / 100) if game['discount'] > 0 else game['price'],
-            'discount': game['discount'],
-            'tags': game['tags'][:8],  # 只保留前8个标签
-            'url': game['url'],
-            'release_date': game.get('release_date', ''),
-            'description': game.get('description', '')[:200],  # 限制长度
-        }
+        recommendation = self._base_recommendation(game)
         
-        # 使用LLM生成推荐理由和评分
+        # 使用LLM生成推荐理由和评分（优先读取评分缓存）
         try:
-            llm_result = self._generate_recommendation_with_llm(game, analysis, user_query)
-            recommendation['recommendation_reason'] = llm_result.get('reason', '该游戏符合您的需求。')
-            recommendation['recommendation_score'] = llm_result.get('score', 50)
-            recommendation['highlights'] = llm_result.get('highlights', [])
+            llm_result = self._score_with_cache(game, analysis, user_query)
+            self._apply_llm_result(recommendation, llm_result)
         except Exception as e:
             logger.error(f"LLM生成推荐失败: {e}")
             print(f"    LLM生成失败，使用规则评分: {e}")
@@ -165,6 +386,95 @@ class SteamRecommendationAgent:
         
         return recommendation
     
+    def _generate_recommendations_batch(self, games: List[Dict], analysis: Dict, user_query: str) -> List[Dict]:
+        """
+        批量评分：一次LLM调用为多款游戏生成推荐信息
+        
+        已缓存的游戏不再送入LLM；LLM回复中缺失的游戏逐个重试。
+        
+        Returns:
+            与games顺序一致的推荐信息列表
+        """
+        results = {}
+        uncached = []
+        for game in games:
+            cached = self._get_cached_score(game, analysis, user_query)
+            if cached is not None:
+                results[str(game['app_id'])] = cached
+            else:
+                uncached.append(game)
+        
+        if uncached:
+            try:
+                batch_results = self._score_batch_with_llm(uncached, analysis, user_query)
+                for game in uncached:
+                    llm_result = batch_results.get(str(game['app_id']))
+                    if llm_result is not None:
+                        results[str(game['app_id'])] = llm_result
+                        self._set_cached_score(game, analysis, user_query, llm_result)
+            except Exception as e:
+                logger.warning(f"批量评分失败，改为逐个评分: {e}")
+        
+        recommendations = []
+        for game in games:
+            llm_result = results.get(str(game['app_id']))
+            if llm_result is not None:
+                recommendations.append(self._apply_llm_result(self._base_recommendation(game), llm_result))
+            else:
+                logger.info(f"批量评分结果缺少 {game['name']}，单独重试")
+                recommendations.append(self._generate_recommendation(game, analysis, user_query))
+        return recommendations
+    
+    def _score_cache_key(self, game: Dict, analysis: Dict, user_query: str) -> str:
+        """根据评分提示词的全部输入计算稳定的缓存键"""
+        fingerprint = {
+            'model': self.model,
+            'query': normalize_query(user_query),
+            'min_price': analysis['min_price'],
+            'max_price': analysis['max_price'],
+            'tags': analysis['tags'],
+            'genres': analysis['genres'],
+            'app_id': str(game['app_id']),
+            'name': game['name'],
+            'price': game['price'],
+            'discount': game['discount'],
+            'game_tags': game['tags'][:10],
+            'description': game.get('description', '暂无')[:300],
+        }
+        raw = json.dumps(fingerprint, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+    
+    def _get_cached_score(self, game: Dict, analysis: Dict, user_query: str) -> Optional[Dict]:
+        """读取LLM评分缓存"""
+        if self.score_cache is None:
+            return None
+        cached = self.score_cache.get(self._score_cache_key(game, analysis, user_query))
+        if cached is None:
+            return None
+        logger.debug(f"LLM评分缓存命中: {game['name']}")
+        return dict(cached, highlights=list(cached.get('highlights', [])))
+    
+    def _set_cached_score(self, game: Dict, analysis: Dict, user_query: str, llm_result: Dict):
+        """写入LLM评分缓存"""
+        if self.score_cache is not None:
+            self.score_cache.set(self._score_cache_key(game, analysis, user_query), llm_result)
+    
+    def _score_with_cache(self, game: Dict, analysis: Dict, user_query: str) -> Dict:
+        """调用LLM评分，相同输入直接返回缓存结果"""
+        cached = self._get_cached_score(game, analysis, user_query)
+        if cached is not None:
+            return cached
+        
+        llm_result = self._generate_recommendation_with_llm(game, analysis, user_query)
+        self._set_cached_score(game, analysis, user_query, llm_result)
+        return llm_result
+    
+    def get_cache_stats(self) -> Dict:
+        """获取LLM评分缓存统计"""
+        if self.score_cache is None:
+            return {'enabled': False}
+        return self.score_cache.get_stats()
+    
     def _generate_recommendation_with_llm(self, game: Dict, analysis: Dict, user_query: str) -> Dict:
         """使用LLM生成推荐理由和评分"""
         
@@ -210,6 +520,11 @@ class SteamRecommendationAgent:
             {"role": "user", "content": user_prompt}
         ]
         
+        llm_data = self._call_llm_json(messages)
+        return self._normalize_llm_result(llm_data)
+    
+    def _call_llm_json(self, messages: List[Dict]):
+        """调用LLM并解析回复中的JSON（兼容markdown代码块）"""
         result_json = llm_gen(messages, self.model)
         result = json.loads(result_json)
         
@@ -226,16 +541,89 @@ class SteamRecommendationAgent:
                 end = content.find('```', start)
                 content = content[start:end].strip()
             
-            llm_data = json.loads(content)
-            
-            return {
-                'score': int(llm_data.get('score', 50)),
-                'reason': llm_data.get('reason', ''),
-                'highlights': llm_data.get('highlights', [])
-            }
+            return json.loads(content)
         
         raise Exception("LLM返回格式错误")
     
+    def _normalize_llm_result(self, llm_data: Dict) -> Dict:
+        """规范化LLM返回的单个游戏评分"""
+        return {
+            'score': int(llm_data.get('score', 50)),
+            'reason': llm_data.get('reason', ''),
+            'highlights': llm_data.get('highlights', [])
+        }
+    
+    def _score_batch_with_llm(self, games: List[Dict], analysis: Dict, user_query: str) -> Dict[str, Dict]:
+        """
+        一次LLM调用为多款游戏评分
+        
+        Returns:
+            app_id -> 评分结果（score / reason / highlights）
+        """
+        system_prompt = """你是一个专业的游戏推荐专家。基于用户的需求和一组游戏的信息，你需要为每款游戏：
+1. 评估游戏与用户需求的匹配度（0-100分）
+2. 生成简洁的推荐理由（1-2句话，50字以内）
+3. 提炼游戏的3个核心亮点
+
+请以JSON数组格式返回，每款游戏一个元素，app_id必须与输入一致，格式如下：
+[
+    {
+        "app_id": "1245620",
+        "score": 85,
+        "reason": "这是一款高质量的开放世界RPG游戏，世界观宏大，自由度极高，完美符合您的需求。",
+        "highlights": ["开放世界探索", "丰富的剧情", "高自由度"]
+    }
+]
+
+评分标准：
+- 90-100: 完美匹配用户需求
+- 80-89: 高度匹配
+- 70-79: 较好匹配
+- 60-69: 一般匹配
+- 60以下: 匹配度较低
+
+只返回JSON数组，不要有其他文字。"""
+
+        game_blocks = []
+        for index, game in enumerate(games, 1):
+            game_blocks.append(f"""游戏{index}：
+- app_id：{game['app_id']}
+- 名称：{game['name']}
+- 价格：¥{game['price']}
+- 折扣：{game['discount']}%
+- 标签：{', '.join(game['tags'][:10])}
+- 简介：{game.get('description', '暂无')[:300]}""")
+
+        user_prompt = f"""用户需求：{user_query}
+
+用户偏好：
+- 价格范围：¥{analysis['min_price']}-¥{analysis['max_price']}
+- 期望标签：{', '.join(analysis['tags'])}
+- 偏好类型：{', '.join(analysis['genres'])}
+
+{chr(10).join(game_blocks)}
+
+请评估以上{len(games)}款游戏并生成推荐信息。"""
+
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        
+        llm_data = self._call_llm_json(messages)
+        if isinstance(llm_data, dict):
+            # 兼容 {"games": [...]} 这类包了一层的回复
+            llm_data = next((v for v in llm_data.values() if isinstance(v, list)), [])
+        
+        results = {}
+        for item in llm_data:
+            if isinstance(item, dict) and item.get('app_id') is not None:
+                try:
+                    results[str(item['app_id'])] = self._normalize_llm_result(item)
+                except (TypeError, ValueError):
+                    continue
+        return results
+    
     def _generate_simple_reason(self, game: Dict, analysis: Dict) -> str:
         """生成简单的推荐理由（降级方案）"""
         reasons = []
@@ -254,6 +642,8 @@ class SteamRecommendationAgent:
         matching_tags = set(game['tags']) & set(analysis['tags'])
         if matching_tags:
             reasons.append(f"匹配类型：{', '.join(list(matching_tags)[:2])}")
+        elif game.get('tfidf_score', 0) >= 0.6:
+            reasons.append("简介与您的需求高度相关")
         
         if reasons:
             return f"该游戏{', '.join(reasons)}，值得一试。"
@@ -279,32 +669,78 @@ class SteamRecommendationAgent:
             match_ratio = len(matching_tags) / len(analysis['tags'])
             score += int(20 * match_ratio)
         
+        # 简介/标签文本相关度 (0-20分)，由_prerank_games计算的TF-IDF相似度
+        relevance = game.get('tfidf_score')
+        if relevance:
+            score += int(config.get('recommendation.tfidf.weight', 20) * relevance)
+        
         # 折扣加分 (0-10分)
         score += min(10, game['discount'] // 10)
         
         # 确保分数在0-100范围内
         return max(0, min(100, score))
     
+    def _prerank_score(self, game: Dict, analysis: Dict) -> float:
+        """
+        预排序评分（无LLM）
+        
+        在规则评分（价格、标签精确匹配、TF-IDF文本相关度、折扣）的基础上，增加标签/流派的模糊重叠、
+        低于最低预算的惩罚和Metacritic评分。
+        """
+        score = float(self._calculate_simple_score(game, analysis))
+        
+        # 标签/流派模糊重叠 (0-20分)：分析结果中的中文标签和英文流派与游戏标签互相包含即算命中
+        wanted = {t.lower() for t in analysis.get('tags', []) + analysis.get('genres', []) if t}
+        game_tags = [t.lower() for t in game.get('tags', []) if t]
+        if wanted and game_tags:
+            matched = sum(1 for w in wanted if any(w in t or t in w for t in game_tags))
+            score += 20 * matched / len(wanted)
+        
+        # 价格低于期望下限扣分
+        if game['price'] < analysis.get('min_price', 0):
+            score -= 10
+        
+        # Metacritic评分 (-10~10分)，无评分时不加减
+        metacritic = game.get('metacritic_score')
+        if metacritic:
+            score += max(-10.0, min(10.0, (metacritic - 50) / 5))
+        
+        return round(score, 2)
+    
+    def _prerank_games(self, games: List[Dict], analysis: Dict, max_output_results: int,
+                       user_query: str = '') -> List[Dict]:
+        """按预排序评分截取前K款候选游戏（K = 输出数量 × candidate_multiplier）"""
+        if config.get('recommendation.tfidf.enabled', True) and games:
+            # 一次矩阵-向量乘法算出所有候选与需求的TF-IDF相似度，同时作为规则评分的文本相关度
+            for game, relevance in zip(games, rank_games(games, analysis, user_query)):
+                game['tfidf_score'] = round(relevance, 4)
+        
+        for game in games:
+            game['prerank_score'] = self._prerank_score(game, analysis)
+        
+        if not config.get('recommendation.prerank.enabled', True):
+            return games
+        
+        multiplier = config.get('recommendation.prerank.candidate_multiplier', 3)
+        min_candidates = config.get('recommendation.prerank.min_candidates', 5)
+        top_k = max(int(max_output_results * multiplier), min_candidates)
+        
+        candidates = sorted(games, key=lambda g: g['prerank_score'], reverse=True)[:top_k]
+        logger.info(f"预排序: {len(games)}款候选 -> 保留{len(candidates)}款送入LLM评分")
+        print(f"✓ 预排序完成，保留 {len(candidates)}/{len(games)} 款候选游戏")
+        return candidates
+    
     def _create_basic_recommendation(self, game: Dict, analysis: Dict) -> Dict:
         """创建基本推荐（无LLM）"""
-        return {
-            'name': game['name'],
-            'app_id': game['app_id'],
-            'price': game['price'],
-            'original_price': game['price'] / (1 - game['discount'] / 100) if game['discount'] > 0 else game['price'],
-            'discount': game['discount'],
-            'tags': game['tags'][:8],
-            'url': game['url'],
-            'release_date': game.get('release_date', ''),
-            'description': game.get('description', '')[:200],
-            'recommendation_reason': self._generate_simple_reason(game, analysis),
-            'recommendation_score': self._calculate_simple_score(game, analysis),
-            'highlights': []
-        }
+        recommendation = self._base_recommendation(game)
+        recommendation['recommendation_reason'] = self._generate_simple_reason(game, analysis)
+        recommendation['recommendation_score'] = self._calculate_simple_score(game, analysis)
+        recommendation['highlights'] = []
+        return recommendation
     
     def format_output(self, result: Dict) -> str:
         """格式化输出为JSON字符串"""
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return json.dumps(result, ensure_ascii=False, indent=2, default=json_default)
     
     def save_to_file(self, result: Dict, filename: str = None):
         """保存推荐结果到文件"""
@@ -312,7 +748,7 @@ class SteamRecommendationAgent:
             filename = config.get('recommendation.output_file', 'recommendations.json')
         
         with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
+            json.dump(result, f, ensure_ascii=False, indent=2, default=json_default)
         
         logger.info(f"推荐结果已保存到: {filename}")
         print(f"\n💾 推荐结果已保存到: {filename}")
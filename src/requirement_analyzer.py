@@ -2,11 +2,60 @@
 用户需求分析模块
 使用LLM分析用户的游戏推荐需求，提取关键信息
 """
+import copy
 import json
+import re
+import unicodedata
 from typing import Dict, List, Optional
 from llm_util import llm_gen
+from cache import PersistentTTLCache
+from catalog_store import catalog_store
 from config_loader import config
 from logger import logger
+import tracing
+
+
+# 价格写法：¥100 / ￥100 / 100元 / 100块钱 / 100 rmb / 100人民币 等统一为 "100元"（$等其他币种不折叠）
+_PRICE_PREFIX_PATTERN = re.compile(r'¥\s*(\d+(?:\.\d+)?)')
+# 不折叠为空白的符号：区分 C++ / C#，以及其他币种的价格
+_KEPT_SYMBOLS = frozenset('+#')
+_PRICE_SUFFIX_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*(?:元|块钱|块|rmb|cny|人民币)')
+_SPACE_PATTERN = re.compile(r'\s+')
+# 两侧不都是ASCII字母数字的空白（中文之间的空格）可以去掉
+_REMOVABLE_SPACE_PATTERN = re.compile(r'(?<![0-9a-z]) | (?![0-9a-z])')
+
+
+def _canonical_price(match: re.Match) -> str:
+    value = float(match.group(1))
+    return f"{int(value) if value.is_integer() else value}元"
+
+
+def normalize_query(user_query: str) -> str:
+    """
+    规范化用户查询，使仅有书写差异的查询得到相同结果
+
+    - Unicode NFKC（全角数字/字母/符号转半角）
+    - 英文转小写
+    - 人民币价格写法统一为 "N元"
+    - 标点折叠为空白（保留 + # 和货币符号），合并空白，去掉中文之间的空格
+    """
+    text = unicodedata.normalize('NFKC', user_query).lower()
+    text = _PRICE_PREFIX_PATTERN.sub(_canonical_price, text)
+    text = _PRICE_SUFFIX_PATTERN.sub(_canonical_price, text)
+
+    chars = []
+    for i, ch in enumerate(text):
+        category = unicodedata.category(ch)
+        if category.startswith(('P', 'S')) and category != 'Sc' and ch not in _KEPT_SYMBOLS:
+            # 保留数字中的小数点
+            if ch == '.' and 0 < i < len(text) - 1 and text[i - 1].isdigit() and text[i + 1].isdigit():
+                chars.append(ch)
+            else:
+                chars.append(' ')
+        else:
+            chars.append(ch)
+    text = _SPACE_PATTERN.sub(' ', ''.join(chars)).strip()
+    return _REMOVABLE_SPACE_PATTERN.sub('', text)
 
 
 class RequirementAnalyzer:
@@ -16,8 +65,20 @@ class RequirementAnalyzer:
         if model is None:
             model = config.get('llm.model', 'qwen-plus')
         self.model = model
+        
+        # 需求分析结果缓存，键为规范化后的查询
+        self.analysis_cache = None
+        if config.get('cache.analysis.enabled', True):
+            self.analysis_cache = PersistentTTLCache(
+                max_entries=config.get('cache.analysis.max_entries', 1000),
+                ttl=config.get('cache.analysis.ttl_seconds', 86400),
+                name='analysis',
+                store=catalog_store if config.get('cache.analysis.persist', False) else None,
+            )
+        
         logger.info(f"需求分析器初始化完成 (LLM模型={self.model})")
         
+    @tracing.traced('requirement_analyzer.analyze')
     def analyze_user_query(self, user_query: str) -> Dict:
         """
         分析用户查询，提取游戏推荐需求
@@ -33,6 +94,14 @@ class RequirementAnalyzer:
             - tags: 游戏标签/类型
             - preferences: 其他偏好信息
         """
+        cache_key = None
+        if self.analysis_cache is not None:
+            cache_key = f"{self.model}:{normalize_query(user_query)}"
+            cached = self.analysis_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"需求分析缓存命中: {user_query[:50]}")
+                tracing.set_attribute('cache_hit', True)
+                return copy.deepcopy(cached)
         
         system_prompt = """你是一个专业的游戏推荐分析助手。你的任务是分析用户的游戏推荐需求，提取关键信息。
 
@@ -91,16 +160,26 @@ class RequirementAnalyzer:
                 analyzed_data = json.loads(content)
                 
                 # 验证和设置默认值
-                return self._validate_analysis(analyzed_data)
+                analysis = self._validate_analysis(analyzed_data)
+                if cache_key is not None:
+                    self.analysis_cache.set(cache_key, copy.deepcopy(analysis))
+                return analysis
             else:
                 return self._get_default_analysis()
                 
         except Exception as e:
             logger.error(f"需求分析出错: {e}")
             print(f"⚠️  需求分析失败，使用降级方案")
+            tracing.set_attribute('fallback', True)
             # 返回基础解析结果
             return self._fallback_analysis(user_query)
     
+    def get_cache_stats(self) -> Dict:
+        """获取需求分析缓存统计"""
+        if self.analysis_cache is None:
+            return {'enabled': False}
+        return self.analysis_cache.get_stats()
+    
     def _validate_analysis(self, data: Dict) -> Dict:
         """验证和标准化分析结果"""
         result = {
@@ -140,7 +219,6 @@ class RequirementAnalyzer:
         query_lower = user_query.lower()
         
         # 价格提取
-        import re
         price_pattern = r'(\d+)\s*元'
         prices = re.findall(price_pattern, user_query)
         if prices:
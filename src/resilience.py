@@ -0,0 +1,276 @@
+"""
+请求容错模块
+为Steam请求提供分类重试（带抖动的指数退避、支持429的Retry-After）和熔断器
+"""
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from config_loader import config
+from logger import logger
+
+
+class RetryableError(Exception):
+    """可重试的错误（连接失败、超时、5xx、无法解析的响应体）"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ThrottledError(RetryableError):
+    """被Steam限流（HTTP 429，或appdetails返回null响应体）"""
+
+
+class CircuitOpenError(Exception):
+    """熔断器处于打开状态，请求未发出"""
+
+
+class SteamClientError(Exception):
+    """Steam正常响应但返回了4xx（如404），不可重试；说明Steam可用，熔断器记为成功"""
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析Retry-After响应头（秒数或HTTP日期），无法解析时返回None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def classify_status(status_code: int, retry_after: Optional[str] = None):
+    """按HTTP状态码分类：429/5xx抛出可重试错误，其他4xx抛出SteamClientError，2xx/3xx不处理"""
+    if status_code == 429:
+        raise ThrottledError('HTTP 429 Too Many Requests', retry_after=parse_retry_after(retry_after))
+    if status_code >= 500:
+        raise RetryableError(f'HTTP {status_code}')
+    if status_code >= 400:
+        raise SteamClientError(f'HTTP {status_code}', status_code)
+
+
+class RetryPolicy:
+    """带抖动的指数退避重试策略
+
+    第n次重试前等待 random(0, min(max_delay, base_delay * 2^n))（full jitter）；
+    错误带有Retry-After时以其为下限。
+    """
+
+    def __init__(self, max_attempts: Optional[int] = None, base_delay: Optional[float] = None,
+                 max_delay: Optional[float] = None):
+        if max_attempts is None:
+            max_attempts = config.get('steam.retry.max_attempts', 3)
+        if base_delay is None:
+            base_delay = config.get('steam.retry.base_delay_seconds', 0.5)
+        if max_delay is None:
+            max_delay = config.get('steam.retry.max_delay_seconds', 8)
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt: int, error: Optional[RetryableError] = None) -> float:
+        """计算第attempt次失败后的等待秒数（attempt从1开始）"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+        if error is not None and error.retry_after is not None:
+            delay = max(delay, min(error.retry_after, self.max_delay * 4))
+        return delay
+
+
+class CircuitBreaker:
+    """熔断器（线程安全）
+
+    - closed: 正常请求，连续失败达到阈值后转为open
+    - open: 直接拒绝请求，reset_timeout后转为half_open
+    - half_open: 只放行一个探测请求，成功则恢复closed，失败则重新open
+
+    before_call()在放行探测请求时返回探测令牌，请求被取消或出现与Steam无关的异常时
+    凭该令牌调用release_probe()归还探测名额。
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: Optional[int] = None,
+                 reset_timeout: Optional[float] = None):
+        if failure_threshold is None:
+            failure_threshold = config.get('steam.circuit_breaker.failure_threshold', 5)
+        if reset_timeout is None:
+            reset_timeout = config.get('steam.circuit_breaker.reset_timeout_seconds', 30)
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe: Optional[object] = None
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._probe = None
+        return self._state
+
+    def before_call(self) -> Optional[object]:
+        """请求前检查，熔断时抛出CircuitOpenError；放行的是探测请求时返回探测令牌，否则返回None"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return None
+            if state == self.HALF_OPEN and self._probe is None:
+                self._probe = object()
+                return self._probe
+            self.rejected += 1
+        raise CircuitOpenError(f'{self.name} 熔断中，暂停请求Steam')
+
+    def release_probe(self, token: Optional[object]):
+        """归还探测名额（探测请求未得到Steam的结果），让下一个请求重新探测；只有持有该令牌的调用才能归还"""
+        with self._lock:
+            if token is not None and self._probe is token:
+                self._probe = None
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            state = self._current_state()
+            if state == self.HALF_OPEN or (state == self.CLOSED and self._failures >= self.failure_threshold):
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe = None
+                self.opened += 1
+                logger.warning(f"熔断器 {self.name} 打开: 连续失败{self._failures}次，{self.reset_timeout}s后重试")
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'name': self.name,
+                'state': self._current_state(),
+                'consecutive_failures': self._failures,
+                'times_opened': self.opened,
+                'rejected': self.rejected,
+            }
+
+
+class ResilientCaller:
+    """按接口组合重试策略与熔断器，统计重试次数"""
+
+    def __init__(self, policy: Optional[RetryPolicy] = None):
+        self.policy = policy or RetryPolicy()
+        self.breakers: Dict[str, CircuitBreaker] = {
+            'search': CircuitBreaker('search'),
+            'appdetails': CircuitBreaker('appdetails'),
+        }
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.throttled = 0
+        self.failures = 0
+
+    def _on_error(self, endpoint: str, attempt: int, error: RetryableError) -> Optional[float]:
+        """记录一次失败，返回重试前的等待秒数；不再重试时返回None"""
+        self.breakers[endpoint].record_failure()
+        with self._lock:
+            if isinstance(error, ThrottledError):
+                self.throttled += 1
+            if attempt >= self.policy.max_attempts:
+                self.failures += 1
+                return None
+            self.retries += 1
+        delay = self.policy.backoff(attempt, error)
+        logger.warning(f"Steam请求失败 ({endpoint}, 第{attempt}次): {error}，{delay:.2f}s后重试")
+        return delay
+
+    def call(self, endpoint: str, fn: Callable[[], Any]) -> Any:
+        """
+        同步调用，可重试错误按策略重试，其他异常直接抛出
+
+        SteamClientError（如404）说明Steam仍在正常响应，记为成功；其他异常（解析错误、程序错误、
+        中断）与Steam是否可用无关，不改变熔断状态，只归还本次调用持有的探测名额
+        """
+        breaker = self.breakers[endpoint]
+        attempt = 0
+        while True:
+            attempt += 1
+            probe = breaker.before_call()
+            try:
+                result = fn()
+            except RetryableError as e:
+                delay = self._on_error(endpoint, attempt, e)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            except SteamClientError:
+                breaker.record_success()
+                raise
+            except BaseException:
+                breaker.release_probe(probe)
+                raise
+            breaker.record_success()
+            return result
+
+    async def call_async(self, endpoint: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """异步调用，语义同call"""
+        breaker = self.breakers[endpoint]
+        attempt = 0
+        while True:
+            attempt += 1
+            probe = breaker.before_call()
+            try:
+                result = await fn()
+            except RetryableError as e:
+                delay = self._on_error(endpoint, attempt, e)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            except SteamClientError:
+                breaker.record_success()
+                raise
+            except BaseException:
+                # 包括请求被取消（CancelledError）
+                breaker.release_probe(probe)
+                raise
+            breaker.record_success()
+            return result
+
+    def get_stats(self) -> Dict:
+        """获取重试、限流与熔断统计"""
+        with self._lock:
+            stats = {
+                'retries': self.retries,
+                'throttled': self.throttled,
+                'failures': self.failures,
+            }
+        stats['circuit_breakers'] = {name: breaker.get_stats() for name, breaker in self.breakers.items()}
+        return stats
+
+
+# 全局容错调用器（同步/异步爬虫共享熔断状态）
+steam_resilience = ResilientCaller()
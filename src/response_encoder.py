@@ -0,0 +1,91 @@
+"""
+响应编码模块
+MCP工具响应统一经由这里序列化：
+- compact模式不缩进、不加多余空格，pretty模式与原先一样indent=2
+- 安装了orjson时优先使用（输出与标准库一致的UTF-8 JSON），不可用或编码失败时回退到json
+- 键顺序稳定：默认保持插入顺序（记录对象按FIELDS顺序输出），也可配置为按键排序
+"""
+import json
+from typing import Any, Callable, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # orjson为可选依赖
+    orjson = None
+
+from config_loader import config
+from models import json_default
+
+MODES = ('compact', 'pretty')
+BACKENDS = ('auto', 'orjson', 'json')
+
+
+class ResponseEncoder:
+    """JSON响应编码器"""
+
+    def __init__(self, mode: Optional[str] = None, backend: Optional[str] = None,
+                 sort_keys: Optional[bool] = None, default: Callable[[Any], Any] = json_default):
+        if mode is None:
+            mode = config.get('mcp.response.mode', 'compact')
+        if backend is None:
+            backend = config.get('mcp.response.backend', 'auto')
+        if sort_keys is None:
+            sort_keys = config.get('mcp.response.sort_keys', False)
+        if mode not in MODES:
+            raise ValueError(f"未知的响应模式: {mode}（可选: {', '.join(MODES)}）")
+        if backend not in BACKENDS:
+            raise ValueError(f"未知的JSON后端: {backend}（可选: {', '.join(BACKENDS)}）")
+        if backend == 'orjson' and orjson is None:
+            raise ValueError("JSON后端配置为orjson，但未安装orjson")
+
+        self.mode = mode
+        self.sort_keys = sort_keys
+        self.default = default
+        self.use_orjson = orjson is not None and backend != 'json'
+        self.fallbacks = 0
+
+        self._orjson_option = 0
+        if self.use_orjson:
+            self._orjson_option = orjson.OPT_NON_STR_KEYS
+            if mode == 'pretty':
+                self._orjson_option |= orjson.OPT_INDENT_2
+            if sort_keys:
+                self._orjson_option |= orjson.OPT_SORT_KEYS
+        self._json_kwargs = {'ensure_ascii': False, 'sort_keys': sort_keys, 'default': default}
+        if mode == 'pretty':
+            self._json_kwargs['indent'] = 2
+        else:
+            self._json_kwargs['separators'] = (',', ':')
+
+    @property
+    def backend(self) -> str:
+        return 'orjson' if self.use_orjson else 'json'
+
+    def encode_bytes(self, payload: Any) -> bytes:
+        """编码为UTF-8字节"""
+        if self.use_orjson:
+            try:
+                return orjson.dumps(payload, default=self.default, option=self._orjson_option)
+            except TypeError:
+                # orjson不支持的值（如超过64位的整数），交给标准库处理
+                self.fallbacks += 1
+        return json.dumps(payload, **self._json_kwargs).encode('utf-8')
+
+    def encode(self, payload: Any) -> str:
+        """编码为JSON字符串"""
+        return self.encode_bytes(payload).decode('utf-8')
+
+    def encode_with_size(self, payload: Any) -> Tuple[str, int]:
+        """编码为JSON字符串，同时返回UTF-8字节数"""
+        data = self.encode_bytes(payload)
+        return data.decode('utf-8'), len(data)
+
+
+# 全局编码器实例（按config.json中的mcp.response配置）
+response_encoder = ResponseEncoder()
+
+
+if __name__ == "__main__":
+    sample = {'success': True, 'query': '推荐一些冒险游戏', 'games': [{'name': '示例游戏', 'price': 19.8}]}
+    print(f"后端: {response_encoder.backend}, 模式: {response_encoder.mode}")
+    print(response_encoder.encode(sample))
@@ -0,0 +1,123 @@
+"""
+Steam搜索结果页解析模块
+提供三种解析引擎：
+- fast: 预编译正则一次扫描提取所有结果行字段，不构建DOM（默认）
+- strainer: BeautifulSoup + SoupStrainer，只构建search_result_row子树
+- bs4: 完整解析整页HTML（原实现）
+fast引擎遇到无法识别的页面结构时返回None，由调用方回落到BeautifulSoup解析。
+"""
+import html
+import re
+from typing import List, Optional
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from models import GameRecord
+
+ENGINES = ('fast', 'strainer', 'bs4')
+
+
+def _class_pattern(tag: str, class_name: str) -> str:
+    """匹配class属性中包含指定类名的开始标签（与BeautifulSoup的class_匹配规则一致）"""
+    return rf'<{tag}\b[^>]*?\bclass="(?:[^"]*\s)?{class_name}(?:\s[^"]*)?"[^>]*>'
+
+
+_ROW_PATTERN = re.compile(
+    r'<a\b([^>]*?\bclass="(?:[^"]*\s)?search_result_row(?:\s[^"]*)?"[^>]*)>(.*?)</a>', re.S
+)
+_ATTR_PATTERN = re.compile(r'([\w:-]+)\s*=\s*"([^"]*)"')
+_TITLE_PATTERN = re.compile(_class_pattern('span', 'title') + r'(.*?)</span>', re.S)
+_FINAL_PRICE_PATTERN = re.compile(_class_pattern('div', 'discount_final_price') + r'(.*?)</div>', re.S)
+_SEARCH_PRICE_PATTERN = re.compile(_class_pattern('div', 'search_price') + r'(.*?)</div>', re.S)
+_DISCOUNT_PATTERN = re.compile(_class_pattern('div', 'discount_pct') + r'(.*?)</div>', re.S)
+_RELEASED_PATTERN = re.compile(_class_pattern('div', 'search_released') + r'(.*?)</div>', re.S)
+_TAG_PATTERN = re.compile(r'<[^>]*>')
+_PRICE_PATTERN = re.compile(r'¥\s*([\d,]+\.?\d*)')
+
+
+def parse_price(price_text: str) -> float:
+    """从价格文本中提取人民币价格（免费或无法识别时为0）"""
+    price_match = _PRICE_PATTERN.search(price_text)
+    if price_match:
+        return float(price_match.group(1).replace(',', ''))
+    return 0.0
+
+
+def parse_discount(discount_text: str) -> int:
+    """从折扣文本（如 -35%）中提取折扣百分比"""
+    try:
+        return int(discount_text.strip().replace('-', '').replace('%', ''))
+    except ValueError:
+        return 0
+
+
+def make_row(app_id: str, title: str, price: float, discount: int, url: str, release_date: str) -> GameRecord:
+    """构建搜索结果行（所有解析引擎返回相同结构）"""
+    return GameRecord(
+        app_id=app_id,
+        name=title,
+        price=price,
+        discount=discount,
+        url=url,
+        release_date=release_date,
+        tags=[],
+        description="",
+        reviews=""
+    )
+
+
+def _text(fragment: str) -> str:
+    """去掉标签、反转义实体，得到与BeautifulSoup .text.strip() 相同的文本"""
+    return html.unescape(_TAG_PATTERN.sub('', fragment)).strip()
+
+
+def parse_search_rows(page: str) -> Optional[List[GameRecord]]:
+    """
+    用预编译正则解析搜索结果页
+
+    Returns:
+        结果行列表；页面中存在结果行但结构无法识别时返回None
+    """
+    rows = []
+    matched = 0
+    for row_match in _ROW_PATTERN.finditer(page):
+        matched += 1
+        attrs = {name: html.unescape(value) for name, value in _ATTR_PATTERN.findall(row_match.group(1))}
+        app_id = attrs.get('data-ds-appid')
+        if not app_id:
+            continue
+
+        body = row_match.group(2)
+        title_match = _TITLE_PATTERN.search(body)
+        if title_match is None:
+            # 结果行结构与预期不符，交给完整解析器处理
+            return None
+        title = _text(title_match.group(1))
+
+        price_match = _FINAL_PRICE_PATTERN.search(body) or _SEARCH_PRICE_PATTERN.search(body)
+        price = parse_price(_text(price_match.group(1))) if price_match else 0.0
+
+        discount_match = _DISCOUNT_PATTERN.search(body)
+        discount = parse_discount(_text(discount_match.group(1))) if discount_match else 0
+
+        released_match = _RELEASED_PATTERN.search(body)
+        release_date = _text(released_match.group(1)) if released_match else ""
+
+        rows.append(make_row(app_id, title, price, discount, attrs.get('href', ''), release_date))
+
+    if matched == 0 and 'search_result_row' in page:
+        return None
+    return rows
+
+
+def _is_row_class(value: Optional[str]) -> bool:
+    # 解析阶段的SoupStrainer按完整的class字符串匹配，需要自行拆分
+    return value is not None and 'search_result_row' in value.split()
+
+
+def find_row_elements(page: str, strain: bool = True) -> List:
+    """用BeautifulSoup找出所有结果行元素（strain=True时只构建结果行子树）"""
+    if strain:
+        strainer = SoupStrainer('a', class_=_is_row_class)
+        return BeautifulSoup(page, 'html.parser', parse_only=strainer).find_all('a', class_='search_result_row')
+    return BeautifulSoup(page, 'html.parser').find_all('a', class_='search_result_row')
@@ -0,0 +1,70 @@
+"""
+服务容器模块
+在进程启动时创建共享的爬虫、需求分析器、推荐Agent和LLM客户端，供所有MCP工具复用
+"""
+import threading
+from typing import Optional
+
+from config_loader import config
+from logger import logger
+from llm_util import client as llm_client
+from steam_crawler import SteamCrawler
+from async_steam_crawler import AsyncSteamCrawler
+from requirement_analyzer import RequirementAnalyzer
+from recommendation_agent import SteamRecommendationAgent
+from prewarm import ListingPrewarmer
+
+
+class SteamServices:
+    """进程级服务容器
+
+    所有成员均为无请求状态的对象，可被多个并发请求（协程或工作线程）同时使用；
+    连接池、缓存等资源的生命周期与容器一致，而非单次请求。
+    """
+
+    def __init__(self, model: str = None):
+        if model is None:
+            model = config.get('llm.model', 'qwen-plus')
+        self.model = model
+
+        self.llm_client = llm_client
+        self.crawler = SteamCrawler()
+        self.async_crawler = AsyncSteamCrawler()
+        self.analyzer = RequirementAnalyzer(model=model)
+        self.agent = SteamRecommendationAgent(model=model, analyzer=self.analyzer, crawler=self.crawler)
+        # 热门榜单预热（后台任务由服务器生命周期启动）
+        self.prewarmer = ListingPrewarmer(self.async_crawler)
+
+        logger.info(f"服务容器初始化完成 (LLM模型={self.model})")
+
+    async def shutdown(self):
+        """关闭所有持有连接的资源"""
+        await self.prewarmer.stop()
+        await self.async_crawler.aclose()
+        self.crawler.http.close()
+        # 持久化缓存与LLM客户端都是进程级单例（导入时创建，容器之外的模块也在使用），不随容器关闭，
+        # 由各自模块在进程退出时关闭；之后再次get_services()创建的容器仍可使用
+        logger.info("服务容器已关闭")
+
+
+_services: Optional[SteamServices] = None
+_services_lock = threading.Lock()
+
+
+def get_services() -> SteamServices:
+    """获取全局服务容器（首次调用时创建）"""
+    global _services
+    if _services is None:
+        with _services_lock:
+            if _services is None:
+                _services = SteamServices()
+    return _services
+
+
+async def shutdown_services():
+    """关闭并清除全局服务容器"""
+    global _services
+    with _services_lock:
+        services, _services = _services, None
+    if services is not None:
+        await services.shutdown()
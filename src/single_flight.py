@@ -0,0 +1,119 @@
+"""
+请求合并（single-flight）模块
+相同键的并发调用只执行一次，其余调用方等待并共享同一结果，用于突发流量下去重Steam请求和LLM流程
+"""
+import asyncio
+import copy
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Call:
+    """一次进行中的调用"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class _FlightStats:
+    """合并统计（调用方在持有锁时更新）"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    def snapshot(self, in_flight: int) -> Dict:
+        return {
+            'name': self.name,
+            'calls': self.calls,
+            'executions': self.executions,
+            'coalesced': self.coalesced,
+            'in_flight': in_flight,
+            'coalesce_ratio': round(self.coalesced / self.calls, 3) if self.calls else 0.0,
+        }
+
+
+class SingleFlight:
+    """线程版single-flight
+
+    第一个调用方执行函数，同一键上并发到达的其他调用方阻塞等待并获得结果的深拷贝
+    （异常同样共享）。调用结束后立即移除该键，之后的调用重新执行。
+    """
+
+    def __init__(self, name: str = 'flight'):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._stats = _FlightStats(name)
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            self._stats.calls += 1
+            call = self._calls.get(key)
+            if call is not None:
+                self._stats.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._stats.executions += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def get_stats(self) -> Dict:
+        """获取调用/合并统计"""
+        with self._lock:
+            return self._stats.snapshot(len(self._calls))
+
+
+class AsyncSingleFlight:
+    """协程版single-flight
+
+    共享的调用以独立任务运行，单个调用方被取消不会影响其他等待者。
+    需在同一个事件循环中使用。
+    """
+
+    def __init__(self, name: str = 'flight'):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._stats = _FlightStats(name)
+
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        self._stats.calls += 1
+        task = self._calls.get(key)
+        if task is not None:
+            self._stats.coalesced += 1
+            return copy.deepcopy(await asyncio.shield(task))
+
+        self._stats.executions += 1
+        task = asyncio.ensure_future(fn(*args, **kwargs))
+        self._calls[key] = task
+
+        def forget(done: asyncio.Task):
+            if self._calls.get(key) is done:
+                del self._calls[key]
+
+        task.add_done_callback(forget)
+        return await asyncio.shield(task)
+
+    def get_stats(self) -> Dict:
+        """获取调用/合并统计"""
+        return self._stats.snapshot(len(self._calls))
@@ -2,22 +2,51 @@
 Steam游戏信息爬虫模块
 通过Steam Store API和网页爬虫获取游戏信息
 """
-import requests
+import os
 import time
-from bs4 import BeautifulSoup
-from typing import List, Dict, Optional
-import re
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
+import requests
 from config_loader import config
 from logger import logger
+from http_client import http_client
+from cache import appdetails_cache, search_cache
+from catalog_store import catalog_store
+from local_catalog import local_catalog
+from single_flight import SingleFlight
+from rate_limiter import steam_rate_limiter
+from models import GameRecord
+import tracing
+from game_details import normalize_fields, project_details
+from search_parser import parse_search_rows, find_row_elements, parse_price, parse_discount, make_row
+from resilience import steam_resilience, classify_status, RetryableError, ThrottledError, CircuitOpenError
 
 
-class SteamCrawler:
-    """Steam游戏信息爬虫"""
+# 搜索结果缓存后台刷新线程（进程内共享）
+_refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='search-refresh')
+
+# 进程级请求合并：同一app/同一搜索参数的并发请求只发送一次（所有SteamCrawler实例共享）
+app_data_flight = SingleFlight('appdetails')
+search_flight = SingleFlight('search')
+
+
+class SteamCrawlerBase:
+    """Steam爬虫公共部分：请求参数构建与响应解析（同步/异步爬虫共用）"""
+    
+    # 游戏详情丰富状态（写入 game['enrichment_status']）
+    ENRICHMENT_OK = 'ok'                # 已获取详情
+    ENRICHMENT_NOT_FOUND = 'not_found'  # Steam没有该游戏的详情（锁区、下架等）
+    ENRICHMENT_FAILED = 'failed'        # 重试后仍失败
+    ENRICHMENT_SKIPPED = 'skipped'      # 熔断中，未发出请求
+    ENRICHMENT_RETRYABLE = (ENRICHMENT_FAILED, ENRICHMENT_SKIPPED)
     
     def __init__(self):
-        self.base_url = "https://store.steampowered.com"
+        # 环境变量STEAM_BASE_URL优先（压测时指向本地替身服务器benchmarks/steam_stub_server.py）
+        self.base_url = (os.getenv('STEAM_BASE_URL')
+                         or config.get('steam.base_url', 'https://store.steampowered.com')).rstrip('/')
         self.search_url = f"{self.base_url}/search/"
+        # 无限滚动使用的JSON分页接口（start/count分页，results_html为结果行HTML）
+        self.search_results_url = f"{self.base_url}/search/results/"
         self.api_url = f"{self.base_url}/api"
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
@@ -27,109 +56,181 @@ class SteamCrawler:
         # 从配置加载参数
         self.request_timeout = config.get('steam.request_timeout', 10)
         self.search_delay = config.get('steam.search_delay', 0.5)
+        self.search_parser = config.get('steam.search_parser', 'fast')
+        self.search_page_size = config.get('steam.search_page_size', 50)
+        self.search_page_concurrency = config.get('steam.search_page_concurrency', 4)
         self.language = config.get('steam.language', 'schinese')
         self.country_code = config.get('steam.country_code', 'CN')
         
-        logger.info(f"Steam爬虫初始化完成 (超时={self.request_timeout}s, 延迟={self.search_delay}s)")
-        
-    def search_games(self, keywords: str, max_price: Optional[float] = None, 
-                     tags: Optional[List[str]] = None, max_results: int = None) -> List[Dict]:
-        """
-        搜索Steam游戏
-        
-        Args:
-            keywords: 搜索关键词
-            max_price: 最大价格（人民币）
-            tags: 游戏标签列表
-            max_results: 最大返回结果数（None则使用配置文件的值）
-            
-        Returns:
-            游戏信息列表
-        """
-        if max_results is None:
-            max_results = config.get('steam.max_search_results', 50)
-        
-        logger.log_search_start(f"关键词='{keywords}', 最大价格={max_price}, 最大结果={max_results}")
-        print(f"\n🔍 正在搜索Steam游戏: '{keywords}' (最多返回 {max_results} 款)...")
-        
-        games = []
+        # 进程内共享的appdetails缓存（内存）与持久化目录缓存（SQLite）
+        self.app_cache = appdetails_cache
+        self.store = catalog_store
+        # 搜索结果页缓存（保存解析后的结果行）
+        self.search_cache = search_cache
         
-        # 构建搜索参数
+        # 本地游戏目录：live只请求Steam，local只查本地目录，local_then_live本地结果不足时再请求Steam
+        self.search_mode = config.get('steam.search_mode', 'live')
+        self.local_catalog = local_catalog
+        self.local_min_results = config.get('steam.local_catalog.min_results', 10)
+    
+    def _build_search_params(self, **extra) -> Dict:
+        """构建搜索页请求参数"""
         params = {
-            'term': keywords,
             'l': self.language,
             'cc': self.country_code,
             'ndl': 1,
         }
+        params.update(extra)
+        return params
+    
+    def _build_page_params(self, params: Dict, start: int) -> Dict:
+        """构建JSON分页接口的请求参数（每页大小固定，便于按页缓存）"""
+        page_params = dict(params)
+        page_params.update({'infinite': 1, 'start': start, 'count': self.search_page_size})
+        return page_params
+    
+    def _extract_results_html(self, response) -> str:
+        """从JSON分页接口的响应中取出结果行HTML"""
+        self._check_response(response)
+        try:
+            data = response.json()
+        except ValueError:
+            raise RetryableError('搜索分页接口返回了无法解析的响应')
+        if not isinstance(data, dict) or not data.get('success'):
+            raise RetryableError('搜索分页接口返回失败')
+        return data.get('results_html') or ''
+    
+    @staticmethod
+    def _merge_pages(pages: Iterable[Tuple[int, List[Dict]]], max_rows: int) -> List[Dict]:
+        """按起始位置合并分页结果，去掉跨页重复的游戏（按app_id），最多保留max_rows行"""
+        rows = []
+        seen = set()
+        for _, page_rows in sorted(pages, key=lambda page: page[0]):
+            for row in page_rows:
+                if row['app_id'] in seen:
+                    continue
+                seen.add(row['app_id'])
+                rows.append(row)
+        return rows[:max_rows]
+    
+    def _build_app_details_params(self, app_id: str, filters: Optional[str] = None) -> Dict:
+        """构建appdetails接口请求参数"""
+        params = {
+            'appids': app_id,
+            'l': self.language,
+            'cc': self.country_code
+        }
+        if filters:
+            params['filters'] = filters
+        return params
+    
+    def _store_key(self, app_id: str) -> str:
+        """持久化缓存中appdetails记录的键"""
+        return f"{app_id}:{self.language}:{self.country_code}"
+    
+    def _get_cached_app_data(self, app_id: str, need_price: bool):
+        """读取appdetails缓存（内存未命中时回落到持久化缓存），返回 (游戏数据, 价格是否新鲜)"""
+        cached, price_fresh = self.app_cache.get(app_id, self.language, self.country_code, need_price=need_price)
+        if cached is not None:
+            return cached, price_fresh
+        return self._load_stored_app_data(app_id)
+    
+    def _load_stored_app_data(self, app_id: str):
+        """从持久化缓存读取appdetails并回填内存缓存，返回 (游戏数据, 价格是否新鲜)"""
+        stored = self.store.get('appdetails', self._store_key(app_id))
+        if stored is None:
+            return None, False
         
-        # 添加价格过滤
-        if max_price:
-            params['maxprice'] = int(max_price)
+        game_data, fetched_at, price_at = stored
+        now = time.time()
+        # 回填内存缓存，保留原始抓取时间
+        self.app_cache.put(app_id, self.language, self.country_code, game_data,
+                           age=now - fetched_at, price_age=now - price_at)
+        return game_data, now - price_at <= self.app_cache.price_ttl
+    
+    def _cache_app_data(self, app_id: str, game_data: Optional[Dict]):
+        """写入appdetails缓存（内存 + 持久化）"""
+        if game_data:
+            self.app_cache.put(app_id, self.language, self.country_code, game_data)
+            self.store.put('appdetails', self._store_key(app_id), game_data)
+    
+    def _merge_price_data(self, app_id: str, price_data) -> Optional[Dict]:
+        """把只含价格的appdetails响应合并进缓存（免费游戏返回空列表）"""
+        if not isinstance(price_data, dict):
+            price_data = {}
+        merged = self.app_cache.update_price(app_id, self.language, self.country_code, price_data)
+        if merged is not None:
+            self.store.update_payload('appdetails', self._store_key(app_id), merged)
+        return merged
+    
+    def _search_local(self, keywords: str, max_price: Optional[float], tags: Optional[List[str]],
+                      max_results: int) -> Optional[List[Dict]]:
+        """
+        按search_mode查询本地游戏目录
         
+        Returns:
+            可以直接返回的结果；需要请求Steam时返回None
+        """
+        if self.search_mode == 'live' or not self.local_catalog.enabled:
+            return None
+        start = time.perf_counter()
+        games = self.local_catalog.search(keywords, max_price=max_price, tags=tags, max_results=max_results)
+        elapsed = (time.perf_counter() - start) * 1000
+        logger.info(f"本地目录搜索 '{keywords}' 命中 {len(games)} 款游戏，耗时{elapsed:.1f}ms")
+        
+        if self.search_mode == 'local' or len(games) >= min(self.local_min_results, max_results):
+            print(f"📚 本地目录找到 {len(games)} 款游戏 ({elapsed:.1f}ms)")
+            return games
+        logger.info(f"本地目录结果不足{min(self.local_min_results, max_results)}款，改为请求Steam")
+        return None
+    
+    def _ingest_games(self, games: List[Dict]):
+        """把丰富成功的游戏收录到本地目录"""
         try:
-            response = requests.get(self.search_url, params=params, headers=self.headers, timeout=self.request_timeout)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            game_items = soup.find_all('a', class_='search_result_row', limit=max_results * 2)
-            
-            logger.info(f"Steam搜索返回 {len(game_items)} 个结果")
-            
-            for idx, item in enumerate(game_items, 1):
-                try:
-                    game_info = self._parse_game_item(item)
-                    if game_info:
-                        # 价格过滤
-                        if max_price and game_info.get('price', float('inf')) > max_price:
-                            continue
-                        games.append(game_info)
-                        
-                        # 显示进度
-                        print(f"  找到: {game_info['name']} - ¥{game_info['price']}")
-                        
-                        # if len(games) >= max_results:
-                        #     break
-                except Exception as e:
-                    logger.error(f"解析游戏项出错: {e}")
-                    continue
-            
-            logger.info(f"过滤后得到 {len(games)} 款游戏")
-            
-            # 使用多线程并行获取详细信息
-            print(f"\n🔍 获取游戏详细信息（并行处理）...")
-            # games_to_enrich = games[:max_results]
-            games_to_enrich = games
-            
-            # 使用线程池并行获取,最多max_results * 2个并发
-            max_workers = min(max_results * 2, len(games_to_enrich))
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                # 提交所有任务
-                future_to_game = {
-                    executor.submit(self._enrich_game_info, game): game 
-                    for game in games_to_enrich
-                }
-                
-                # 收集完成的任务
-                completed = 0
-                for future in as_completed(future_to_game):
-                    game = future_to_game[future]
-                    completed += 1
-                    try:
-                        future.result()  # 获取结果,如果有异常会在这里抛出
-                        print(f"  [{completed}/{len(games_to_enrich)}] 已获取: {game['name']}")
-                        logger.log_search_game(game['name'], completed, len(games_to_enrich))
-                    except Exception as e:
-                        logger.error(f"获取 {game['name']} 详情失败: {e}")
-            
-            logger.log_search_complete(len(games_to_enrich))
-                
+            count = self.local_catalog.ingest(games)
+            if count:
+                logger.debug(f"本地目录收录 {count} 款游戏")
         except Exception as e:
-            logger.error(f"搜索Steam游戏出错: {e}")
-            print(f"❌ 搜索出错: {e}")
-            
-        return games
+            logger.error(f"收录本地目录出错: {e}")
+    
+    def get_local_catalog_stats(self) -> Dict:
+        """获取本地游戏目录统计"""
+        stats = self.local_catalog.get_stats()
+        stats['search_mode'] = self.search_mode
+        return stats
+    
+    def get_resilience_stats(self) -> Dict:
+        """获取重试与熔断统计"""
+        return steam_resilience.get_stats()
+    
+    def get_cache_stats(self) -> Dict:
+        """获取缓存统计（appdetails内存 + 持久化，搜索结果页）"""
+        stats = self.app_cache.get_stats()
+        stats['catalog_store'] = self.store.get_stats()
+        stats['search'] = self.search_cache.get_stats()
+        return stats
     
-    def _parse_game_item(self, item) -> Optional[Dict]:
+    def _parse_search_page(self, html: str) -> List[Dict]:
+        """解析搜索结果页，返回所有结果行的游戏信息（引擎由 steam.search_parser 配置）"""
+        if self.search_parser == 'fast':
+            rows = parse_search_rows(html)
+            if rows is not None:
+                return rows
+            logger.warning("搜索结果页结构无法识别，回落到BeautifulSoup解析")
+        
+        rows = []
+        for item in find_row_elements(html, strain=self.search_parser != 'bs4'):
+            game_info = self._parse_game_item(item)
+            if game_info:
+                rows.append(game_info)
+        return rows
+    
+    @staticmethod
+    def _copy_rows(rows: List[GameRecord]) -> List[GameRecord]:
+        """复制缓存中的结果行，调用方后续丰富信息时不会污染缓存"""
+        return [GameRecord.from_dict(row) for row in rows]
+    
+    def _parse_game_item(self, item) -> Optional[GameRecord]:
         """解析游戏搜索结果项"""
         try:
             # 获取AppID
@@ -148,23 +249,13 @@ class SteamCrawler:
                 price_elem = item.find('div', class_='search_price')
             
             if price_elem:
-                price_text = price_elem.text.strip()
-                # 提取价格数字
-                price_match = re.search(r'¥\s*([\d,]+\.?\d*)', price_text)
-                if price_match:
-                    price = float(price_match.group(1).replace(',', ''))
-                elif '免费' in price_text or 'Free' in price_text:
-                    price = 0.0
+                price = parse_price(price_elem.text.strip())
             
             # 获取折扣信息
             discount = 0
             discount_elem = item.find('div', class_='discount_pct')
             if discount_elem:
-                discount_text = discount_elem.text.strip().replace('-', '').replace('%', '')
-                try:
-                    discount = int(discount_text)
-                except:
-                    discount = 0
+                discount = parse_discount(discount_elem.text)
             
             # 获取游戏链接
             game_url = item.get('href', '')
@@ -175,117 +266,110 @@ class SteamCrawler:
             if release_elem:
                 release_date = release_elem.text.strip()
             
-            return {
-                'app_id': app_id,
-                'name': title,
-                'price': price,
-                'discount': discount,
-                'url': game_url,
-                'release_date': release_date,
-                'tags': [],
-                'description': "",
-                'reviews': ""
-            }
+            return make_row(app_id, title, price, discount, game_url, release_date)
         except Exception as e:
             print(f"解析游戏项出错: {e}")
             return None
     
-    def _enrich_game_info(self, game: Dict):
-        """丰富游戏详细信息"""
-        try:
-            app_id = game.get('app_id')
-            if not app_id:
-                return
-            
-            # 使用Steam Store API获取详细信息
-            api_url = f"{self.api_url}/appdetails"
-            params = {
-                'appids': app_id,
-                'l': self.language,
-                'cc': self.country_code
-            }
-            
-            response = requests.get(api_url, params=params, headers=self.headers, timeout=self.request_timeout)
-            data = response.json()
-            
-            if data and app_id in data and data[app_id].get('success'):
-                game_data = data[app_id]['data']
-                
-                # 更新游戏信息
-                game['description'] = game_data.get('short_description', '')
-                game['tags'] = [genre['description'] for genre in game_data.get('genres', [])]
-                
-                # 添加类别标签
-                if game_data.get('categories'):
-                    categories = [cat['description'] for cat in game_data.get('categories', [])]
-                    game['tags'].extend(categories[:3])  # 只取前3个类别
-                
-                # 评价信息
-                if game_data.get('metacritic'):
-                    game['metacritic_score'] = game_data['metacritic'].get('score', 0)
-                
-                # 开发商和发行商
-                game['developers'] = game_data.get('developers', [])
-                game['publishers'] = game_data.get('publishers', [])
-                
-                # 支持的语言
-                game['supported_languages'] = game_data.get('supported_languages', '')
-                
-        except Exception as e:
-            logger.debug(f"丰富游戏信息出错 (AppID: {game.get('app_id')}): {e}")
+    def _check_response(self, response):
+        """检查响应状态：429/5xx抛出可重试错误，其他4xx抛出SteamClientError"""
+        classify_status(response.status_code, response.headers.get('Retry-After'))
     
-    def get_game_details(self, app_id: str) -> Optional[Dict]:
-        """获取单个游戏的详细信息"""
+    def _decode_app_details(self, response) -> Dict:
+        """解析appdetails响应体；HTML错误页视为可重试错误，null视为被限流"""
+        self._check_response(response)
         try:
-            api_url = f"{self.api_url}/appdetails"
-            params = {
-                'appids': app_id,
-                'l': self.language,
-                'cc': self.country_code
-            }
-            
-            response = requests.get(api_url, params=params, headers=self.headers, timeout=self.request_timeout)
             data = response.json()
-            
-            if data and app_id in data and data[app_id].get('success'):
-                game_data = data[app_id]['data']
-                
-                # 格式化返回结果
-                formatted_data = {
-                    'app_id': app_id,
-                    'name': game_data.get('name', ''),
-                    'type': game_data.get('type', ''),
-                    'description': game_data.get('detailed_description', ''),
-                    'short_description': game_data.get('short_description', ''),
-                    'about_the_game': game_data.get('about_the_game', ''),
-                    'developers': game_data.get('developers', []),
-                    'publishers': game_data.get('publishers', []),
-                    'release_date': game_data.get('release_date', {}).get('date', ''),
-                    'price': self._parse_price_data(game_data.get('price_overview', {})),
-                    'is_free': game_data.get('is_free', False),
-                    'supported_languages': game_data.get('supported_languages', ''),
-                    'header_image': game_data.get('header_image', ''),
-                    'website': game_data.get('website', ''),
-                    'platforms': game_data.get('platforms', {}),
-                    'categories': [cat['description'] for cat in game_data.get('categories', [])],
-                    'genres': [genre['description'] for genre in game_data.get('genres', [])],
-                    'screenshots': [ss['path_thumbnail'] for ss in game_data.get('screenshots', [])[:5]],
-                    'metacritic_score': game_data.get('metacritic', {}).get('score', None),
-                    'recommendations': game_data.get('recommendations', {}).get('total', None),
-                    'achievements': game_data.get('achievements', {}).get('total', 0),
-                    'dlc': game_data.get('dlc', []),
-                    'pc_requirements': game_data.get('pc_requirements', {}),
-                    'legal_notice': game_data.get('legal_notice', ''),
-                }
-                
-                return formatted_data
-                
-        except Exception as e:
-            logger.error(f"获取游戏详情出错 (AppID: {app_id}): {e}")
-            print(f"❌ 获取游戏详情出错 (AppID: {app_id}): {e}")
-            
+        except ValueError:
+            raise RetryableError('appdetails返回了无法解析的响应')
+        if data is None:
+            raise ThrottledError('appdetails返回null（疑似被限流）')
+        return data
+    
+    def _extract_app_data(self, data: Optional[Dict], app_id: str) -> Optional[Dict]:
+        """从appdetails响应中取出游戏数据"""
+        if data and app_id in data and data[app_id].get('success'):
+            return data[app_id]['data']
         return None
     
+    def _set_enrichment_result(self, game: Dict, game_data: Optional[Dict]):
+        """根据appdetails数据设置丰富结果"""
+        game.pop('enrichment_error', None)
+        if game_data:
+            self._apply_app_details(game, game_data)
+            game['enrichment_status'] = self.ENRICHMENT_OK
+        else:
+            game['enrichment_status'] = self.ENRICHMENT_NOT_FOUND
+    
+    def _set_enrichment_error(self, game: Dict, error: Exception):
+        """记录丰富失败的原因（熔断时为skipped，其余为failed）"""
+        if isinstance(error, CircuitOpenError):
+            game['enrichment_status'] = self.ENRICHMENT_SKIPPED
+        else:
+            game['enrichment_status'] = self.ENRICHMENT_FAILED
+        game['enrichment_error'] = str(error)
+        logger.warning(f"丰富游戏信息失败 (AppID: {game.get('app_id')}): {error}")
+    
+    def _apply_app_details(self, game: Dict, game_data: Dict):
+        """用appdetails数据丰富搜索结果项"""
+        # 更新游戏信息
+        game['description'] = game_data.get('short_description', '')
+        tags = [genre['description'] for genre in game_data.get('genres', [])]
+        
+        # 添加类别标签
+        if game_data.get('categories'):
+            categories = [cat['description'] for cat in game_data.get('categories', [])]
+            tags.extend(categories[:3])  # 只取前3个类别
+        game['tags'] = tags
+        
+        # 评价信息
+        if game_data.get('metacritic'):
+            game['metacritic_score'] = game_data['metacritic'].get('score', 0)
+        
+        # 开发商和发行商
+        game['developers'] = game_data.get('developers', [])
+        game['publishers'] = game_data.get('publishers', [])
+        
+        # 支持的语言
+        game['supported_languages'] = game_data.get('supported_languages', '')
+    
+    def _format_game_details(self, app_id: str, game_data: Dict) -> Dict:
+        """格式化单个游戏的详细信息"""
+        return {
+            'app_id': app_id,
+            'name': game_data.get('name', ''),
+            'type': game_data.get('type', ''),
+            'description': game_data.get('detailed_description', ''),
+            'short_description': game_data.get('short_description', ''),
+            'about_the_game': game_data.get('about_the_game', ''),
+            'developers': game_data.get('developers', []),
+            'publishers': game_data.get('publishers', []),
+            'release_date': game_data.get('release_date', {}).get('date', ''),
+            'price': self._parse_price_data(game_data.get('price_overview', {})),
+            'is_free': game_data.get('is_free', False),
+            'supported_languages': game_data.get('supported_languages', ''),
+            'header_image': game_data.get('header_image', ''),
+            'website': game_data.get('website', ''),
+            'platforms': game_data.get('platforms', {}),
+            'categories': [cat['description'] for cat in game_data.get('categories', [])],
+            'genres': [genre['description'] for genre in game_data.get('genres', [])],
+            'screenshots': [ss['path_thumbnail'] for ss in game_data.get('screenshots', [])[:5]],
+            'metacritic_score': game_data.get('metacritic', {}).get('score', None),
+            'recommendations': game_data.get('recommendations', {}).get('total', None),
+            'achievements': game_data.get('achievements', {}).get('total', 0),
+            'dlc': game_data.get('dlc', []),
+            'pc_requirements': game_data.get('pc_requirements', {}),
+            'legal_notice': game_data.get('legal_notice', ''),
+        }
+    
+    def _finish_game_details(self, app_id: str, game_data: Dict, fields: Optional[List[str]],
+                             max_bytes: Optional[int]) -> Dict:
+        """格式化详情；指定了字段或字节预算时做投影、HTML转纯文本和截断"""
+        details = self._format_game_details(app_id, game_data)
+        if fields is None and max_bytes is None:
+            return details
+        return project_details(details, fields, max_bytes)
+    
     def _parse_price_data(self, price_overview: Dict) -> Dict:
         """解析价格数据"""
         if not price_overview:
@@ -303,13 +387,397 @@ class SteamCrawler:
             'currency': price_overview.get('currency', 'CNY')
         }
     
-    def get_game_by_name(self, game_name: str) -> Optional[Dict]:
-        """根据游戏名称获取详细信息"""
+    def _collect_search_results(self, rows: List[Dict], max_price: Optional[float]) -> List[Dict]:
+        """按价格过滤搜索结果"""
+        games = []
+        for game_info in rows:
+            # 价格过滤
+            if max_price and game_info.get('price', float('inf')) > max_price:
+                continue
+            games.append(game_info)
+            
+            # 显示进度
+            print(f"  找到: {game_info['name']} - ¥{game_info['price']}")
+        return games
+    
+    def _collect_discounted_games(self, rows: List[Dict], min_discount: int,
+                                  max_price: Optional[float], max_results: int) -> List[Dict]:
+        """按折扣、价格过滤特惠页结果"""
+        games = []
+        for game_info in rows:
+            # 过滤折扣和价格
+            if game_info.get('discount', 0) >= min_discount:
+                if max_price is None or game_info.get('price', float('inf')) <= max_price:
+                    games.append(game_info)
+                    print(f"  找到: {game_info['name']} - ¥{game_info['price']} (-{game_info['discount']}%)")
+                    
+                    if len(games) >= max_results:
+                        break
+        
+        # 按折扣力度排序
+        games.sort(key=lambda x: x.get('discount', 0), reverse=True)
+        return games
+    
+    def _collect_free_games(self, rows: List[Dict], tags: Optional[List[str]],
+                            max_results: int) -> List[Dict]:
+        """按标签过滤免费游戏页结果"""
+        games = []
+        for game_info in rows:
+            if game_info.get('price', 0) == 0:
+                # 标签过滤（如果指定）
+                if tags:
+                    game_tags_lower = [t.lower() for t in game_info.get('tags', [])]
+                    if not any(tag.lower() in game_tags_lower for tag in tags):
+                        continue
+                
+                games.append(game_info)
+                print(f"  找到: {game_info['name']} - 免费")
+                
+                if len(games) >= max_results:
+                    break
+        return games
+    
+    def _collect_top_games(self, rows: List[Dict], max_results: int) -> List[Dict]:
+        """为热门榜结果添加排名"""
+        games = []
+        for game_info in rows:
+            # 添加排名信息
+            game_info['rank'] = len(games) + 1
+            games.append(game_info)
+            print(f"  #{len(games)} {game_info['name']} - ¥{game_info['price']}")
+            
+            if len(games) >= max_results:
+                break
+        return games
+
+
+class SteamCrawler(SteamCrawlerBase):
+    """Steam游戏信息爬虫"""
+    
+    def __init__(self):
+        super().__init__()
+        
+        # 进程内共享的连接池会话，跨调用、跨MCP请求复用TCP/TLS连接
+        self.http = http_client
+        
+        logger.info(f"Steam爬虫初始化完成 (超时={self.request_timeout}s, 延迟={self.search_delay}s)")
+    
+    def _fetch_search_page(self, params: Dict) -> str:
+        """请求一页搜索结果的HTML（失败时按重试策略重试）"""
+        return steam_resilience.call('search', lambda: self._send_search_request(params))
+    
+    def _send_search_request(self, params: Dict) -> str:
+        with tracing.span('steam.search_page', kind='client', start=params.get('start')) as span:
+            self._wait_rate_limit('search', span)
+            try:
+                response = self.http.get(self.search_results_url, params=params, headers=self.headers,
+                                         timeout=self.request_timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                raise RetryableError(f'请求搜索页失败: {e}')
+            span.set_attribute('status_code', response.status_code)
+            return self._extract_results_html(response)
+    
+    def _load_search_rows(self, params: Dict, key: tuple) -> List[Dict]:
+        """请求并解析搜索结果页，写入缓存（相同参数的并发请求合并为一次）"""
+        return search_flight.do(key, self._request_search_rows, params, key)
+    
+    def _request_search_rows(self, params: Dict, key: tuple) -> List[Dict]:
+        rows = self._parse_search_page(self._fetch_search_page(params))
+        self.search_cache.set(key, rows)
+        return rows
+    
+    def _refresh_search_rows(self, params: Dict, key: tuple):
+        """后台刷新过期的搜索结果页缓存"""
+        try:
+            self._load_search_rows(params, key)
+            logger.debug(f"搜索结果缓存已后台刷新: {key}")
+        except Exception as e:
+            logger.warning(f"后台刷新搜索结果缓存失败: {e}")
+        finally:
+            self.search_cache.end_refresh(key)
+    
+    def _fetch_search_rows(self, params: Dict, use_cache: bool = True) -> List[Dict]:
+        """
+        获取搜索结果页解析后的结果行（stale-while-revalidate）
+        
+        缓存新鲜时直接返回；缓存过期但仍可用时先返回旧数据，同时在后台线程刷新；
+        否则同步请求Steam。
+        """
+        key = self.search_cache.make_key(params)
+        if use_cache:
+            rows, state = self.search_cache.get(key)
+            if rows is not None:
+                if state == self.search_cache.STALE and self.search_cache.begin_refresh(key):
+                    _refresh_executor.submit(self._refresh_search_rows, params, key)
+                return self._copy_rows(rows)
+        
+        return self._copy_rows(self._load_search_rows(params, key))
+    
+    def _iter_search_pages(self, params: Dict, max_rows: int,
+                           use_cache: bool = True) -> Iterator[Tuple[int, List[Dict]]]:
+        """
+        分页获取搜索结果，按到达顺序产出 (起始位置, 结果行)
+        
+        第一页单独请求，结果不足一页时结束；否则其余页面并发请求，先到先产出，
+        调用方可以边接收边处理（如立即提交详情获取）。
+        """
+        page_size = self.search_page_size
+        first_rows = self._fetch_search_rows(self._build_page_params(params, 0), use_cache=use_cache)
+        yield 0, first_rows
+        
+        starts = list(range(page_size, max_rows, page_size))
+        if len(first_rows) < page_size or not starts:
+            return
+        
+        max_workers = max(1, min(len(starts), self.search_page_concurrency))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_start = {
+                executor.submit(tracing.bind(self._fetch_search_rows, queue='search_page'),
+                                self._build_page_params(params, start), use_cache): start
+                for start in starts
+            }
+            for future in as_completed(future_to_start):
+                start = future_to_start[future]
+                try:
+                    yield start, future.result()
+                except Exception as e:
+                    logger.warning(f"获取搜索结果分页失败 (start={start}): {e}")
+    
+    def _fetch_rows_paged(self, params: Dict, max_rows: int, use_cache: bool = True) -> List[Dict]:
+        """分页获取最多max_rows行去重后的搜索结果（保持Steam的排序）"""
+        return self._merge_pages(self._iter_search_pages(params, max_rows, use_cache=use_cache), max_rows)
+    
+    def _request_app_data(self, app_id: str, filters: Optional[str] = None):
+        """请求appdetails接口，返回游戏数据（失败时按重试策略重试）"""
+        data = steam_resilience.call('appdetails', lambda: self._send_app_details_request(app_id, filters))
+        return self._extract_app_data(data, app_id)
+    
+    def _send_app_details_request(self, app_id: str, filters: Optional[str]) -> Dict:
+        api_url = f"{self.api_url}/appdetails"
+        params = self._build_app_details_params(app_id, filters=filters)
+        with tracing.span('steam.appdetails', kind='client', app_id=app_id, filters=filters) as span:
+            self._wait_rate_limit('appdetails', span)
+            try:
+                response = self.http.get(api_url, params=params, headers=self.headers,
+                                         timeout=self.request_timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                raise RetryableError(f'请求appdetails失败: {e}')
+            span.set_attribute('status_code', response.status_code)
+            return self._decode_app_details(response)
+    
+    @staticmethod
+    def _wait_rate_limit(endpoint: str, span):
+        """等待限流令牌，排队时间记录为 queue.rate_limit span"""
+        start_ns = time.time_ns()
+        waited = steam_rate_limiter.acquire(endpoint)
+        if waited > 0:
+            tracing.record_span('queue.rate_limit', start_ns, endpoint=endpoint)
+            span.set_attribute('rate_limit_wait_ms', round(waited * 1000, 1))
+    
+    def _fetch_app_data(self, app_id: str, use_cache: bool = True, need_price: bool = True) -> Optional[Dict]:
+        """
+        获取appdetails游戏数据（优先读缓存）
+        
+        Args:
+            app_id: 游戏AppID
+            use_cache: 是否读取缓存（False时强制请求并刷新缓存）
+            need_price: 是否需要新鲜的价格字段（仅丰富搜索结果时不需要）
+        
+        相同 (app, 语言, 地区) 的并发调用合并为一次请求，其余调用方共享结果。
+        """
+        key = (self._store_key(app_id), use_cache, need_price)
+        return app_data_flight.do(key, self._load_app_data, app_id, use_cache, need_price)
+    
+    def _load_app_data(self, app_id: str, use_cache: bool, need_price: bool) -> Optional[Dict]:
+        if use_cache:
+            cached, price_fresh = self._get_cached_app_data(app_id, need_price)
+            if cached is not None:
+                if price_fresh or not need_price:
+                    return cached
+                # 静态字段仍有效，只刷新价格
+                price_data = self._request_app_data(app_id, filters='price_overview')
+                if price_data is not None:
+                    merged = self._merge_price_data(app_id, price_data)
+                    if merged is not None:
+                        return merged
+        
+        game_data = self._request_app_data(app_id)
+        self._cache_app_data(app_id, game_data)
+        return game_data
+    
+    def _enrich_games(self, games: Iterable[Dict], max_workers: int, log_progress: bool = False,
+                      use_cache: bool = True):
+        """
+        使用线程池并行获取游戏详细信息
+        
+        games可以是生成器：每产出一款游戏就立即提交任务，分页搜索时无需等待所有页面返回。
+        """
+        print(f"\n🔍 获取游戏详细信息（并行处理）...")
+        # 并发数不超过连接池大小，保证连接可复用（线程按需创建）
+        max_workers = max(1, min(max_workers, self.http.pool_size))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # 提交所有任务
+            future_to_game = {
+                executor.submit(tracing.bind(self._enrich_game_info, queue='enrich', name='steam.enrich',
+                                             app_id=game.get('app_id')), game, use_cache): game
+                for game in games
+            }
+            total = len(future_to_game)
+            
+            # 收集完成的任务
+            completed = 0
+            for future in as_completed(future_to_game):
+                game = future_to_game[future]
+                completed += 1
+                try:
+                    future.result()  # 获取结果,如果有异常会在这里抛出
+                    print(f"  [{completed}/{total}] 已获取: {game['name']}")
+                    if log_progress:
+                        logger.log_search_game(game['name'], completed, total)
+                except Exception as e:
+                    logger.error(f"获取 {game['name']} 详情失败: {e}")
+        
+    def search_games(self, keywords: str, max_price: Optional[float] = None, 
+                     tags: Optional[List[str]] = None, max_results: int = None,
+                     use_cache: bool = True) -> List[Dict]:
+        """
+        搜索Steam游戏
+        
+        Args:
+            keywords: 搜索关键词
+            max_price: 最大价格（人民币）
+            tags: 游戏标签列表
+            max_results: 最大返回结果数（None则使用配置文件的值）
+            use_cache: 是否使用缓存（False时绕过缓存直接请求Steam）
+            
+        Returns:
+            游戏信息列表
+        """
+        if max_results is None:
+            max_results = config.get('steam.max_search_results', 50)
+        
+        logger.log_search_start(f"关键词='{keywords}', 最大价格={max_price}, 最大结果={max_results}")
+        
+        local_games = self._search_local(keywords, max_price, tags, max_results)
+        if local_games is not None:
+            logger.log_search_complete(len(local_games))
+            return local_games
+        
+        print(f"\n🔍 正在搜索Steam游戏: '{keywords}' (最多返回 {max_results} 款)...")
+        
+        games = []
+        
+        # 构建搜索参数
+        params = self._build_search_params(term=keywords)
+        
+        # 添加价格过滤
+        if max_price:
+            params['maxprice'] = int(max_price)
+        
+        max_rows = max_results * 2
+        seen = set()
+        positions = {}
+        
+        def stream_games():
+            """分页到达后立即去重、按价格过滤，并把游戏交给详情获取"""
+            for start, rows in self._iter_search_pages(params, max_rows, use_cache=use_cache):
+                fresh = []
+                for index, row in enumerate(rows):
+                    if start + index >= max_rows or row['app_id'] in seen:
+                        continue
+                    seen.add(row['app_id'])
+                    positions[row['app_id']] = start + index
+                    fresh.append(row)
+                page_games = self._collect_search_results(fresh, max_price)
+                logger.info(f"搜索结果分页 (start={start}) 返回 {len(rows)} 行，新增 {len(page_games)} 款游戏")
+                games.extend(page_games)
+                yield from page_games
+        
+        try:
+            # 使用多线程并行获取详细信息,最多max_results * 2个并发
+            self._enrich_games(stream_games(), max_workers=max_rows, log_progress=True, use_cache=use_cache)
+            # 分页按到达顺序处理，最后恢复Steam的排序
+            games.sort(key=lambda game: positions[game['app_id']])
+            self._ingest_games(games)
+            
+            logger.info(f"Steam搜索返回 {len(seen)} 个结果，过滤后得到 {len(games)} 款游戏")
+            logger.log_search_complete(len(games))
+                
+        except Exception as e:
+            logger.error(f"搜索Steam游戏出错: {e}")
+            print(f"❌ 搜索出错: {e}")
+            
+        return games
+    
+    def _enrich_game_info(self, game: Dict, use_cache: bool = True):
+        """丰富游戏详细信息，结果状态写入 game['enrichment_status']"""
+        try:
+            app_id = game.get('app_id')
+            if not app_id:
+                game['enrichment_status'] = self.ENRICHMENT_NOT_FOUND
+                return
+            
+            # 使用Steam Store API获取详细信息（价格来自搜索结果，不需要刷新缓存中的价格）
+            game_data = self._fetch_app_data(app_id, use_cache=use_cache, need_price=False)
+            self._set_enrichment_result(game, game_data)
+                
+        except Exception as e:
+            self._set_enrichment_error(game, e)
+    
+    def retry_failed_enrichment(self, games: List[Dict], use_cache: bool = True) -> int:
+        """
+        重新获取丰富失败（failed / skipped）的游戏详情
+        
+        Returns:
+            重试后仍未成功的游戏数量
+        """
+        pending = [game for game in games if game.get('enrichment_status') in self.ENRICHMENT_RETRYABLE]
+        if pending:
+            logger.info(f"重新获取{len(pending)}款游戏的详细信息")
+            # 先单独请求一款作为熔断器半开状态的探测请求，成功后其余并行重试
+            self._enrich_game_info(pending[0], use_cache)
+            if pending[0].get('enrichment_status') == self.ENRICHMENT_OK and len(pending) > 1:
+                self._enrich_games(pending[1:], max_workers=len(pending) - 1, use_cache=use_cache)
+        return sum(1 for game in pending if game.get('enrichment_status') != self.ENRICHMENT_OK)
+    
+    def get_game_details(self, app_id: str, use_cache: bool = True, fields: Optional[List[str]] = None,
+                         max_bytes: Optional[int] = None) -> Optional[Dict]:
+        """
+        获取单个游戏的详细信息
+        
+        Args:
+            app_id: Steam AppID
+            use_cache: 是否使用缓存（False时绕过缓存）
+            fields: 只返回这些字段（app_id、name总是返回），None返回全部字段
+            max_bytes: 紧凑JSON编码后的字节预算，0表示不限
+            
+        指定fields或max_bytes时HTML字段转换为纯文本并按字段截断；都不指定时返回原始详情。
+        
+        Raises:
+            ValueError: fields中包含未知字段
+        """
+        fields = normalize_fields(fields)
+        try:
+            game_data = self._fetch_app_data(app_id, use_cache=use_cache)
+            if game_data:
+                # 格式化返回结果
+                return self._finish_game_details(app_id, game_data, fields, max_bytes)
+                
+        except Exception as e:
+            logger.error(f"获取游戏详情出错 (AppID: {app_id}): {e}")
+            print(f"❌ 获取游戏详情出错 (AppID: {app_id}): {e}")
+            
+        return None
+    
+    def get_game_by_name(self, game_name: str, use_cache: bool = True, fields: Optional[List[str]] = None,
+                         max_bytes: Optional[int] = None) -> Optional[Dict]:
+        """根据游戏名称获取详细信息（fields、max_bytes同get_game_details）"""
+        fields = normalize_fields(fields)
         logger.info(f"根据名称搜索游戏: {game_name}")
         print(f"\n🔍 搜索游戏: {game_name}...")
         
         # 先搜索游戏获取AppID
-        games = self.search_games(game_name, max_results=1)
+        games = self.search_games(game_name, max_results=1, use_cache=use_cache)
         
         if not games:
             logger.warning(f"未找到游戏: {game_name}")
@@ -318,16 +786,17 @@ class SteamCrawler:
         
         # 获取第一个搜索结果的详细信息
         app_id = games[0]['app_id']
-        return self.get_game_details(app_id)
+        return self.get_game_details(app_id, use_cache=use_cache, fields=fields, max_bytes=max_bytes)
     
     def get_discounted_games(self, min_discount: int = 0, max_price: Optional[float] = None, 
-                            max_results: int = 20) -> List[Dict]:
+                            max_results: int = 20, use_cache: bool = True) -> List[Dict]:
         """获取折扣游戏
         
         Args:
             min_discount: 最低折扣百分比 (0-100)
             max_price: 最大价格（人民币）
             max_results: 最大返回结果数
+            use_cache: 是否使用缓存
             
         Returns:
             折扣游戏列表
@@ -339,44 +808,16 @@ class SteamCrawler:
         
         try:
             # 使用Steam的特惠页面
-            specials_url = f"{self.base_url}/search/"
-            params = {
-                'specials': 1,  # 只显示特惠商品
-                'l': self.language,
-                'cc': self.country_code,
-                'ndl': 1,
-            }
+            params = self._build_search_params(specials=1)  # 只显示特惠商品
             
             if max_price:
                 params['maxprice'] = int(max_price)
             
-            response = requests.get(specials_url, params=params, headers=self.headers, 
-                                   timeout=self.request_timeout)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            game_items = soup.find_all('a', class_='search_result_row', limit=max_results * 3)
+            rows = self._fetch_rows_paged(params, max_results * 3, use_cache=use_cache)
             
-            logger.info(f"Steam折扣页返回 {len(game_items)} 个结果")
-            
-            for item in game_items:
-                try:
-                    game_info = self._parse_game_item(item)
-                    if game_info:
-                        # 过滤折扣和价格
-                        if game_info.get('discount', 0) >= min_discount:
-                            if max_price is None or game_info.get('price', float('inf')) <= max_price:
-                                games.append(game_info)
-                                print(f"  找到: {game_info['name']} - ¥{game_info['price']} (-{game_info['discount']}%)")
-                                
-                                if len(games) >= max_results:
-                                    break
-                except Exception as e:
-                    logger.error(f"解析折扣游戏项出错: {e}")
-                    continue
+            logger.info(f"Steam折扣页返回 {len(rows)} 个结果")
             
-            # 按折扣力度排序
-            games.sort(key=lambda x: x.get('discount', 0), reverse=True)
+            games = self._collect_discounted_games(rows, min_discount, max_price, max_results)
             
             logger.info(f"获取到 {len(games)} 款折扣游戏")
             print(f"✅ 找到 {len(games)} 款符合条件的折扣游戏")
@@ -387,12 +828,14 @@ class SteamCrawler:
         
         return games
     
-    def get_free_games(self, max_results: int = 20, tags: Optional[List[str]] = None) -> List[Dict]:
+    def get_free_games(self, max_results: int = 20, tags: Optional[List[str]] = None,
+                       use_cache: bool = True) -> List[Dict]:
         """获取免费游戏
         
         Args:
             max_results: 最大返回结果数
             tags: 可选的游戏标签过滤列表
+            use_cache: 是否使用缓存
             
         Returns:
             免费游戏列表
@@ -404,64 +847,21 @@ class SteamCrawler:
         
         try:
             # 使用Steam的免费游戏页面
-            search_url = f"{self.base_url}/search/"
-            params = {
-                'maxprice': 'free',  # 只显示免费游戏
-                'l': self.language,
-                'cc': self.country_code,
-                'ndl': 1,
-            }
-            
-            response = requests.get(search_url, params=params, headers=self.headers, 
-                                   timeout=self.request_timeout)
-            response.raise_for_status()
+            params = self._build_search_params(maxprice='free')  # 只显示免费游戏
             
-            soup = BeautifulSoup(response.text, 'html.parser')
-            game_items = soup.find_all('a', class_='search_result_row', limit=max_results * 3)
+            rows = self._fetch_rows_paged(params, max_results * 3, use_cache=use_cache)
             
-            logger.info(f"Steam免费游戏页返回 {len(game_items)} 个结果")
+            logger.info(f"Steam免费游戏页返回 {len(rows)} 个结果")
             
-            for item in game_items:
-                try:
-                    game_info = self._parse_game_item(item)
-                    if game_info and game_info.get('price', 0) == 0:
-                        # 标签过滤（如果指定）
-                        if tags:
-                            game_tags_lower = [t.lower() for t in game_info.get('tags', [])]
-                            if not any(tag.lower() in game_tags_lower for tag in tags):
-                                continue
-                        
-                        games.append(game_info)
-                        print(f"  找到: {game_info['name']} - 免费")
-                        
-                        if len(games) >= max_results:
-                            break
-                except Exception as e:
-                    logger.error(f"解析免费游戏项出错: {e}")
-                    continue
+            games = self._collect_free_games(rows, tags, max_results)
             
             logger.info(f"获取到 {len(games)} 款免费游戏")
             print(f"✅ 找到 {len(games)} 款免费游戏")
             
             # 获取详细信息（并行）
             if games:
-                print(f"\n🔍 获取游戏详细信息（并行处理）...")
-                max_workers = min(10, len(games))
-                with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                    future_to_game = {
-                        executor.submit(self._enrich_game_info, game): game 
-                        for game in games
-                    }
-                    
-                    completed = 0
-                    for future in as_completed(future_to_game):
-                        game = future_to_game[future]
-                        completed += 1
-                        try:
-                            future.result()
-                            print(f"  [{completed}/{len(games)}] 已获取: {game['name']}")
-                        except Exception as e:
-                            logger.error(f"获取 {game['name']} 详情失败: {e}")
+                self._enrich_games(games, max_workers=10, use_cache=use_cache)
+                self._ingest_games(games)
             
         except Exception as e:
             logger.error(f"获取免费游戏出错: {e}")
@@ -469,7 +869,8 @@ class SteamCrawler:
         
         return games
     
-    def get_top_games(self, max_results: int = 20, filter_type: str = 'topsellers') -> List[Dict]:
+    def get_top_games(self, max_results: int = 20, filter_type: str = 'topsellers',
+                      use_cache: bool = True) -> List[Dict]:
         """获取Steam热门游戏排行
         
         Args:
@@ -478,6 +879,7 @@ class SteamCrawler:
                 - 'topsellers': 畅销榜（默认）
                 - 'popularnew': 热门新品
                 - 'trendingweek': 本周热门
+            use_cache: 是否使用缓存
                 
         Returns:
             热门游戏列表
@@ -489,66 +891,42 @@ class SteamCrawler:
         
         try:
             # 使用Steam的热门游戏页面
-            search_url = f"{self.base_url}/search/"
-            params = {
-                'filter': filter_type,
-                'l': self.language,
-                'cc': self.country_code,
-                'ndl': 1,
-            }
+            params = self._build_search_params(filter=filter_type)
             
-            response = requests.get(search_url, params=params, headers=self.headers, 
-                                   timeout=self.request_timeout)
-            response.raise_for_status()
+            rows = self._fetch_rows_paged(params, max_results * 2, use_cache=use_cache)
             
-            soup = BeautifulSoup(response.text, 'html.parser')
-            game_items = soup.find_all('a', class_='search_result_row', limit=max_results * 2)
+            logger.info(f"Steam热门榜返回 {len(rows)} 个结果")
             
-            logger.info(f"Steam热门榜返回 {len(game_items)} 个结果")
-            
-            for idx, item in enumerate(game_items, 1):
-                try:
-                    game_info = self._parse_game_item(item)
-                    if game_info:
-                        # 添加排名信息
-                        game_info['rank'] = len(games) + 1
-                        games.append(game_info)
-                        print(f"  #{len(games)} {game_info['name']} - ¥{game_info['price']}")
-                        
-                        if len(games) >= max_results:
-                            break
-                except Exception as e:
-                    logger.error(f"解析热门游戏项出错: {e}")
-                    continue
+            games = self._collect_top_games(rows, max_results)
             
             logger.info(f"获取到 {len(games)} 款热门游戏")
             print(f"✅ 找到 {len(games)} 款热门游戏")
             
             # 获取详细信息（并行）
             if games:
-                print(f"\n🔍 获取游戏详细信息（并行处理）...")
-                max_workers = min(10, len(games))
-                with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                    future_to_game = {
-                        executor.submit(self._enrich_game_info, game): game 
-                        for game in games
-                    }
-                    
-                    completed = 0
-                    for future in as_completed(future_to_game):
-                        game = future_to_game[future]
-                        completed += 1
-                        try:
-                            future.result()
-                            print(f"  [{completed}/{len(games)}] 已获取: {game['name']}")
-                        except Exception as e:
-                            logger.error(f"获取 {game['name']} 详情失败: {e}")
+                self._enrich_games(games, max_workers=10, use_cache=use_cache)
+                self._ingest_games(games)
             
         except Exception as e:
             logger.error(f"获取热门游戏出错: {e}")
             print(f"❌ 获取热门游戏出错: {e}")
         
         return games
+    
+    def get_pool_stats(self) -> Dict:
+        """获取HTTP连接池统计（复用连接数 / 新建连接数）"""
+        return self.http.get_stats()
+    
+    def get_rate_limit_stats(self) -> Dict:
+        """获取Steam接口限流排队统计"""
+        return steam_rate_limiter.get_stats()
+    
+    def get_coalesce_stats(self) -> Dict:
+        """获取请求合并统计（合并掉的请求数即节省的Steam请求数）"""
+        return {
+            'appdetails': app_data_flight.get_stats(),
+            'search': search_flight.get_stats(),
+        }
 
 
 if __name__ == "__main__":
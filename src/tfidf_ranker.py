@@ -0,0 +1,168 @@
+"""
+TF-IDF相似度排序模块
+对候选游戏的描述与标签建立TF-IDF索引（中文按字符n-gram切分，英文按单词切分），
+用一次稀疏矩阵-向量乘法计算所有候选与需求分析结果的余弦相似度。
+安装了NumPy/SciPy时使用稀疏矩阵计算，否则退回纯Python实现（结果相同）。
+"""
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # NumPy/SciPy为可选依赖
+    np = None
+    sparse = None
+
+from config_loader import config
+from local_catalog import GENRE_ALIASES, split_words
+
+_HTML_TAG_PATTERN = re.compile(r'<[^>]+>')
+
+
+def analyze(text: str, ngram_min: int = 1, ngram_max: int = 2) -> List[str]:
+    """
+    把文本切分为词项：英文按单词，中文按ngram_min~ngram_max个字符的n-gram
+
+    例如 analyze("开放世界 RPG") -> ['rpg', '开', '放', '世', '界', '开放', '放世', '世界']
+    """
+    terms, runs = split_words(_HTML_TAG_PATTERN.sub(' ', text or ''))
+    for run in runs:
+        for n in range(ngram_min, ngram_max + 1):
+            terms.extend(run[i:i + n] for i in range(len(run) - n + 1))
+    return terms
+
+
+def game_document(game: Dict) -> str:
+    """候选游戏的检索文本：名称 + 标签 + 简介"""
+    return ' '.join([game.get('name', ''), ' '.join(game.get('tags', [])), game.get('description', '')])
+
+
+def analysis_document(analysis: Dict, user_query: str = '') -> str:
+    """需求分析结果的检索文本：关键词、标签、流派（英文流派追加对应的中文类型）以及原始查询"""
+    parts = list(analysis.get('keywords', [])) + list(analysis.get('tags', []))
+    for genre in analysis.get('genres', []):
+        parts.append(genre)
+        alias = GENRE_ALIASES.get(str(genre).lower())
+        if alias:
+            parts.append(alias)
+    parts.append(user_query)
+    return ' '.join(str(part) for part in parts if part)
+
+
+class TfidfIndex:
+    """一组文档的TF-IDF索引
+
+    词频取 1 + ln(tf)，IDF取平滑形式 ln((1 + N) / (1 + df)) + 1，每行做L2归一化，
+    因此查询向量与矩阵的乘积即余弦相似度。
+    """
+
+    def __init__(self, ngram_min: Optional[int] = None, ngram_max: Optional[int] = None):
+        if ngram_min is None:
+            ngram_min = config.get('recommendation.tfidf.ngram_min', 1)
+        if ngram_max is None:
+            ngram_max = config.get('recommendation.tfidf.ngram_max', 2)
+        self.ngram_min = ngram_min
+        self.ngram_max = ngram_max
+        self.vocabulary: Dict[str, int] = {}
+        self.idf: List[float] = []
+        self._matrix = None   # scipy.sparse.csr_matrix (文档数 × 词表大小)
+        self._rows: List[Dict[int, float]] = []   # 纯Python实现的稀疏行
+        self.size = 0
+
+    @property
+    def backend(self) -> str:
+        return 'scipy' if sparse is not None else 'python'
+
+    def _weigh(self, counts: Counter) -> Dict[int, float]:
+        """词频 -> 归一化后的TF-IDF稀疏向量（忽略词表外的词）"""
+        weights = {}
+        for term, count in counts.items():
+            column = self.vocabulary.get(term)
+            if column is not None:
+                weights[column] = (1.0 + math.log(count)) * self.idf[column]
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+        if norm > 0:
+            weights = {column: w / norm for column, w in weights.items()}
+        return weights
+
+    def fit(self, documents: Sequence[str]) -> 'TfidfIndex':
+        """对文档集合建立索引"""
+        term_counts = [Counter(analyze(doc, self.ngram_min, self.ngram_max)) for doc in documents]
+
+        document_frequency: Counter = Counter()
+        for counts in term_counts:
+            document_frequency.update(counts.keys())
+        self.vocabulary = {term: column for column, term in enumerate(document_frequency)}
+        total = len(documents)
+        self.idf = [math.log((1 + total) / (1 + document_frequency[term])) + 1 for term in self.vocabulary]
+        self.size = total
+
+        rows = [self._weigh(counts) for counts in term_counts]
+        if sparse is not None:
+            indptr = [0]
+            indices: List[int] = []
+            data: List[float] = []
+            for row in rows:
+                indices.extend(row.keys())
+                data.extend(row.values())
+                indptr.append(len(indices))
+            self._matrix = sparse.csr_matrix(
+                (np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int32), np.asarray(indptr)),
+                shape=(total, len(self.vocabulary))
+            )
+        else:
+            self._rows = rows
+        return self
+
+    def similarities(self, query: str) -> List[float]:
+        """查询文本与每篇文档的余弦相似度（与fit时的文档顺序一致）"""
+        if self.size == 0:
+            return []
+        query_vector = self._weigh(Counter(analyze(query, self.ngram_min, self.ngram_max)))
+        if not query_vector:
+            return [0.0] * self.size
+        if self._matrix is not None:
+            dense = np.zeros(len(self.vocabulary), dtype=np.float64)
+            dense[list(query_vector.keys())] = list(query_vector.values())
+            return (self._matrix @ dense).tolist()
+        return [sum(weight * row.get(column, 0.0) for column, weight in query_vector.items())
+                for row in self._rows]
+
+
+def rank_games(games: List[Dict], analysis: Dict, user_query: str = '') -> List[float]:
+    """
+    计算每款游戏与需求的相关度
+
+    Returns:
+        与games顺序一致的相关度，按本批最大值归一化到0~1（全部不相关时均为0）
+    """
+    if not games:
+        return []
+    index = TfidfIndex().fit([game_document(game) for game in games])
+    scores = index.similarities(analysis_document(analysis, user_query))
+    best = max(scores)
+    if best <= 0:
+        return [0.0] * len(scores)
+    return [score / best for score in scores]
+
+
+if __name__ == "__main__":
+    import time
+
+    sample_games = [
+        {'name': '空洞骑士', 'tags': ['动作', '冒险', '独立'], 'description': '在一个充满昆虫与英雄的废墟王国中探索、战斗'},
+        {'name': '星露谷物语', 'tags': ['模拟', '角色扮演', '独立'], 'description': '继承爷爷的老农场，种田、钓鱼、结交朋友'},
+        {'name': '文明VI', 'tags': ['策略'], 'description': '建立一个帝国，经受住时间的考验'},
+        {'name': '巫师3：狂猎', 'tags': ['角色扮演'], 'description': '开放世界角色扮演游戏，猎魔人的故事'},
+    ]
+    sample_analysis = {'keywords': ['open world'], 'tags': ['开放世界', '剧情'], 'genres': ['RPG']}
+
+    start = time.perf_counter()
+    relevance = rank_games(sample_games, sample_analysis, '想玩开放世界的角色扮演游戏')
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"后端: {TfidfIndex().backend}, 耗时 {elapsed:.2f}ms")
+    for game, value in sorted(zip(sample_games, relevance), key=lambda item: item[1], reverse=True):
+        print(f"  {value:.3f}  {game['name']}")
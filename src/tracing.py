@@ -0,0 +1,383 @@
+"""
+链路追踪模块
+为一次推荐请求记录span：各阶段耗时、每次HTTP请求与LLM调用、线程池和限流的排队等待。
+- 当前trace与父span保存在contextvars中：asyncio任务与asyncio.to_thread自动继承，
+  提交到线程池的任务通过 bind() 复制上下文
+- 没有活动的trace时 span() 只返回空操作对象，开销可以忽略
+- trace结束后可汇总为MCP响应中的timings，也可按OTLP/JSON格式导出到文件或OpenTelemetry Collector
+- 被合并的请求（single-flight的等待方）没有自己的span，通过 shared_from 关联执行方的trace汇总timings
+"""
+import contextvars
+import functools
+import inspect
+import json
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import requests
+
+from config_loader import config
+from logger import logger
+
+# OTLP的SpanKind与StatusCode
+SPAN_KINDS = {'internal': 1, 'server': 2, 'client': 3}
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+# 以此前缀命名的span汇总为timings中的阶段耗时
+STAGE_PREFIX = 'stage.'
+
+_current_trace: contextvars.ContextVar[Optional['Trace']] = contextvars.ContextVar('trace', default=None)
+_current_span: contextvars.ContextVar[Optional['Span']] = contextvars.ContextVar('span', default=None)
+
+# 导出在后台线程中进行，不阻塞请求
+_export_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='trace-export')
+
+
+class Span:
+    """一次操作的时间区间"""
+
+    __slots__ = ('name', 'span_id', 'parent_id', 'kind', 'start_ns', 'end_ns', 'attributes', 'status', 'error')
+
+    def __init__(self, name: str, parent_id: Optional[str] = None, kind: str = 'internal',
+                 attributes: Optional[Dict] = None, start_ns: Optional[int] = None):
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start_ns = start_ns if start_ns is not None else time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes or {}
+        self.status = STATUS_UNSET
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException):
+        self.status = STATUS_ERROR
+        self.error = f"{type(error).__name__}: {error}"
+
+    def end(self, end_ns: Optional[int] = None):
+        if self.end_ns is None:
+            self.end_ns = end_ns if end_ns is not None else time.time_ns()
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+
+class _NoopSpan:
+    """没有活动trace时使用的空span"""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def record_error(self, error: BaseException):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """一次请求的全部span（线程安全），超过max_spans后丢弃新的span并计数
+
+    shared_from：本次请求合并到了另一个请求的执行中时，指向实际执行的那次trace
+    """
+
+    def __init__(self, name: str, attributes: Optional[Dict] = None, max_spans: Optional[int] = None):
+        if max_spans is None:
+            max_spans = config.get('tracing.max_spans', 5000)
+        self.trace_id = secrets.token_hex(16)
+        self.max_spans = max_spans
+        self.root = Span(name, kind='server', attributes=attributes)
+        self.spans: List[Span] = [self.root]
+        self.dropped = 0
+        self.shared_from: Optional['Trace'] = None
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> bool:
+        with self._lock:
+            if len(self.spans) >= self.max_spans:
+                self.dropped += 1
+                return False
+            self.spans.append(span)
+            return True
+
+    def _finished_spans(self) -> List[Span]:
+        with self._lock:
+            return [span for span in self.spans if span.end_ns is not None]
+
+    def summary(self, slowest: int = 5) -> Dict:
+        """
+        汇总为timings：总耗时、各阶段耗时、各类操作的次数/累计/最大/p95耗时，以及最慢的几次调用
+
+        合并到其他请求时阶段与操作取自执行方的trace，并以shared_trace_id标明来源
+        """
+        if self.shared_from is not None:
+            result = self.shared_from.summary(slowest)
+            result['shared_trace_id'] = result['trace_id']
+            result['trace_id'] = self.trace_id
+            result['total_ms'] = round(self.root.duration_ms, 1)
+            return result
+
+        stages: Dict[str, float] = {}
+        durations: Dict[str, List[float]] = {}
+        leaves = []
+        for span in self._finished_spans():
+            if span is self.root:
+                continue
+            if span.name.startswith(STAGE_PREFIX):
+                stage = span.name[len(STAGE_PREFIX):]
+                stages[stage] = round(stages.get(stage, 0.0) + span.duration_ms, 1)
+                continue
+            durations.setdefault(span.name, []).append(span.duration_ms)
+            if not span.name.startswith('queue.'):
+                leaves.append(span)
+
+        operations = {}
+        for name, values in sorted(durations.items()):
+            values.sort()
+            operations[name] = {
+                'count': len(values),
+                'total_ms': round(sum(values), 1),
+                'max_ms': round(values[-1], 1),
+                'p95_ms': round(values[min(len(values) - 1, int(len(values) * 0.95))], 1),
+            }
+
+        leaves.sort(key=lambda span: span.duration_ms, reverse=True)
+        result = {
+            'trace_id': self.trace_id,
+            'total_ms': round(self.root.duration_ms, 1),
+            'stages': stages,
+            'operations': operations,
+            'slowest': [
+                dict({'name': span.name, 'duration_ms': round(span.duration_ms, 1)}, **span.attributes)
+                for span in leaves[:slowest]
+            ],
+        }
+        if self.dropped:
+            result['dropped_spans'] = self.dropped
+        return result
+
+    def to_otlp(self, service_name: Optional[str] = None) -> Dict:
+        """转换为OTLP/JSON（ExportTraceServiceRequest）"""
+        if service_name is None:
+            service_name = config.get('tracing.service_name', 'steam-game-recommender')
+        return {
+            'resourceSpans': [{
+                'resource': {'attributes': _otlp_attributes({'service.name': service_name})},
+                'scopeSpans': [{
+                    'scope': {'name': 'steam_mcp.tracing'},
+                    'spans': [self._otlp_span(span) for span in self._finished_spans()],
+                }],
+            }],
+        }
+
+    def _otlp_span(self, span: Span) -> Dict:
+        data = {
+            'traceId': self.trace_id,
+            'spanId': span.span_id,
+            'name': span.name,
+            'kind': SPAN_KINDS.get(span.kind, 1),
+            'startTimeUnixNano': str(span.start_ns),
+            'endTimeUnixNano': str(span.end_ns),
+            'attributes': _otlp_attributes(span.attributes),
+            'status': {'code': span.status},
+        }
+        if span.parent_id:
+            data['parentSpanId'] = span.parent_id
+        if span.error:
+            data['status']['message'] = span.error
+        return data
+
+
+def _otlp_attributes(attributes: Dict) -> List[Dict]:
+    result = []
+    for key, value in attributes.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            typed = {'boolValue': value}
+        elif isinstance(value, int):
+            typed = {'intValue': str(value)}
+        elif isinstance(value, float):
+            typed = {'doubleValue': value}
+        else:
+            typed = {'stringValue': str(value)}
+        result.append({'key': key, 'value': typed})
+    return result
+
+
+# ---------- 记录span ----------
+
+@contextmanager
+def start_trace(name: str, **attributes) -> Iterator[Optional[Trace]]:
+    """
+    开始一次trace（根span），退出时结束并按配置导出
+
+    追踪关闭（tracing.enabled=false）时返回None。
+    """
+    if not config.get('tracing.enabled', True):
+        yield None
+        return
+    trace = Trace(name, attributes)
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(trace.root)
+    try:
+        yield trace
+    except BaseException as e:
+        trace.root.record_error(e)
+        raise
+    finally:
+        trace.root.end()
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        export(trace)
+
+
+@contextmanager
+def span(name: str, kind: str = 'internal', **attributes) -> Iterator[Any]:
+    """在当前trace中记录一个子span；没有活动trace时返回空操作对象"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield _NOOP_SPAN
+        return
+    parent = _current_span.get()
+    current = Span(name, parent.span_id if parent else None, kind, attributes)
+    if not trace.add(current):
+        yield _NOOP_SPAN
+        return
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.record_error(e)
+        raise
+    finally:
+        current.end()
+        _current_span.reset(token)
+
+
+def traced(name: str, kind: str = 'internal') -> Callable:
+    """把函数（同步或协程）的每次调用记录为span"""
+    def decorator(fn: Callable) -> Callable:
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(name, kind):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name, kind):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_span(name: str, start_ns: int, end_ns: Optional[int] = None, **attributes):
+    """记录一个已经发生的时间区间（如排队等待）为当前span的子span"""
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    parent = _current_span.get()
+    finished = Span(name, parent.span_id if parent else None, attributes=attributes, start_ns=start_ns)
+    finished.end(end_ns)
+    trace.add(finished)
+
+
+def set_attribute(key: str, value: Any):
+    """给当前span设置属性"""
+    current = _current_span.get()
+    if current is not None and _current_trace.get() is not None:
+        current.set_attribute(key, value)
+
+
+def current_trace() -> Optional[Trace]:
+    """当前活动的trace（没有时返回None）"""
+    return _current_trace.get()
+
+
+def bind(fn: Callable, queue: Optional[str] = None, name: Optional[str] = None, **attributes) -> Callable:
+    """
+    把当前的trace上下文绑定到fn，供提交到线程池执行（每次提交调用一次，各自复制一份上下文）
+
+    Args:
+        queue: 不为空时把提交到开始执行之间的等待记录为 queue.<queue> span
+        name: 不为空时把fn的执行记录为该名称的span（attributes为其属性）
+    """
+    if _current_trace.get() is None:
+        return fn
+    context = contextvars.copy_context()
+    submitted_ns = time.time_ns()
+
+    def call(*args, **kwargs):
+        if queue:
+            record_span(f'queue.{queue}', submitted_ns, **attributes)
+        if name is None:
+            return fn(*args, **kwargs)
+        with span(name, **attributes):
+            return fn(*args, **kwargs)
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        return context.run(call, *args, **kwargs)
+
+    return run
+
+
+# ---------- 导出 ----------
+
+def export(trace: Trace):
+    """按 tracing.exporter 导出trace：none / file（OTLP/JSON逐行追加）/ otlp_http（发送到Collector）"""
+    exporter = config.get('tracing.exporter', 'none')
+    if exporter == 'none':
+        return
+    payload = trace.to_otlp()
+    if exporter == 'file':
+        _export_executor.submit(_export_file, payload, config.get('tracing.export_path', 'logs/traces.jsonl'))
+    elif exporter == 'otlp_http':
+        _export_executor.submit(_export_http, payload,
+                                config.get('tracing.otlp_endpoint', 'http://localhost:4318/v1/traces'))
+    else:
+        logger.warning(f"未知的trace导出方式: {exporter}")
+
+
+def _export_file(payload: Dict, path: str):
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(payload, ensure_ascii=False, separators=(',', ':')) + '\n')
+    except OSError as e:
+        logger.warning(f"写入trace文件失败: {e}")
+
+
+def _export_http(payload: Dict, endpoint: str):
+    try:
+        response = requests.post(endpoint, json=payload, timeout=5)
+        if response.status_code >= 400:
+            logger.warning(f"导出trace失败: HTTP {response.status_code}")
+    except requests.RequestException as e:
+        logger.warning(f"导出trace失败: {e}")
+
+
+if __name__ == "__main__":
+    with start_trace('demo', query='示例') as demo:
+        with span('stage.work'):
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                for index in range(3):
+                    pool.submit(bind(time.sleep, queue='demo', name='sleep', index=index), 0.01)
+    print(json.dumps(demo.summary(), ensure_ascii=False, indent=2))
@@ -0,0 +1,92 @@
+"""
+测试游戏详情裁剪（离线，使用benchmarks/fixtures中的appdetails响应）
+"""
+import json
+import sys
+import os
+
+# 添加src目录到路径
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+sys.path.insert(0, src_path)
+
+from src.game_details import encoded_size, project_details
+from src.steam_crawler import SteamCrawlerBase
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'benchmarks', 'fixtures', 'appdetails_1145360.json')
+
+
+def _load_details() -> dict:
+    with open(FIXTURE, 'r', encoding='utf-8') as f:
+        app_id, entry = next(iter(json.load(f).items()))
+    return SteamCrawlerBase()._format_game_details(app_id, entry['data'])
+
+
+def test_all_fields_without_budget_is_unchanged():
+    """fields=["all"], max_bytes=0 返回与未投影时完全相同的详情"""
+    print("\n" + "="*70)
+    print("测试1: 全部字段且不限字节")
+    print("="*70)
+
+    details = _load_details()
+    projected = project_details(details, ['all'], 0)
+    assert projected == details
+    assert json.dumps(projected, ensure_ascii=False) == json.dumps(details, ensure_ascii=False)
+    print(f"✅ 与完整详情一致 ({encoded_size(projected)}B)")
+
+
+def test_fields_and_budget():
+    """指定字段时只返回这些字段（及app_id/name），并满足字节预算"""
+    print("\n" + "="*70)
+    print("测试2: 字段投影与字节预算")
+    print("="*70)
+
+    details = _load_details()
+    projected = project_details(details, ['price', 'genres'], 8192)
+    assert set(projected) == {'app_id', 'name', 'price', 'genres'}
+
+    budgeted = project_details(details, ['all'], 2048)
+    assert encoded_size(budgeted) <= 2048
+    assert budgeted['truncated_fields']
+    print(f"✅ 预算内 ({encoded_size(budgeted)}B)，被截断字段: {', '.join(budgeted['truncated_fields'])}")
+
+
+def test_budget_enforced_for_long_fields_outside_shrink_order():
+    """SHRINK_ORDER之外的字段过长时同样满足字节预算（含truncated_fields本身）"""
+    print("\n" + "="*70)
+    print("测试3: 超长的其他字段")
+    print("="*70)
+
+    details = _load_details()
+    details['developers'] = [f'开发商{i}' * 20 for i in range(200)]
+    details['genres'] = [f'类型{i}' * 20 for i in range(200)]
+    details['header_image'] = 'https://example.com/' + 'x' * 5000
+    details['achievements'] = {'total': 100, 'highlighted': ['成就' * 50] * 100}
+
+    for max_bytes in (8192, 4096, 1024, 512):
+        projected = project_details(details, ['all'], max_bytes)
+        assert encoded_size(projected) <= max_bytes, (max_bytes, encoded_size(projected))
+        assert projected['app_id'] == details['app_id'] and projected['name'] == details['name']
+        print(f"✅ 预算{max_bytes}: {encoded_size(projected)}B，被截断字段: {', '.join(projected['truncated_fields'])}")
+
+
+def main():
+    """运行所有测试"""
+    print("\n🧪 开始测试游戏详情裁剪...")
+
+    try:
+        test_all_fields_without_budget_is_unchanged()
+        test_fields_and_budget()
+        test_budget_enforced_for_long_fields_outside_shrink_order()
+
+        print("\n" + "="*70)
+        print("✅ 所有测试完成!")
+        print("="*70)
+
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    main()
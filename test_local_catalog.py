@@ -0,0 +1,96 @@
+"""
+测试本地游戏目录（离线，不持久化）：类型别名整词匹配、记录过期、与TF-IDF共用分词
+"""
+import sys
+import os
+import time
+
+# 添加src目录到路径
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+sys.path.insert(0, src_path)
+
+from src.local_catalog import LocalCatalog, split_words
+from src.tfidf_ranker import analyze
+
+
+def _game(app_id: str, name: str, tags, price: float = 50.0) -> dict:
+    return {
+        'app_id': app_id,
+        'name': name,
+        'tags': list(tags),
+        'developers': ['测试工作室'],
+        'price': price,
+        'enrichment_status': 'ok',
+    }
+
+
+def _catalog(ttl: float = 3600) -> LocalCatalog:
+    catalog = LocalCatalog(persist=False, ttl=ttl)
+    catalog.ingest([
+        _game('1', '剑与魔法', ['动作', '角色扮演']),
+        _game('2', '星际贸易', ['模拟', '策略']),
+    ])
+    return catalog
+
+
+def test_genre_alias_matches_whole_words():
+    """英文类型名只按整词匹配，"transaction" 不会被当成 "action" """
+    print("\n" + "="*70)
+    print("测试1: 类型别名整词匹配")
+    print("="*70)
+
+    catalog = _catalog()
+    assert [g['app_id'] for g in catalog.search('action rpg')] == ['1']
+    assert '动作' not in catalog._expand_terms('transaction')
+    assert catalog.search('transaction') == []
+    print("✅ action命中动作类，transaction不命中")
+
+
+def test_expired_records_are_evicted():
+    """收录超过ttl的记录不再返回，并移出索引"""
+    print("\n" + "="*70)
+    print("测试2: 记录过期")
+    print("="*70)
+
+    catalog = _catalog(ttl=60)
+    catalog._records['1']['catalog_indexed_at'] = time.time() - 120
+    assert [g['app_id'] for g in catalog.search('')] == ['2']
+    assert catalog.search('action') == []
+    stats = catalog.get_stats()
+    assert stats['expired'] == 1 and stats['games'] == 1, stats
+    print(f"✅ 过期记录已移出: {stats}")
+
+
+def test_tokenizer_shared_with_tfidf():
+    """TF-IDF排序与本地目录使用同一套切分规则"""
+    print("\n" + "="*70)
+    print("测试3: 共用分词")
+    print("="*70)
+
+    words, runs = split_words('开放世界 ＲＰＧ 2077')
+    assert words == ['rpg', '2077'] and runs == ['开放世界']
+    assert analyze('开放世界 <b>RPG</b>') == ['rpg', '开', '放', '世', '界', '开放', '放世', '世界']
+    print("✅ 全角/HTML处理一致")
+
+
+def main():
+    """运行所有测试"""
+    print("\n🧪 开始测试本地游戏目录...")
+
+    try:
+        test_genre_alias_matches_whole_words()
+        test_expired_records_are_evicted()
+        test_tokenizer_shared_with_tfidf()
+
+        print("\n" + "="*70)
+        print("✅ 所有测试完成!")
+        print("="*70)
+
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+测试推荐进度通知的转发（离线）：工作线程产生的通知按顺序送达，发送失败不影响后续通知
+"""
+import asyncio
+import random
+import sys
+import os
+
+# 添加src目录到路径
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+sys.path.insert(0, src_path)
+
+from mcp_server import _ProgressBridge
+
+
+class RecordingContext:
+    """记录收到的通知；发送耗时随机，第3条日志通知发送失败"""
+
+    def __init__(self):
+        self.progress = []
+        self.messages = []
+
+    async def report_progress(self, progress, total=None, message=None):
+        await asyncio.sleep(random.uniform(0, 0.005))
+        self.progress.append(progress)
+
+    async def info(self, message, logger_name=None, extra=None):
+        await asyncio.sleep(random.uniform(0, 0.005))
+        if message == '已评分3款':
+            raise ConnectionError('客户端连接已断开')
+        self.messages.append(message)
+
+
+def _event(completed: int) -> dict:
+    return {'stage': 'scoring', 'completed': completed, 'total': 20, 'top': [], 'message': f'已评分{completed}款'}
+
+
+def test_notifications_arrive_in_order():
+    """20条进度通知按产生顺序送达，且在aclose()返回前全部发送完"""
+    print("\n" + "="*70)
+    print("测试1: 进度通知顺序")
+    print("="*70)
+
+    ctx = RecordingContext()
+
+    async def run():
+        bridge = _ProgressBridge(ctx, asyncio.get_running_loop())
+
+        def worker():
+            for completed in range(1, 21):
+                bridge(_event(completed))
+
+        await asyncio.to_thread(worker)
+        await bridge.aclose()
+        bridge(_event(21))
+
+    asyncio.run(run())
+    assert ctx.progress == [2 + completed for completed in range(1, 21)], ctx.progress
+    assert ctx.messages == [f'已评分{completed}款' for completed in range(1, 21) if completed != 3]
+    print(f"✅ 收到{len(ctx.progress)}条进度通知，顺序正确；发送失败的通知已记录日志")
+
+
+def main():
+    """运行所有测试"""
+    print("\n🧪 开始测试进度通知转发...")
+
+    try:
+        test_notifications_arrive_in_order()
+
+        print("\n" + "="*70)
+        print("✅ 所有测试完成!")
+        print("="*70)
+
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+测试用户查询规范化（离线）：书写差异应得到相同的键，含义不同的查询不能冲突
+"""
+import sys
+import os
+
+# 添加src目录到路径
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+sys.path.insert(0, src_path)
+
+from src.requirement_analyzer import normalize_query
+
+
+def test_equivalent_queries_share_key():
+    """全角/大小写/标点/人民币价格写法不同的查询规范化后相同"""
+    print("\n" + "="*70)
+    print("测试1: 书写差异")
+    print("="*70)
+
+    assert normalize_query('推荐一些RPG游戏！') == normalize_query('推荐 一些 rpg 游戏')
+    assert normalize_query('¥70以内') == normalize_query('70元以内')
+    assert normalize_query('￥70以内') == normalize_query('70块钱以内')
+    print(f"✅ {normalize_query('￥70以内')}")
+
+
+def test_distinct_queries_do_not_collide():
+    """币种不同、C++/C# 这类含符号的查询不会得到相同的键"""
+    print("\n" + "="*70)
+    print("测试2: 含义不同的查询")
+    print("="*70)
+
+    assert normalize_query('$70以内') != normalize_query('¥70以内')
+    assert normalize_query('$70以内') != normalize_query('70以内')
+
+    keys = {normalize_query(q) for q in ('C++ 编程游戏', 'C# 编程游戏', 'C 编程游戏')}
+    assert len(keys) == 3
+    print(f"✅ {', '.join(sorted(keys))}")
+
+
+def main():
+    """运行所有测试"""
+    print("\n🧪 开始测试查询规范化...")
+
+    try:
+        test_equivalent_queries_share_key()
+        test_distinct_queries_do_not_collide()
+
+        print("\n" + "="*70)
+        print("✅ 所有测试完成!")
+        print("="*70)
+
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+测试熔断器半开状态下探测请求被取消/中断后的恢复
+"""
+import asyncio
+import sys
+import os
+
+# 添加src目录到路径
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+sys.path.insert(0, src_path)
+
+from src.resilience import (CircuitBreaker, CircuitOpenError, ResilientCaller, RetryableError, RetryPolicy,
+                            SteamClientError)
+
+
+def _half_open_caller() -> ResilientCaller:
+    """创建一个search熔断器已处于半开状态的调用器"""
+    caller = ResilientCaller(RetryPolicy(max_attempts=1, base_delay=0, max_delay=0))
+    caller.breakers['search'] = CircuitBreaker('search', failure_threshold=1, reset_timeout=0)
+
+    def unavailable():
+        raise RetryableError('HTTP 503')
+
+    try:
+        caller.call('search', unavailable)
+    except RetryableError:
+        pass
+    assert caller.breakers['search'].state == CircuitBreaker.HALF_OPEN
+    return caller
+
+
+def test_cancelled_async_probe_releases_breaker():
+    """异步探测请求被取消后，下一个请求仍可探测并恢复熔断器"""
+    print("\n" + "="*70)
+    print("测试1: 半开状态下异步探测被取消")
+    print("="*70)
+
+    caller = _half_open_caller()
+
+    async def run():
+        started = asyncio.Event()
+
+        async def slow_probe():
+            started.set()
+            await asyncio.sleep(10)
+
+        task = asyncio.create_task(caller.call_async('search', slow_probe))
+        await started.wait()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+        async def ok():
+            return 'ok'
+
+        return await caller.call_async('search', ok)
+
+    assert asyncio.run(run()) == 'ok'
+    assert caller.breakers['search'].state == CircuitBreaker.CLOSED
+    print("✅ 取消的探测已释放，熔断器恢复closed")
+
+
+def test_interrupted_sync_probe_releases_breaker():
+    """同步探测请求被中断后，下一个请求仍可探测并恢复熔断器"""
+    print("\n" + "="*70)
+    print("测试2: 半开状态下同步探测被中断")
+    print("="*70)
+
+    caller = _half_open_caller()
+
+    def interrupted():
+        raise KeyboardInterrupt()
+
+    try:
+        caller.call('search', interrupted)
+    except KeyboardInterrupt:
+        pass
+
+    assert caller.call('search', lambda: 'ok') == 'ok'
+    assert caller.breakers['search'].state == CircuitBreaker.CLOSED
+    print("✅ 中断的探测已释放，熔断器恢复closed")
+
+
+def test_half_open_allows_single_probe():
+    """半开状态下探测进行中时，其他请求仍被拒绝"""
+    print("\n" + "="*70)
+    print("测试3: 半开状态只放行一个探测请求")
+    print("="*70)
+
+    breaker = CircuitBreaker('search', failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    breaker.before_call()
+    try:
+        breaker.before_call()
+    except CircuitOpenError:
+        print("✅ 第二个请求被拒绝")
+    else:
+        raise AssertionError('半开状态下放行了第二个请求')
+
+
+def test_release_requires_probe_token():
+    """只有持有探测令牌的调用才能归还名额，被取消的非探测调用不会放行第二个探测"""
+    print("\n" + "="*70)
+    print("测试4: 探测令牌")
+    print("="*70)
+
+    breaker = CircuitBreaker('search', failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    probe = breaker.before_call()
+    assert probe is not None
+    breaker.release_probe(None)
+    breaker.release_probe(object())
+    try:
+        breaker.before_call()
+    except CircuitOpenError:
+        pass
+    else:
+        raise AssertionError('非探测调用归还了探测名额')
+    breaker.release_probe(probe)
+    assert breaker.before_call() is not None
+    print("✅ 只有探测请求本身能归还名额")
+
+
+def test_only_steam_client_errors_count_as_success():
+    """4xx（SteamClientError）记为成功；解析错误等其他异常不改变熔断状态"""
+    print("\n" + "="*70)
+    print("测试5: 不可重试错误与熔断状态")
+    print("="*70)
+
+    caller = _half_open_caller()
+
+    def broken_parser():
+        raise TypeError('parser bug')
+
+    try:
+        caller.call('search', broken_parser)
+    except TypeError:
+        pass
+    breaker = caller.breakers['search']
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.get_stats()['consecutive_failures'] == 1
+
+    def not_found():
+        raise SteamClientError('HTTP 404', 404)
+
+    try:
+        caller.call('search', not_found)
+    except SteamClientError:
+        pass
+    assert breaker.state == CircuitBreaker.CLOSED
+    print("✅ 程序错误不关闭熔断器，404关闭熔断器")
+
+
+def main():
+    """运行所有测试"""
+    print("\n🧪 开始测试熔断器...")
+
+    try:
+        test_cancelled_async_probe_releases_breaker()
+        test_interrupted_sync_probe_releases_breaker()
+        test_half_open_allows_single_probe()
+        test_release_requires_probe_token()
+        test_only_steam_client_errors_count_as_success()
+
+        print("\n" + "="*70)
+        print("✅ 所有测试完成!")
+        print("="*70)
+
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    main()
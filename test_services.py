@@ -0,0 +1,66 @@
+"""
+测试服务容器关闭后重新创建（离线，使用benchmarks中的LLM替身服务器）
+"""
+import asyncio
+import sys
+import os
+
+# 添加src目录到路径
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+sys.path.insert(0, src_path)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'benchmarks'))
+
+from config_loader import config
+from mock_llm_server import MockLLMServer
+
+config.set('prewarm.enabled', False)
+
+from services import get_services, shutdown_services
+
+
+def test_llm_client_usable_after_shutdown():
+    """shutdown_services()之后新建的容器仍能调用LLM"""
+    print("\n" + "="*70)
+    print("测试1: 关闭服务容器后重新获取并调用LLM")
+    print("="*70)
+
+    with MockLLMServer(ttft_ms=0, per_token_ms=0, jitter_ms=0) as mock:
+        async def run():
+            first = get_services()
+            await shutdown_services()
+            services = get_services()
+            assert services is not first
+            try:
+                # 与容器共享同一个底层HTTP客户端，只改为指向替身服务器
+                llm = services.llm_client.with_options(base_url=mock.url)
+                completion = llm.chat.completions.create(
+                    model='qwen-plus', messages=[{'role': 'user', 'content': '推荐一款游戏'}]
+                )
+                return completion.choices[0].message.content
+            finally:
+                await shutdown_services()
+
+        content = asyncio.run(run())
+    assert content
+    print("✅ 重新创建的容器LLM调用成功")
+
+
+def main():
+    """运行所有测试"""
+    print("\n🧪 开始测试服务容器...")
+
+    try:
+        test_llm_client_usable_after_shutdown()
+
+        print("\n" + "="*70)
+        print("✅ 所有测试完成!")
+        print("="*70)
+
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+测试链路追踪（离线）：被合并的推荐请求也能得到timings
+"""
+import sys
+import os
+import threading
+import time
+
+# 添加src目录到路径
+src_path = os.path.join(os.path.dirname(__file__), 'src')
+sys.path.insert(0, src_path)
+
+from config_loader import config
+
+config.set('tracing.enabled', True)
+config.set('tracing.exporter', 'none')
+config.set('recommendation.score_cache.persist', False)
+
+import tracing
+from recommendation_agent import SteamRecommendationAgent
+
+
+def test_shared_trace_summary():
+    """shared_from指向执行方trace时，汇总使用执行方的阶段耗时并保留自己的trace_id"""
+    print("\n" + "="*70)
+    print("测试1: 关联执行方trace的汇总")
+    print("="*70)
+
+    with tracing.start_trace('leader') as leader:
+        with tracing.span('stage.search'):
+            time.sleep(0.01)
+    with tracing.start_trace('follower') as follower:
+        follower.shared_from = leader
+
+    summary = follower.summary()
+    assert summary['trace_id'] == follower.trace_id
+    assert summary['shared_trace_id'] == leader.trace_id
+    assert summary['stages'] == leader.summary()['stages']
+    print(f"✅ {summary['stages']}")
+
+
+def test_coalesced_recommend_gets_leader_timings():
+    """并发的相同查询合并执行，等待方的timings包含执行方记录的阶段"""
+    print("\n" + "="*70)
+    print("测试2: 合并请求的timings")
+    print("="*70)
+
+    agent = SteamRecommendationAgent()
+    started = threading.Event()
+
+    def fake_recommend(user_query, max_output_results, progress_callback, cancel_event):
+        started.set()
+        with tracing.span('stage.search'):
+            time.sleep(0.2)
+        return {'recommendations': []}
+
+    agent._recommend_games = fake_recommend
+    summaries = {}
+
+    def request(name):
+        with tracing.start_trace('recommend_games') as trace:
+            agent.recommend_games('推荐开放世界RPG', max_output_results=5)
+        summaries[name] = trace.summary()
+
+    leader = threading.Thread(target=request, args=('leader',))
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=request, args=('follower',))
+    follower.start()
+    leader.join()
+    follower.join()
+
+    assert agent.get_coalesce_stats()['coalesced'] == 1
+    assert 'search' in summaries['leader']['stages']
+    assert summaries['follower']['stages'] == summaries['leader']['stages']
+    assert summaries['follower']['shared_trace_id'] == summaries['leader']['trace_id']
+    print(f"✅ 等待方timings: {summaries['follower']['stages']}")
+
+
+def main():
+    """运行所有测试"""
+    print("\n🧪 开始测试链路追踪...")
+
+    try:
+        test_shared_trace_summary()
+        test_coalesced_recommend_gets_leader_timings()
+
+        print("\n" + "="*70)
+        print("✅ 所有测试完成!")
+        print("="*70)
+
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    main()